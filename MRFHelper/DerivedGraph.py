@@ -0,0 +1,194 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+
+
+"""
+Dependency graph of the derived quantities of a frame (section properties, panel zone
+thickness, loads and masses, axial compression ratio of columns, hinge parameters
+and model information),
+which are recalculated lazily and only if their inputs have changed
+Writen by: Wenchen Lie
+"""
+
+# Inputs of the derived quantities, i.e. the changes of `Frame.derive`
+INPUTS = (
+    'story_height', 'bay_length', 'plane_dimensions', 'MF_number',
+    'exterior_column_tributary_area', 'interior_column_tributary_area',
+    'beams', 'columns', 'doubler_plate', 'column_splice', 'beam_splice', 'RBS_length',
+    'dead_load', 'live_load', 'cladding_load', 'E', 'fy_beam', 'fy_column', 'miu',
+    'cc_weight', 'cc_mass', 'base_support', 'beam_column_connection', 'RBS_paras',
+    'panel_zone_deformation', 'soil_constraint', 'frame_name', 'notes',
+)
+
+# Derived quantities in topological order:
+# {quantity: (owner, attributes, inputs, upstream quantities)}
+QUANTITIES = {
+    'beam_properties': ('StructuralComponents', ('beam_properties',), {'beams', 'fy_beam'}, ()),
+    'column_properties': ('StructuralComponents', ('column_properties',), {'columns', 'fy_beam'}, ()),
+    'RBS_length': ('StructuralComponents', ('RBS_length',),
+                   {'RBS_length', 'beam_column_connection', 'RBS_paras'}, ('beam_properties',)),
+    'pz_thickness': ('StructuralComponents', ('pz_thickness',),
+                     {'column_splice', 'doubler_plate'}, ('column_properties',)),
+    'loads': ('LoadAndMaterial', ('F_node', 'F_grav', 'mass_node', 'mass_grav'),
+              {'story_height', 'plane_dimensions', 'MF_number', 'exterior_column_tributary_area',
+               'interior_column_tributary_area', 'dead_load', 'live_load', 'cladding_load',
+               'cc_weight', 'cc_mass'}, ()),
+    'PPy': ('LoadAndMaterial', ('PPy', 'PPy_scale'),
+            {'fy_column', 'column_splice'}, ('loads', 'column_properties')),
+    'hinge_table': ('Frame', ('hinge_table',),
+                    {'story_height', 'bay_length', 'E', 'fy_beam', 'column_splice',
+                     'beam_column_connection', 'base_support'}, ('beam_properties', 'column_properties', 'PPy')),
+    'dict_info': ('Frame', ('dict_info',), set(INPUTS), ()),
+}
+
+# Quantities that can be updated partially: {quantity: input}, e.g. only
+# the properties of the changed floors are looked up after changing beams
+PARTIAL = {'beam_properties': 'beams', 'column_properties': 'columns'}
+
+# {attribute: quantity}
+_ATTRIBUTES = {attr: quantity for quantity, (_, attrs, _, _) in QUANTITIES.items() for attr in attrs}
+
+
+def affected(inputs: list[str]) -> list[str]:
+    """Derived quantities affected by changed inputs (directly or through
+    upstream quantities), in topological order
+
+    Args:
+        inputs (list[str]): Changed inputs, see `INPUTS`
+
+    Returns:
+        list[str]: Affected quantities
+    """
+    unknown = set(inputs) - set(INPUTS)
+    if unknown:
+        raise ValueError(f'Unknown inputs: {unknown}, available inputs: {list(INPUTS)}')
+    inputs, result = set(inputs), []
+    for quantity, (_, _, inputs_, upstream) in QUANTITIES.items():
+        if inputs & inputs_ or any(q in result for q in upstream):
+            result.append(quantity)
+    return result
+
+
+class LazyAttribute:
+    """Derived attribute recalculated on access after being invalidated. A valid value
+    is stored in the `__dict__` of the instance, so that reading it has no overhead."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        graph: DerivedGraph = instance.__dict__.get('_graph')
+        if graph is None:
+            raise AttributeError(f"'{type(instance).__name__}' object has no attribute '{self.name}'")
+        graph.evaluate(_ATTRIBUTES[self.name])
+        return instance.__dict__[self.name]
+
+
+class DerivedGraph:
+
+    def __init__(self, frame: Frame):
+        """Dependency graph of the derived quantities of a frame. Changing an input invalidates
+        the quantities depending on it (see `QUANTITIES`), e.g. `doubler_plate` only
+        invalidates `pz_thickness`, `live_load` invalidates the loads, masses and `PPy`.
+        The invalidated quantities are recalculated when they are accessed.
+
+        Args:
+            frame (Frame): Frame object
+        """
+        self.frame = frame
+        self.pending: dict[str, set | None] = dict()  # {quantity: changed keys (None for all)}
+        self._stale: dict[str, object] = dict()  # values before invalidation
+        self._evaluating: set[str] = set()
+
+    def attach(self, *objects):
+        """Attach the frame and its components owning the derived quantities"""
+        for obj in objects:
+            obj._graph = self
+
+    def owner(self, quantity: str):
+        name = QUANTITIES[quantity][0]
+        return self.frame if name == 'Frame' else getattr(self.frame, name)
+
+    def invalidate(self, *inputs: str, keys: dict[str, set]=None) -> list[str]:
+        """Invalidate the quantities depending on changed inputs
+
+        Args:
+            inputs (str): Changed inputs, see `INPUTS`
+            keys (dict[str, set], optional): Changed floors (stories) of partially changed
+            inputs, e.g. {"beams": {3}}, so that only these floors are recalculated
+
+        Returns:
+            list[str]: Invalidated quantities
+        """
+        keys = dict() if keys is None else keys
+        quantities = affected(inputs)
+        for quantity in quantities:
+            owner = self.owner(quantity)
+            attrs = QUANTITIES[quantity][1]
+            partial_input = PARTIAL.get(quantity)
+            partial = (partial_input in keys and set(inputs) & QUANTITIES[quantity][2] == {partial_input})
+            if partial and quantity not in self.pending and attrs[0] in owner.__dict__:
+                self._stale[quantity] = owner.__dict__[attrs[0]]
+                self.pending[quantity] = set(keys[partial_input])
+            elif partial and self.pending.get(quantity) is not None:
+                self.pending[quantity] |= set(keys[partial_input])
+            elif attrs[0] in owner.__dict__ or quantity in self.pending:
+                if attrs[0] in owner.__dict__:
+                    self._stale[quantity] = owner.__dict__[attrs[0]]
+                self.pending[quantity] = None
+            # else: not evaluated yet (e.g. `hinge_table`), calculated when first accessed
+            for attr in attrs:
+                owner.__dict__.pop(attr, None)
+        return quantities
+
+    def evaluate(self, quantity: str):
+        """Recalculate a quantity (and its upstream quantities)"""
+        if quantity in self._evaluating:
+            raise RuntimeError(f'Circular dependency of {quantity}')
+        self._evaluating.add(quantity)
+        try:
+            owner = self.owner(quantity)
+            for upstream in QUANTITIES[quantity][3]:
+                getattr(self.owner(upstream), QUANTITIES[upstream][1][0])
+            keys = self.pending.get(quantity)
+            stale = self._stale.get(quantity)
+            frame = self.frame
+            if quantity in PARTIAL:
+                if keys is not None:
+                    setattr(owner, quantity, stale)
+                method = owner._get_beam_properties if quantity == 'beam_properties' else owner._get_column_properties
+                method(frame, keys)
+            elif quantity == 'RBS_length':
+                owner._get_RBS_length(frame)
+            elif quantity == 'pz_thickness':
+                owner._get_panel_zone_thickness()
+            elif quantity == 'loads':
+                owner._calculate_load(frame)
+            elif quantity == 'PPy':
+                owner._calculate_PPy(frame)
+            elif quantity == 'hinge_table':
+                from .HingeTable import HingeTable
+                frame.hinge_table = HingeTable(frame)
+            elif quantity == 'dict_info':
+                from . import WriteInfo
+                frame.dict_info = WriteInfo.write_info_to_dict(frame)
+                if stale is not None:
+                    frame.dict_info['References'] = stale.get('References')
+        except Exception:
+            for attr in QUANTITIES[quantity][1]:
+                owner.__dict__.pop(attr, None)  # e.g. the stale value set for partial update
+            raise
+        finally:
+            self._evaluating.discard(quantity)
+        self.pending.pop(quantity, None)
+        self._stale.pop(quantity, None)
+
+    def update(self):
+        """Recalculate all invalidated quantities"""
+        for quantity in QUANTITIES:
+            if quantity in self.pending:
+                self.evaluate(quantity)
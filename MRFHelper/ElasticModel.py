@@ -0,0 +1,343 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+from math import pi
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import scipy.linalg
+
+
+"""
+Elastic surrogate of the OpenSees model assembled directly from the frame data with
+sparse matrices, which gives the periods, mode shapes and elastic drifts in milliseconds
+Writen by: Wenchen Lie
+"""
+
+
+class ElasticModel:
+
+    def __init__(self, frame: Frame):
+        """Elastic model of a frame equivalent to the OpenSees model (`ModelBuilder`) before
+        gravity loading. The initial stiffness of the hinges (IMK springs) and panel zones
+        (Hysteretic springs) is used, the rigid links and the translational springs are modeled
+        as rigid constraints, and the leaning column, which is pinned at each floor, only
+        contributes its mass. With the rigid diaphragm, all masses are lumped at the lateral
+        degrees of freedom (DOFs) of the floors, so that the model is condensed exactly into
+        a N x N lateral stiffness matrix.
+
+        Args:
+            frame (Frame): Frame object with all steps finished
+        """
+        if not frame.ConnectionAndBoundary.rigid_disphragm:
+            raise ValueError('The elastic model requires a rigid diaphragm')
+        self.frame = frame
+        self.n = 10.  # stiffness modification factor of the elastic elements and hinges
+        self.ndof = frame.N  # DOFs 0 ~ N-1: lateral displacements of floor 2 ~ N+1
+        self.ground = -1  # index of the fixed DOF, replaced after assembly
+        self._elements: list[tuple] = []  # (point_i, point_j, x_i, y_i, x_j, y_j, EA, EI)
+        self._springs: list[tuple] = []  # (dof_i, dof_j, stiffness)
+        self._assemble()
+
+    # ------------------------------------------------------------------------
+    # DOFs and points, a point is (u, v, r), each is a list of (DOF, coefficient)
+    # ------------------------------------------------------------------------
+
+    def _new_dof(self) -> int:
+        self.ndof += 1
+        return self.ndof - 1
+
+    def _node(self) -> tuple:
+        """Point with independent DOFs"""
+        return ([(self._new_dof(), 1.)], [(self._new_dof(), 1.)], [(self._new_dof(), 1.)])
+
+    def _hinge(self, point: tuple, K: float) -> tuple:
+        """Point connected to `point` by a rotational spring (rigid in translation)"""
+        r = self._new_dof()
+        self._springs.append((point[2][0][0], r, K))
+        return (point[0], point[1], [(r, 1.)])
+
+    def _joint(self, FF: int, AA: int) -> dict[str, tuple]:
+        """Points of the panel zone at a beam-column joint. The panel zone is a rigid
+        parallelogram (cruciform if the panel zone deformation is ignored): the columns
+        are connected to the horizontal links (rotation `rh`), the beams are connected
+        to the vertical links (rotation `rv`), and the panel zone spring connects both."""
+        frame = self.frame
+        SC = frame.StructuralComponents
+        SS = self._column_at_floor(FF - 1)
+        d_col = SC.column_properties[SS][AA-1][1]
+        d_beam = self._beam_depth(FF, AA)
+        a, b = d_col / 2, d_beam / 2
+        ux, uy, rv = FF - 2, self._new_dof(), self._new_dof()
+        if frame.ConnectionAndBoundary.panel_zone_deformation:
+            rh = self._new_dof()
+            E, mu = frame.LoadAndMaterial.E, frame.LoadAndMaterial.miu
+            G = E / (2 * (1 + mu))
+            tp = SC.pz_thickness[FF][AA-1]
+            # initial stiffness of the Hysteretic material in `PanelZone` (M1 / gamma1)
+            self._springs.append((rv, rh, 0.55 * 3**0.5 * G * d_col * tp * d_beam))
+        else:
+            rh = rv
+        return {
+            'B': ([(ux, 1.), (rv, b)], [(uy, 1.)], [(rh, 1.)]),
+            'T': ([(ux, 1.), (rv, -b)], [(uy, 1.)], [(rh, 1.)]),
+            'R': ([(ux, 1.)], [(uy, 1.), (rh, a)], [(rv, 1.)]),
+            'L': ([(ux, 1.)], [(uy, 1.), (rh, -a)], [(rv, 1.)]),
+            'a': a, 'b': b,
+        }
+
+    def _beam_depth(self, FF: int, AA: int) -> float:
+        """Beam depth at a beam-column joint (average of the left and right beams)"""
+        beam_properties = self.frame.StructuralComponents.beam_properties
+        if AA == 1:
+            return beam_properties[FF][0][1]
+        elif AA == self.frame.axis:
+            return beam_properties[FF][-1][1]
+        return (beam_properties[FF][AA-2][1] + beam_properties[FF][AA-1][1]) / 2
+
+    def _column_at_floor(self, SS_b: int) -> int:
+        """Story whose column section is used at the top of story `SS_b`"""
+        if SS_b in self.frame.StructuralComponents.column_splice:
+            return SS_b + 1
+        return SS_b
+
+    # ------------------------------------------------------------------------
+    # Assembly
+    # ------------------------------------------------------------------------
+
+    def _assemble(self):
+        frame = self.frame
+        SC = frame.StructuralComponents
+        CB = frame.ConnectionAndBoundary
+        E, n = frame.LoadAndMaterial.E, self.n
+        story_height = frame.BuildingGeometry.story_height
+        bay_length = frame.BuildingGeometry.bay_length
+        Floor = [0., 0.] + [float(sum(story_height[:FF-1])) for FF in range(2, frame.N + 2)]
+        Axis = [0., 0.] + list(np.cumsum(bay_length, dtype=float))
+        joints = {(FF, AA): self._joint(FF, AA) for FF in range(2, frame.N + 2)
+                  for AA in range(1, frame.axis + 1)}
+        fixed = ([(self.ground, 0.)],) * 3
+        hinges = frame.hinge_table  # initial stiffness of the hinges
+        K_beam, K_column = hinges.beam_parameters['K'].tolist(), hinges.column_parameters['K'].tolist()
+        # Columns
+        for SS in range(1, frame.N + 1):
+            FF_b, FF_t = SS, SS + 1
+            SS_t = self._column_at_floor(SS)
+            for AA in range(1, frame.axis + 1):
+                A_b, I_b = SC.column_properties[SS][AA-1][5:7]
+                A_t, I_t = SC.column_properties[SS_t][AA-1][5:7]
+                d_beam_b = 0 if FF_b == 1 else self._beam_depth(FF_b, AA)
+                d_beam_t = self._beam_depth(FF_t, AA)
+                y_b, y_t = Floor[FF_b] + d_beam_b/2, Floor[FF_t] - d_beam_t/2
+                K_b = K_column[hinges.column_index[(SS, AA, 'b')]]
+                K_t = K_column[hinges.column_index[(SS, AA, 't')]]
+                if FF_b == 1:
+                    pinned = CB.base_support == 'Pinned'
+                    point_b = self._hinge(fixed, 0. if pinned else K_b)
+                else:
+                    point_b = self._hinge(joints[(FF_b, AA)]['T'], K_b)
+                point_t = self._hinge(joints[(FF_t, AA)]['B'], K_t)
+                x = Axis[AA]
+                if SS in SC.column_splice:
+                    y_m = Floor[SS] + 0.5 * story_height[SS-1]
+                    point_m = self._node()
+                    self._elements.append((point_b, point_m, x, y_b, x, y_m, E * A_b, E * (n+1)/n * I_b))
+                    self._elements.append((point_m, point_t, x, y_m, x, y_t, E * A_t, E * (n+1)/n * I_t))
+                else:
+                    self._elements.append((point_b, point_t, x, y_b, x, y_t, E * A_b, E * (n+1)/n * I_b))
+        # Beams (the beam splices do not affect the elastic model)
+        hinged = CB.beam_column_connection == 'Hinged'
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                A, I = SC.beam_properties[FF][BB-1][5:7]
+                K = 0. if hinged else K_beam[hinges.beam_index[(FF, BB)]]
+                RBS_l, RBS_r = SC.RBS_length[FF][(BB-1)*2], SC.RBS_length[FF][(BB-1)*2+1]
+                x_l = Axis[BB] + joints[(FF, BB)]['a']
+                x_r = Axis[BB+1] - joints[(FF, BB+1)]['a']
+                y = Floor[FF]
+                point_l = joints[(FF, BB)]['R']
+                if RBS_l != 0:
+                    point_3 = self._node()
+                    self._elements.append((point_l, point_3, x_l, y, x_l + RBS_l, y, E * A, E * I))
+                    point_l = point_3
+                point_r = joints[(FF, BB+1)]['L']
+                if RBS_r != 0:
+                    point_6 = self._node()
+                    self._elements.append((point_6, point_r, x_r - RBS_r, y, x_r, y, E * A, E * I))
+                    point_r = point_6
+                point_4, point_5 = self._hinge(point_l, K), self._hinge(point_r, K)
+                self._elements.append((point_4, point_5, x_l + RBS_l, y, x_r - RBS_r, y,
+                                       E * A, E * (n+1)/n * I))
+        self._build_matrices()
+
+    @staticmethod
+    def _element_stiffness(dx: np.ndarray, dy: np.ndarray, EA: np.ndarray, EI: np.ndarray) -> np.ndarray:
+        """Stiffness matrices of 2D elastic beam-column elements in global coordinates, shape (n, 6, 6)"""
+        L = np.sqrt(dx**2 + dy**2)
+        c, s = dx / L, dy / L
+        k = np.zeros((len(L), 6, 6))
+        a, b1, b2, b3 = EA / L, 12 * EI / L**3, 6 * EI / L**2, 2 * EI / L
+        k[:, 0, 0] = k[:, 3, 3] = a
+        k[:, 0, 3] = k[:, 3, 0] = -a
+        k[:, 1, 1] = k[:, 4, 4] = b1
+        k[:, 1, 4] = k[:, 4, 1] = -b1
+        k[:, 1, 2] = k[:, 2, 1] = k[:, 1, 5] = k[:, 5, 1] = b2
+        k[:, 4, 2] = k[:, 2, 4] = k[:, 4, 5] = k[:, 5, 4] = -b2
+        k[:, 2, 2] = k[:, 5, 5] = 2 * b3
+        k[:, 2, 5] = k[:, 5, 2] = b3
+        T = np.zeros((len(L), 6, 6))
+        for i in [0, 3]:
+            T[:, i, i] = T[:, i+1, i+1] = c
+            T[:, i, i+1] = s
+            T[:, i+1, i] = -s
+            T[:, i+2, i+2] = 1
+        return np.einsum('nji,njk,nkl->nil', T, k, T)
+
+    def _build_matrices(self):
+        """Assemble the sparse stiffness matrix and the lumped mass matrix"""
+        frame = self.frame
+        ground = self.ndof  # fixed DOF, removed after assembly
+        n_ele = len(self._elements)
+        dofs = np.full((n_ele, 6, 3), ground)
+        coefs = np.zeros((n_ele, 6, 3))
+        geometry = np.zeros((n_ele, 4))
+        for e, (point_i, point_j, x_i, y_i, x_j, y_j, EA, EI) in enumerate(self._elements):
+            for i, terms in enumerate(point_i + point_j):
+                for j, (dof, coef) in enumerate(terms):
+                    dofs[e, i, j] = ground if dof == self.ground else dof
+                    coefs[e, i, j] = coef
+            geometry[e] = x_j - x_i, y_j - y_i, EA, EI
+        k = self._element_stiffness(*geometry.T)
+        # K[d(a, p), d(b, q)] += c(a, p) * k(a, b) * c(b, q)
+        values = np.einsum('nap,nab,nbq->napbq', coefs, k, coefs, optimize=True).ravel()
+        rows = np.broadcast_to(dofs[:, :, :, None, None], (n_ele, 6, 3, 6, 3)).ravel()
+        cols = np.broadcast_to(dofs[:, None, None, :, :], (n_ele, 6, 3, 6, 3)).ravel()
+        nonzero = values != 0  # most terms of the points are padding
+        values, rows, cols = values[nonzero], rows[nonzero], cols[nonzero]
+        springs = np.array([(ground if i == self.ground else i, ground if j == self.ground else j, K)
+                            for i, j, K in self._springs])
+        i, j, K = springs[:, 0].astype(int), springs[:, 1].astype(int), springs[:, 2]
+        rows = np.concatenate([rows, i, j, i, j])
+        cols = np.concatenate([cols, i, j, j, i])
+        values = np.concatenate([values, K, K, -K, -K])
+        K = sp.csr_matrix((values, (rows, cols)), shape=(ground + 1, ground + 1))
+        # Soil constraints fix the lateral DOFs of floors
+        self.fixed_floors = sorted(FF for FF in frame.ConnectionAndBoundary.soil_constraint if FF >= 2)
+        free = np.setdiff1d(np.arange(ground), [FF - 2 for FF in self.fixed_floors])
+        self.K: sp.csr_matrix = K[free][:, free].tocsr()  # Stiffness matrix of the free DOFs
+        self.dofs = free  # DOF numbers of the rows of `K`
+        self.floors = [FF for FF in range(2, frame.N + 2) if FF not in self.fixed_floors]
+        masses = [sum(frame.LoadAndMaterial.mass_node[FF]) + frame.LoadAndMaterial.mass_grav[FF]
+                  for FF in self.floors]
+        n_floor = len(self.floors)
+        self.M: sp.csr_matrix = sp.diags(np.concatenate([masses, np.zeros(len(free) - n_floor)])).tocsr()
+        self.floor_mass = np.array(masses)  # Lateral masses of the free floors
+        self.n_floor = n_floor
+
+    # ------------------------------------------------------------------------
+    # Analysis
+    # ------------------------------------------------------------------------
+
+    def lateral_stiffness(self) -> np.ndarray:
+        """Lateral stiffness matrix of the free floors (N x N) condensed from `K`"""
+        if not hasattr(self, '_K_lateral'):
+            m = self.n_floor
+            K_ff = self.K[:m, :m].toarray()
+            K_of = self.K[m:, :m].toarray()
+            lu = spla.splu(self.K[m:, m:].tocsc())
+            K_lat = K_ff - K_of.T @ lu.solve(K_of)
+            self._K_lateral = (K_lat + K_lat.T) / 2
+        return self._K_lateral
+
+    def modal(self, n_modes: int=None) -> tuple[np.ndarray, np.ndarray]:
+        """Periods and mode shapes
+
+        Args:
+            n_modes (int, optional): Number of modes, defaults to all floors
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Periods, and mass-normalized mode shapes at the
+            floors (`floors`) with shape (n_modes, n_floors), the roof displacement of each
+            mode is positive
+        """
+        n_modes = self.n_floor if n_modes is None else n_modes
+        lambda_, phi = scipy.linalg.eigh(self.lateral_stiffness(), np.diag(self.floor_mass),
+                                         subset_by_index=[0, n_modes - 1])
+        phi *= np.where(phi[-1] < 0, -1, 1)
+        return 2 * pi / np.sqrt(lambda_), phi.T
+
+    def elf_forces(self, Cs: float, k: float=None, T: float=None, g: float=9810.) -> np.ndarray:
+        """Lateral forces of the equivalent lateral force (ELF) procedure (ASCE 7-16, 12.8.3)
+
+        Args:
+            Cs (float): Seismic response coefficient, the base shear is Cs * W
+            k (float, optional): Distribution exponent, calculated from `T` if not given
+            T (float, optional): Fundamental period, defaults to that of the elastic model
+            g (float, optional): Gravitational acceleration. Defaults to 9810.
+
+        Returns:
+            np.ndarray: Lateral force at each free floor (N)
+        """
+        if k is None:
+            T = self.modal(1)[0][0] if T is None else T
+            k = float(np.clip(1 + (T - 0.5) / 2, 1, 2))
+        W = self.floor_mass * g
+        Floor = np.cumsum(self.frame.BuildingGeometry.story_height, dtype=float)
+        h = Floor[[FF - 2 for FF in self.floors]]
+        Cvx = W * h**k / np.sum(W * h**k)
+        return Cs * np.sum(W) * Cvx
+
+    def drifts(self, forces: list[float]) -> np.ndarray:
+        """Elastic story drift ratios under lateral forces at the free floors
+
+        Args:
+            forces (list[float]): Lateral force at each free floor (N)
+
+        Returns:
+            np.ndarray: Story drift ratio of each story (the floors fixed by soil
+            constraints have zero displacements)
+        """
+        u = np.zeros(self.frame.N + 1)
+        u[[FF - 1 for FF in self.floors]] = np.linalg.solve(self.lateral_stiffness(), forces)
+        return np.diff(u) / np.array(self.frame.BuildingGeometry.story_height)
+
+    def elf_drifts(self, Cs: float, k: float=None, Cd: float=1.) -> np.ndarray:
+        """Story drift ratios of the ELF procedure, see `elf_forces`
+
+        Args:
+            Cs (float): Seismic response coefficient
+            k (float, optional): Distribution exponent, calculated from the fundamental period if not given
+            Cd (float, optional): Deflection amplification factor. Defaults to 1.
+
+        Returns:
+            np.ndarray: Story drift ratios
+        """
+        return Cd * self.drifts(self.elf_forces(Cs, k))
+
+
+def validate(frame: Frame, n_modes: int=3) -> dict:
+    """Compare the elastic model with the eigen analysis of the OpenSees model (`ModelBuilder`)
+    in the current process (the OpenSees domain is wiped)
+
+    Args:
+        frame (Frame): Frame object with all steps finished
+        n_modes (int, optional): Number of compared modes. Defaults to 3.
+
+    Returns:
+        dict: Periods of both models ("periods", "periods_opensees"), relative errors
+        of periods ("error") and modal assurance criterion of mode shapes ("MAC")
+    """
+    import openseespy.opensees as ops
+    from .ModelBuilder import ModelBuilder
+    model = ElasticModel(frame)
+    periods, modes = model.modal(n_modes)
+    builder = ModelBuilder(frame).build(eigen=False, gravity=False)
+    omega = np.sqrt(ops.eigen(n_modes))
+    nodes = [builder.control_nodes[FF - 2] for FF in model.floors]
+    modes_ops = np.array([[ops.nodeEigenvector(node, i, 1) for node in nodes] for i in range(1, n_modes + 1)])
+    ops.wipe()
+    periods_ops = 2 * pi / omega
+    MAC = np.sum(modes * modes_ops, axis=1)**2 / (np.sum(modes**2, axis=1) * np.sum(modes_ops**2, axis=1))
+    return {'periods': periods, 'periods_opensees': periods_ops,
+            'error': periods / periods_ops - 1, 'MAC': MAC}
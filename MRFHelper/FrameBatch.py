@@ -0,0 +1,267 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import io
+import copy
+import json
+import time
+import hashlib
+import contextlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import WriteInfo
+
+
+"""
+Generate variants of a frame in batch for parametric studies
+Writen by: Wenchen Lie
+"""
+
+# Short names of the items of model information
+ALIASES = {
+    'story_height': 'BuildingGeometry.story_height',
+    'bay_length': 'BuildingGeometry.bay_length',
+    'beams': 'StructuralComponents.beams',
+    'columns': 'StructuralComponents.columns',
+    'doubler_plate': 'StructuralComponents.set_doubler_plate',
+    'column_splice': 'StructuralComponents.column_splice',
+    'beam_splice': 'StructuralComponents.beam_splice',
+    'RBS_length': 'StructuralComponents.RBS_length',
+    'dead_load': 'LoadAndMaterial.dead_load',
+    'live_load': 'LoadAndMaterial.live_load',
+    'cladding_load': 'LoadAndMaterial.clading_load',
+    'material': 'LoadAndMaterial.material',
+    'base_support': 'ConnectionAndBoundary.base_support',
+    'beam_column_connection': 'ConnectionAndBoundary.beam_column_connection',
+    'panel_zone_deformation': 'ConnectionAndBoundary.panel_zone_deformation',
+    'soil_constraint': 'ConnectionAndBoundary.soil_constraint',
+}
+
+
+def _normalize(obj):
+    """Json round trip, which unifies tuples/lists and int/str keys (numpy
+    values, e.g. the cells of a DataFrame, are converted into builtin types)"""
+    return json.loads(json.dumps(obj, default=lambda value: value.tolist()))
+
+
+def apply_changes(dict_info: dict, changes: dict) -> dict:
+    """Apply changes to the model information (a new dict is returned)
+
+    Args:
+        dict_info (dict): Model information, see `WriteInfo.write_info_to_dict`
+        changes (dict): {path: value}, the path is separated by dots and can start with a
+        short name in `ALIASES`, e.g. "beams.2" (sections of the beams on the 2nd floor),
+        "material.fy_beam" or "beam_column_connection". If both the original item and
+        the value are dicts, they are merged, e.g. {"beams": {2: [...], 3: [...]}}.
+
+    Returns:
+        dict: Changed model information
+    """
+    info = copy.deepcopy(_normalize(dict_info))
+    for path, value in changes.items():
+        keys = str(path).split('.')
+        if keys[0] in ALIASES:
+            keys = ALIASES[keys[0]].split('.') + keys[1:]
+        item = info
+        for key in keys[:-1]:
+            if not isinstance(item, dict) or key not in item:
+                raise ValueError(f'Invalid item of model information: {path}')
+            item = item[key]
+        key = keys[-1]
+        if not isinstance(item, dict) or key not in item:
+            raise ValueError(f'Invalid item of model information: {path}')
+        value = _normalize(value)
+        if isinstance(item.get(key), dict) and isinstance(value, dict):
+            item[key].update(value)
+        else:
+            item[key] = value
+    return info
+
+
+def _spec_key(dict_info: dict, name: str, options: dict, commands: dict) -> str:
+    """Hash of the input of a variant, used to skip generated variants"""
+    text = json.dumps({'info': dict_info, 'name': name, 'options': options, 'commands': commands},
+                      sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _read_manifest(manifest: Path) -> dict[str, dict]:
+    """Generated variants in the manifest, {name: entry}"""
+    entries = dict()
+    if not manifest.exists():
+        return entries
+    with open(manifest, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # incomplete line written before interruption
+            if not entry.get('error'):
+                entries[entry['name']] = entry
+    return entries
+
+
+def generate_variants(
+        base: Frame, variations: list[dict], output_dir: str | Path,
+        workers: int=1, scripts: bool=True, compress: bool=False,
+        recorder_format: str='text', manifest: str | Path=None, skip_existing: bool=True
+    ) -> list[dict]:
+    """Generate variants of a frame in batch. Each variant is rebuilt from the changed
+    model information of the base frame (see `apply_changes`) with the user commands
+    of the base frame, and its scripts are generated headless into "output_dir/name".
+    All sections are resolved once in the main process, and the resolved sections are
+    shared with the worker processes. The derived data of the base frame (e.g. masses)
+    changed after all steps finished cannot be carried over, in which case a
+    ValueError is raised.
+
+    Args:
+        base (Frame): Base frame with all steps finished
+        variations (list[dict]): Changes of each variant (see `apply_changes`), an optional
+        item "name" gives the name of the variant (defaults to "{base name}_{number}").
+        A pandas DataFrame is also accepted, whose columns are the paths of changes.
+        output_dir (str | Path): Output folder
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        scripts (bool, optional): Whether to generate the scripts, if False, only the
+        frames are built and hashed. Defaults to True.
+        compress (bool, optional): See `Frame.generate_tcl_script`. Defaults to False.
+        recorder_format (str, optional): See `Frame.generate_tcl_script`. Defaults to "text".
+        manifest (str | Path, optional): Manifest file, defaults to "output_dir/variants.jsonl"
+        skip_existing (bool, optional): Skip the variants already generated with the same
+        input according to the manifest. Defaults to True.
+
+    Returns:
+        list[dict]: Entries of variants in the order of `variations`:
+        * name: Name of the variant
+        * hash: Content hash of the frame (see `ModalCache.frame_hash`)
+        * spec: Hash of the input of the variant
+        * folder: Output folder
+        * script: Path of the openseespy script (None if `scripts` is False)
+        * json: Path of the model information
+        * changes: Changes of the variant
+        * error: Error message if the variant is invalid
+        * elapsed: Running time (second)
+    """
+    from .SectionRegistry import SECTIONS
+    if hasattr(variations, 'to_dict'):
+        variations = variations.to_dict('records')
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = output_dir/'variants.jsonl' if manifest is None else Path(manifest)
+    options = {'scripts': scripts, 'compress': compress, 'recorder_format': recorder_format}
+    base_info = _normalize(WriteInfo.write_info_to_dict(base))
+    base_info['References'] = base.dict_info.get('References')
+    check_base(base, base_info)
+    commands = {'py': list(base.UserComment.additional_commands_py),
+                'tcl': list(base.UserComment.additional_commands_tcl)}
+    jobs, names = [], dict()  # {name: None} in order
+    for i, variation in enumerate(variations):
+        changes = {key: value for key, value in variation.items() if key != 'name'}
+        name = str(variation.get('name', f'{base.frame_name}_{i + 1}'))
+        if name in names:
+            raise ValueError(f'Duplicated variant name: {name}')
+        names[name] = None
+        info = apply_changes(base_info, changes)
+        info['name'] = name
+        jobs.append({'name': name, 'info': info, 'changes': _normalize(changes),
+                     'spec': _spec_key(info, name, options, commands), 'folder': str(output_dir/name),
+                     'options': options, 'commands': commands})
+    existing = _read_manifest(manifest) if skip_existing else {}
+    results = {job['name']: existing[job['name']] for job in jobs
+               if job['name'] in existing and existing[job['name']]['spec'] == job['spec']}
+    jobs = [job for job in jobs if job['name'] not in results]
+    if results:
+        print(f'{len(results)} variants have been generated according to the manifest, {len(jobs)} remaining')
+    _resolve_sections(SECTIONS, [job['info'] for job in jobs])
+
+    def _collect(entry: dict):
+        with open(manifest, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        results[entry['name']] = entry
+        state = f'error: {entry["error"]}' if entry['error'] else entry['hash'][:12]
+        print(f'[{len(results)}/{len(variations)}] {entry["name"]}: {state}')
+
+    if workers == 1:
+        for job in jobs:
+            _collect(_generate_variant(job))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(SECTIONS.get_state(),)) as executor:
+            futures = [executor.submit(_generate_variant, job) for job in jobs]
+            for future in as_completed(futures):
+                _collect(future.result())
+    return [results[name] for name in names]
+
+
+def check_base(base: Frame, base_info: dict=None):
+    """Check that the derived data used by the model of the base frame (see
+    `ModalCache.model_data`) can be rebuilt from its model information, i.e. they
+    were not changed after all steps finished
+
+    Args:
+        base (Frame): Base frame with all steps finished
+        base_info (dict, optional): Model information of the base frame
+    """
+    from .MRFhelper import from_dict
+    from .ModalCache import model_data
+    if base_info is None:
+        base_info = WriteInfo.write_info_to_dict(base)
+    with contextlib.redirect_stdout(io.StringIO()):
+        rebuilt = model_data(from_dict(base_info))
+    data = model_data(base)
+    changed = [key for key in data if _normalize(data[key]) != _normalize(rebuilt[key])]
+    if changed:
+        raise ValueError(f'The derived data {changed} of frame {base.frame_name} were changed after all '
+                         'steps finished, which cannot be carried over to the variants')
+
+
+def _resolve_sections(registry, infos: list[dict]):
+    """Resolve the sections of all variants in the registry once"""
+    for info in infos:
+        material = info['LoadAndMaterial']['material']
+        for member in ['beams', 'columns']:
+            sections = [section for sections in info['StructuralComponents'][member].values()
+                        for section in sections]
+            for fy in {material['fy_beam'], material['fy_column']}:
+                for section in set(sections):
+                    try:
+                        registry.rows([section], fy, member[:-1])
+                    except ValueError:
+                        pass  # reported by the variant
+
+
+def _init_worker(sections_state: tuple):
+    """Share the resolved sections with the worker process"""
+    from .SectionRegistry import SECTIONS
+    SECTIONS.set_state(sections_state)
+
+
+def _generate_variant(job: dict) -> dict:
+    """Build a variant and generate its scripts"""
+    from .MRFhelper import from_dict
+    from .ModalCache import frame_hash
+    start_time = time.time()
+    folder = Path(job['folder'])
+    options = job['options']
+    entry = {'name': job['name'], 'hash': None, 'spec': job['spec'], 'folder': str(folder),
+             'script': None, 'json': str(folder/f'{job["name"]}.json'),
+             'changes': job['changes'], 'error': None}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            frame = from_dict(job['info'])
+            frame.UserComment.additional_commands_py = list(job['commands']['py'])
+            frame.UserComment.additional_commands_tcl = list(job['commands']['tcl'])
+            entry['hash'] = frame_hash(frame)
+            if options['scripts']:
+                writer = frame.generate_tcl_script(
+                    folder, headless=True, overwrite='overwrite', figure=False,
+                    compress=options['compress'], recorder_format=options['recorder_format'])
+                entry['script'] = str(writer.files[1])
+            else:
+                folder.mkdir(parents=True, exist_ok=True)
+                with open(entry['json'], 'w') as f:
+                    json.dump({**frame.dict_info, 'frame_hash': entry['hash']}, f, indent=4)
+    except Exception as error:
+        entry['error'] = f'{type(error).__name__}: {error}'
+    entry['elapsed'] = time.time() - start_time
+    return entry
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import copy
+from .DerivedGraph import DerivedGraph, QUANTITIES, affected
+
+
+"""
+Derive a modified frame from an existing one, the unchanged components are shared
+and only the dependent quantities are recalculated
+Writen by: Wenchen Lie
+"""
+
+# Changes that can be derived, {keyword: component}
+CHANGES = {
+    'story_height': 'BuildingGeometry',
+    'bay_length': 'BuildingGeometry',
+    'plane_dimensions': 'BuildingGeometry',
+    'MF_number': 'BuildingGeometry',
+    'exterior_column_tributary_area': 'BuildingGeometry',
+    'interior_column_tributary_area': 'BuildingGeometry',
+    'beams': 'StructuralComponents',
+    'columns': 'StructuralComponents',
+    'doubler_plate': 'StructuralComponents',
+    'column_splice': 'StructuralComponents',
+    'beam_splice': 'StructuralComponents',
+    'RBS_length': 'StructuralComponents',
+    'dead_load': 'LoadAndMaterial',
+    'live_load': 'LoadAndMaterial',
+    'cladding_load': 'LoadAndMaterial',
+    'E': 'LoadAndMaterial',
+    'fy_beam': 'LoadAndMaterial',
+    'fy_column': 'LoadAndMaterial',
+    'miu': 'LoadAndMaterial',
+    'cc_weight': 'LoadAndMaterial',
+    'cc_mass': 'LoadAndMaterial',
+    'base_support': 'ConnectionAndBoundary',
+    'beam_column_connection': 'ConnectionAndBoundary',
+    'RBS_paras': 'ConnectionAndBoundary',
+    'panel_zone_deformation': 'ConnectionAndBoundary',
+    'soil_constraint': 'ConnectionAndBoundary',
+}
+
+
+def derive_frame(frame: Frame, frame_name: str=None, notes: str=None, **changes) -> Frame:
+    """Derive a modified frame, see `Frame.derive`"""
+    unknown = set(changes) - set(CHANGES)
+    if unknown:
+        raise ValueError(f'Cannot derive the frame by {unknown}, available changes: {list(CHANGES)}')
+    frame.dict_info  # evaluated if pending, so that the references are kept
+    new = copy.copy(frame)  # all components are shared at first
+    graph = DerivedGraph(new)
+    graph.attach(new)
+    if frame_name is not None:
+        if not frame_name.isidentifier():
+            raise ValueError(f'Illegal frame name: {frame_name}')
+        new.frame_name = frame_name
+    if notes is not None:
+        new.notes = notes
+    new.recorders = dict(frame.recorders)
+    new.UserComment = copy.copy(frame.UserComment)
+    new.UserComment.additional_commands_py = list(frame.UserComment.additional_commands_py)
+    new.UserComment.additional_commands_tcl = list(frame.UserComment.additional_commands_tcl)
+    owned = set()
+
+    def own(component: str):
+        """Copy a component before it is changed (copy-on-write)"""
+        if component not in owned:
+            setattr(new, component, copy.copy(getattr(frame, component)))
+            owned.add(component)
+            if component in ['StructuralComponents', 'LoadAndMaterial']:
+                graph.attach(getattr(new, component))
+        return getattr(new, component)
+
+    # Apply the changes using the setters, the changed containers are copied first
+    for key, value in changes.items():
+        component = own(CHANGES[key])
+        if key in ['beams', 'columns', 'doubler_plate']:
+            setter = {'beams': component.set_beams, 'columns': component.set_columns,
+                      'doubler_plate': component.set_doubler_plate}[key]
+            setattr(component, key, dict(getattr(component, key)))
+            for number, items in value.items():
+                setter(int(number), list(items))
+        elif key in ['column_splice', 'beam_splice']:
+            setattr(component, key, tuple())
+            setter = component.set_column_splice if key == 'column_splice' else component.set_beam_splice
+            setter(*value)
+        elif key == 'RBS_length':
+            if value is None:
+                component.RBS_length_all = None
+            else:
+                component.set_RBS_length(value)
+        elif key in ['dead_load', 'live_load', 'cladding_load']:
+            loads = {**getattr(component, key), **{int(k): v for k, v in value.items()}}
+            setattr(component, key, dict(loads))
+            setter = {'dead_load': component.set_dead_load, 'live_load': component.set_live_load,
+                      'cladding_load': component.set_cladding_load}[key]
+            setter(list(loads.keys()), list(loads.values()))
+        elif key in ['E', 'fy_beam', 'fy_column', 'miu']:
+            material = {name: getattr(component, name) for name in ['E', 'fy_beam', 'fy_column', 'miu']}
+            material[key] = value
+            component.set_material(**material)
+        elif key in ['cc_weight', 'cc_mass']:
+            setattr(component, key, dict(getattr(component, key)))
+            if key == 'cc_weight':
+                component.set_weight_combination_coefficients(value)
+            else:
+                component.set_mass_combination_coefficients(value)
+        elif key in ['beam_column_connection', 'RBS_paras']:
+            type_ = changes.get('beam_column_connection', component.beam_column_connection)
+            paras = changes.get('RBS_paras', component.RBS_paras)
+            component.set_beam_column_connection(type_, *paras)
+        elif key == 'base_support':
+            component.set_base_support(value)
+        elif key == 'panel_zone_deformation':
+            component.set_panel_zone_deformation(value)
+        elif key == 'soil_constraint':
+            component.frame = new
+            component.soil_constraint = []
+            for floor in value:
+                component.set_soil_constraint(floor)
+        else:  # building geometry
+            setattr(component, key, value)
+    if 'ConnectionAndBoundary' in owned:
+        new.ConnectionAndBoundary.frame = new
+    if 'BuildingGeometry' in owned:
+        geometry = new.BuildingGeometry
+        geometry._finish()
+        if geometry.N != frame.N or geometry.bays != frame.bays:
+            raise ValueError('The numbers of stories and bays cannot be changed when deriving a frame')
+
+    # Invalidate the dependent quantities, which are recalculated when accessed
+    inputs = list(changes) + [name for name, value in [('frame_name', frame_name), ('notes', notes)]
+                              if value is not None]
+    for quantity in affected(inputs):
+        if QUANTITIES[quantity][0] != 'Frame':
+            own(QUANTITIES[quantity][0])
+    keys = {key: {int(number) for number in changes[key]} for key in ['beams', 'columns'] if key in changes}
+    graph.invalidate(*inputs, keys=keys)
+    return new
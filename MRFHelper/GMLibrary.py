@@ -0,0 +1,228 @@
+from __future__ import annotations
+import re
+import json
+from pathlib import Path
+import numpy as np
+
+
+"""
+Ground motion library, which loads a suite of records (PEER AT2 or plain text)
+once into a compact float32 buffer and feeds them to the openseespy script
+Writen by: Wenchen Lie
+"""
+
+_NPTS_DT = re.compile(r'NPTS\s*=\s*(\d+)\s*,?\s*DT\s*=\s*([-+.\dEe]+)', re.IGNORECASE)
+
+
+def read_record(file: str | Path, dt: float=None) -> tuple[np.ndarray, float]:
+    """Read a ground motion record (acceleration in g)
+
+    Args:
+        file (str | Path): PEER NGA record (".AT2", the number of points and time step are
+        read from the 4th line), or plain text (values separated by spaces or newlines)
+        dt (float, optional): Time step, required for plain text records
+
+    Returns:
+        tuple[np.ndarray, float]: Acceleration (float32) and time step
+    """
+    file = Path(file)
+    with open(file, 'r') as f:
+        text = f.read()
+    if file.suffix.upper() == '.AT2':
+        lines = text.split('\n', 4)
+        if len(lines) < 5:
+            raise ValueError(f'Invalid AT2 file: {file}')
+        match = _NPTS_DT.search(lines[3])
+        if match:
+            npts, dt_file = int(match.group(1)), float(match.group(2))
+        else:  # old format, e.g. "3900   0.0100   NPTS, DT"
+            items = lines[3].replace(',', ' ').split()
+            npts, dt_file = int(items[0]), float(items[1])
+        values = np.array(lines[4].split(), dtype=np.float32)
+        if len(values) < npts:
+            raise ValueError(f'{file.name}: {len(values)} points were found, but NPTS = {npts}')
+        return values[:npts], dt_file if dt is None else dt
+    if dt is None:
+        raise ValueError(f'Time step of {file.name} should be given')
+    return np.array(text.split(), dtype=np.float32), dt
+
+
+def _signature(file: Path, dt: float=None) -> list:
+    """Identity of a source file and the requested time step (None if read
+    from the file) used to validate the cache"""
+    stat = file.stat()
+    return [str(file.absolute()), stat.st_size, stat.st_mtime_ns, None if dt is None else float(dt)]
+
+
+class GMLibrary:
+
+    def __init__(self):
+        """A suite of ground motion records. All records are stored in one float32 buffer,
+        the number of points and duration of each record are calculated automatically.
+        The records can be fed to the generated `run_openseespy` function directly
+        (`GMvalues`), without writing and parsing text files in each run.
+        """
+        self.names: list[str] = []
+        self.index: dict[str, int] = dict()  # {name: number}
+        self.dts: list[float] = []
+        self.offsets: list[int] = [0]  # start of each record in the buffer
+        self.sources: list[list] = []  # signatures of source files
+        self._data = np.zeros(0, dtype=np.float32)
+        self._pending: list[np.ndarray] = []  # records not yet concatenated
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    @property
+    def data(self) -> np.ndarray:
+        """Buffer of all records"""
+        if self._pending:
+            self._data = np.concatenate([self._data] + self._pending)
+            self._pending.clear()
+        return self._data
+
+    def add(self, name: str, values: np.ndarray, dt: float, source: list=None):
+        """Add a record
+
+        Args:
+            name (str): Name of the record (`GMname`)
+            values (np.ndarray): Acceleration (g)
+            dt (float): Time step
+            source (list, optional): Signature of the source file
+        """
+        if name in self.index:
+            raise ValueError(f'Duplicated ground motion: {name}')
+        if dt <= 0:
+            raise ValueError(f'Invalid time step of {name}: {dt}')
+        values = np.asarray(values, dtype=np.float32).ravel()
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.dts.append(float(dt))
+        self.offsets.append(self.offsets[-1] + len(values))
+        self.sources.append(source)
+        self._pending.append(values)
+
+    def add_file(self, file: str | Path, name: str=None, dt: float=None):
+        """Read and add a record file (see `read_record`), named by the file stem by default"""
+        file = Path(file)
+        source = _signature(file, dt)
+        values, dt = read_record(file, dt)
+        self.add(file.stem if name is None else name, values, dt, source)
+
+    @classmethod
+    def from_files(cls, files: list[str | Path], dt: float | list[float]=None,
+                   cache: str | Path=None) -> GMLibrary:
+        """Load a suite of record files
+
+        Args:
+            files (list[str | Path]): Record files, e.g. `Path(folder).glob("*.AT2")`
+            dt (float | list[float], optional): Time step(s) of plain text records
+            cache (str | Path, optional): Cache file (.npz). If it was created from the same
+            files (paths, sizes and modification times) and `dt`, the records are loaded from it
+            without parsing, otherwise the files are parsed and the cache is rewritten.
+
+        Returns:
+            GMLibrary: The library
+        """
+        files = [Path(file) for file in files]
+        dts = dt if isinstance(dt, (list, tuple, np.ndarray)) else [dt] * len(files)
+        if len(dts) != len(files):
+            raise ValueError('Length of `dt` should be equal to the number of files')
+        if cache is not None and Path(cache).exists():
+            library = cls.load(cache)
+            if library.sources == [_signature(file, dt_i) for file, dt_i in zip(files, dts)]:
+                return library
+        library = cls()
+        for file, dt_i in zip(files, dts):
+            library.add_file(file, dt=dt_i)
+        if cache is not None:
+            library.save(cache)
+        return library
+
+    def record(self, name: str) -> np.ndarray:
+        """Acceleration of a record (g), a view of the buffer"""
+        i = self.index[name]
+        return self.data[self.offsets[i]: self.offsets[i + 1]]
+
+    def dt(self, name: str) -> float:
+        return self.dts[self.index[name]]
+
+    def npts(self, name: str) -> int:
+        i = self.index[name]
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def duration(self, name: str) -> float:
+        """Duration of a record, i.e. (npts - 1) * dt"""
+        return (self.npts(name) - 1) * self.dt(name)
+
+    def info(self, name: str) -> dict:
+        """Ground motion information used by `run_openseespy` and `SuiteRunner.run_suite`"""
+        source = self.sources[self.index[name]]
+        return {
+            'GMname': name,
+            'GMdt': self.dt(name),
+            'GMpoints': self.npts(name),
+            'GMduration': self.duration(name),
+            'GMFile': source[0] if source else '',
+        }
+
+    def gm_table(self, names: list[str]=None, EqSF: float | dict[str, float]=1.0) -> list[dict]:
+        """Ground motion table of `SuiteRunner.run_suite`
+
+        Args:
+            names (list[str], optional): Records, defaults to all
+            EqSF (float | dict[str, float], optional): Scale factor, or {name: scale factor}.
+            Defaults to 1.0.
+
+        Returns:
+            list[dict]: Ground motion table
+        """
+        names = self.names if names is None else names
+        table = []
+        for name in names:
+            SF = EqSF[name] if isinstance(EqSF, dict) else EqSF
+            table.append({**self.info(name), 'EqSF': SF})
+        return table
+
+    def spectrum(self, periods: list[float], names: list[str]=None, zeta: float=0.05) -> np.ndarray:
+        """Pseudo-acceleration response spectra (g) of records, shape (n_records, n_periods),
+        see `Spectrum.response_spectrum`"""
+        from .Spectrum import response_spectrum
+        names = self.names if names is None else names
+        return response_spectrum([self.record(name) for name in names],
+                                 [self.dt(name) for name in names], periods, zeta)
+
+    def save(self, file: str | Path):
+        """Save the library into a npz file"""
+        file = Path(file)
+        with open(file, 'wb') as f:
+            np.savez(f, data=self.data, offsets=np.array(self.offsets, dtype=np.int64),
+                     dts=np.array(self.dts), meta=np.array(json.dumps(
+                         {'names': self.names, 'sources': self.sources})))
+
+    @classmethod
+    def load(cls, file: str | Path) -> GMLibrary:
+        """Load a library saved by `save`"""
+        library = cls()
+        with np.load(file) as data:
+            meta = json.loads(str(data['meta']))
+            library._data = data['data']
+            library.offsets = data['offsets'].tolist()
+            library.dts = data['dts'].tolist()
+        library.names = meta['names']
+        library.sources = meta['sources']
+        library.index = {name: i for i, name in enumerate(library.names)}
+        return library
+
+    def export(self, folder: str | Path, names: list[str]=None, fmt: str='%.6e'):
+        """Write records into text files ("folder/name.th"), e.g. for the tcl script"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        for name in self.names if names is None else names:
+            np.savetxt(folder/f'{name}.th', self.record(name), fmt=fmt)
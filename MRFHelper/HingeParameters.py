@@ -0,0 +1,120 @@
+import numpy as np
+
+
+"""
+Vectorized calculation of the modified Ibarra-Medina-Krawinkler (IMK) model parameters
+of beam and column hinges. All arguments can be scalars or arrays (broadcast against
+each other), so that the hinges of a frame or a batch of frames are calculated at once.
+The parameters are written into the scripts and passed to `BeamHinge` and `ColumnHinge`
+in "subroutines", which do not calculate them again.
+References:
+[1] Deterioration Modeling of Steel Components in Support of Collapse Prediction of Steel Moment Frames under Earthquake Loading
+[2] Proposed Updates to the ASCE 41 Nonlinear Modeling Parameters for Wide-Flange Steel Columns in Support of Performance-Based Seismic Engineering
+Writen by: Wenchen Lie
+"""
+
+# Keys of the returned parameters, in the order of the IMKBilin arguments:
+# K (elastic stiffness), theta_p (pre-capping plastic rotation), theta_pc (post-capping
+# plastic rotation), theta_u (ultimate rotation), My (effective yield moment, adjusted for
+# the axial load of columns), McMy (capping to yield moment ratio), Res (residual strength
+# ratio) and Lamda (cyclic deterioration parameter)
+PARAMETERS = ('K', 'theta_p', 'theta_pc', 'theta_u', 'My', 'McMy', 'Res', 'Lamda')
+
+
+def beam_hinge_parameters(
+    E, fy, Ix, d, htw, bftf, ry, L, Ls, Lb, My, type_, n: float=10.0) -> dict[str, np.ndarray]:
+    """IMK parameters of beam hinges (Eqs. (7)-(15) of [1]). The regression of types
+    other than 1 (RBS) and 2 (other than RBS) is not used.
+
+    Args:
+        E, fy: Young's modulus and yield strength
+        Ix, d, htw, bftf, ry: Moment of inertia, depth, web and flange slenderness ratios
+        and radius of gyration of the section
+        L, Ls, Lb: Member length, shear span and unbraced length
+        My: Effective yield moment
+        type_: Type of beam-to-column connection (1: RBS, 2: other than RBS, 3: pinned, 4: elastic)
+        n (float, optional): Stiffness factor of the hinge. Defaults to 10.0.
+
+    Returns:
+        dict[str, np.ndarray]: Parameters, see `PARAMETERS`
+    """
+    E, fy, Ix, d, htw, bftf, ry, L, Ls, Lb, My, type_ = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (E, fy, Ix, d, htw, bftf, ry, L, Ls, Lb, My, type_)])
+    c1 = 1.0
+    c2 = 1.0
+    K = (n + 1.0) * 6 * E * Ix / L
+    # RBS hinge
+    theta_p_1 = 0.19 * ((htw) ** -0.314) * ((bftf) ** -0.100) * ((Lb / ry) ** -0.185) * ((Ls / d) ** 0.113) * (
+                (c1 * d / 533) ** -0.760) * ((c2 * fy / 355) ** -0.070)
+    theta_pc_1 = 9.52 * ((htw) ** -0.513) * ((bftf) ** -0.863) * ((Lb / ry) ** -0.108) * ((c2 * fy / 355) ** -0.360)
+    Lamda_1 = 585 * ((htw) ** -1.140) * ((bftf) ** -0.632) * ((Lb / ry) ** -0.205) * ((c2 * fy / 355) ** -0.391)
+    # Other than RBS section (d >= 533)
+    theta_p_2 = 0.318 * ((htw) ** -0.550) * ((bftf) ** -0.345) * ((Lb / ry) ** -0.023) * ((Ls / d) ** 0.090) * (
+                (c1 * d / 533) ** -0.330) * ((c2 * fy / 355) ** -0.130)
+    theta_pc_2 = 7.500 * ((htw) ** -0.610) * ((bftf) ** -0.710) * ((Lb / ry) ** -0.110) * ((c1 * d / 533) ** -0.161) * (
+                (c2 * fy / 355) ** -0.320)
+    Lamda_2 = 536 * ((htw) ** -1.260) * ((bftf) ** -0.525) * ((Lb / ry) ** -0.130) * ((c2 * fy / 355) ** -0.291)
+    # Other than RBS section (d < 533)
+    theta_p_3 = 0.0865 * ((htw) ** -0.360) * ((bftf) ** -0.140) * ((Ls / d) ** 0.340) * ((c1 * d / 533) ** -0.721) * (
+                (c2 * fy / 355) ** -0.230)
+    theta_pc_3 = 5.6300 * ((htw) ** -0.565) * ((bftf) ** -0.800) * ((c1 * d / 533) ** -0.280) * (
+                (c2 * fy / 355) ** -0.430)
+    Lamda_3 = 495 * ((htw) ** -1.340) * ((bftf) ** -0.595) * ((c2 * fy / 355) ** -0.360)
+    rbs, deep = type_ == 1, d >= 533.0
+    return {
+        'K': K,
+        'theta_p': np.where(rbs, theta_p_1, np.where(deep, theta_p_2, theta_p_3)),
+        'theta_pc': np.where(rbs, theta_pc_1, np.where(deep, theta_pc_2, theta_pc_3)),
+        'theta_u': np.full(K.shape, 0.2),
+        'My': My.copy(),
+        'McMy': np.full(K.shape, 1.1),
+        'Res': np.full(K.shape, 0.4),
+        'Lamda': np.where(rbs, Lamda_1, np.where(deep, Lamda_2, Lamda_3)),
+    }
+
+
+def column_hinge_parameters(
+    E, Ix, d, htw, ry, L, Lb, My, PPy, SF_PPy, n: float=10.0) -> dict[str, np.ndarray]:
+    """IMK parameters of column hinges (Eqs. (2)-(9) of [2]). The returned `My` is
+    adjusted for the axial load ratio (Eq. (2) of [2]). A ValueError is raised if the
+    scaled axial load ratio `PPy * SF_PPy` is not less than 1.
+
+    Args:
+        E: Young's modulus
+        Ix, d, htw, ry: Moment of inertia, depth, web slenderness ratio and radius of
+        gyration of the section
+        L, Lb: Member length and unbraced length
+        My: Effective yield moment
+        PPy, SF_PPy: Axial load ratio due to gravity and its scale factor (due to
+        overturning effect)
+        n (float, optional): Stiffness factor of the hinge. Defaults to 10.0.
+
+    Returns:
+        dict[str, np.ndarray]: Parameters, see `PARAMETERS`
+    """
+    E, Ix, d, htw, ry, L, Lb, My, PPy, SF_PPy = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (E, Ix, d, htw, ry, L, Lb, My, PPy, SF_PPy)])
+    PPy = PPy * SF_PPy  # Enlarge PPy for considering overturning effect
+    if np.any(~(PPy < 1)):
+        indices = [tuple(int(i) for i in index) for index in np.argwhere(~(PPy < 1))]
+        raise ValueError(f'Scaled axial load ratio (PPy * SF_PPy) of column hinges should be less than 1, '
+                         f'got {PPy[~(PPy < 1)].tolist()} at {indices}')
+    K = (n + 1.0) * 6 * E * Ix / L
+    theta_p = 294.0 * ((htw) ** -1.700) * ((Lb / ry) ** -0.700) * ((1 - PPy) ** 1.600)  # Eq. (7)
+    theta_pc = 90.0 * ((htw) ** -0.800) * ((Lb / ry) ** -0.800) * ((1 - PPy) ** 2.500)  # Eq. (9)
+    Lamda = np.where(
+        PPy <= 0.35,
+        25500.0 * ((htw) ** -2.140) * ((Lb / ry) ** -0.530) * ((1 - PPy) ** 4.920),
+        268000.0 * ((htw) ** -2.300) * ((Lb / ry) ** -1.300) * ((1 - PPy) ** 1.190))
+    McMy = 12.5 * ((htw) ** -0.200) * ((Lb / ry) ** -0.400) * ((1 - PPy) ** 0.400)  # Eq. (3)
+    My = np.where(PPy < 0.2, (1.15 / 1.1) * My * (1 - PPy / 2), (1.15 / 1.1) * My * (9 / 8) * (1 - PPy))  # Eq. (2)
+    return {
+        'K': K,
+        'theta_p': np.minimum(theta_p, 0.2),
+        'theta_pc': np.minimum(theta_pc, 0.3),
+        'theta_u': np.full(K.shape, 0.15),
+        'My': My,
+        'McMy': np.clip(McMy, 1.0, 1.3),
+        'Res': 0.5 - 0.4 * PPy,  # Eq. (5)
+        'Lamda': np.maximum(Lamda, 3.0),
+    }
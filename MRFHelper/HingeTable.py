@@ -0,0 +1,204 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import numpy as np
+from .HingeParameters import beam_hinge_parameters, column_hinge_parameters, PARAMETERS
+
+
+"""
+Inputs and IMK model parameters of all beam and column hinges of a frame, calculated
+at once as arrays and shared by the script writers, the model builder and the report
+Writen by: Wenchen Lie
+"""
+
+# Inputs of `beam_hinge_parameters` and `column_hinge_parameters` (and the type of hinges)
+BEAM_INPUTS = ('E', 'fy', 'Ix', 'd', 'htw', 'bftf', 'ry', 'L', 'Ls', 'Lb', 'My', 'type_')
+COLUMN_INPUTS = ('E', 'Ix', 'd', 'htw', 'ry', 'L', 'Lb', 'My', 'PPy', 'SF_PPy', 'type_')
+
+
+def _rounded(x: float, digits: int) -> float:
+    """Round a number in the same way as it is written into the script"""
+    return float(f'{x:.{digits}f}')
+
+
+class HingeTable:
+
+    def __init__(self, frame: Frame, evaluate: bool=True):
+        """Inputs and IMK model parameters of the hinges of a frame. The parameters are
+        written into the scripts by `WriteScript` and used by `ModelBuilder`. The inputs
+        are rounded as in the scripts of previous versions (which calculated the parameters
+        when running), so that the models are unchanged.
+        The left and right hinges of a beam are the same, so a beam hinge is
+        indexed by (floor, bay), and a column hinge by (story, axis, "b" or "t").
+
+        Args:
+            frame (Frame): Frame object with all steps finished
+            evaluate (bool, optional): Whether to calculate the parameters, if False,
+            use `evaluate` or `evaluate_tables` later. Defaults to True.
+        """
+        self.frame_name = frame.frame_name
+        self.beam_index: dict[tuple[int, int], int] = dict()
+        self.column_index: dict[tuple[int, int, str], int] = dict()
+        beam_rows = self._beam_inputs(frame)
+        column_rows = self._column_inputs(frame)
+        self.beam_inputs = {key: np.array(values) for key, values in zip(BEAM_INPUTS, zip(*beam_rows))}
+        self.column_inputs = {key: np.array(values) for key, values in zip(COLUMN_INPUTS, zip(*column_rows))}
+        self.beam_parameters: dict[str, np.ndarray] = dict()
+        self.column_parameters: dict[str, np.ndarray] = dict()
+        if evaluate:
+            self.evaluate()
+
+    def _beam_inputs(self, frame: Frame) -> list[tuple]:
+        SC = frame.StructuralComponents
+        type_ = {'RBS': 1, 'Full': 2, 'Hinged': 3}[frame.ConnectionAndBoundary.beam_column_connection]
+        E = _rounded(frame.LoadAndMaterial.E, 2)
+        fy = _rounded(frame.LoadAndMaterial.fy_beam, 2)
+        rows = []
+        for FF in range(2, frame.N + 2):
+            SS = FF if FF - 1 in SC.column_splice else FF - 1
+            for BB in range(1, frame.bays + 1):
+                bf, d, tw, tf, ry, _, Ix, My, h = SC.beam_properties[FF][BB-1]
+                d_col_l = SC.column_properties[SS][BB-1][1]
+                d_col_r = SC.column_properties[SS][BB][1]
+                L = frame.BuildingGeometry.bay_length[BB-1] - (d_col_l + d_col_r) / 2
+                self.beam_index[(FF, BB)] = len(rows)
+                rows.append((E, fy, _rounded(Ix, 2), _rounded(d, 2), _rounded(h / tw, 2), _rounded(bf / (2 * tf), 2),
+                             _rounded(ry, 2), _rounded(L, 1), _rounded(L / 2, 1), _rounded(L / 2, 1),
+                             _rounded(My, 2), type_))
+        return rows
+
+    def _column_inputs(self, frame: Frame) -> list[tuple]:
+        SC = frame.StructuralComponents
+        beam_properties = SC.beam_properties
+        E = _rounded(frame.LoadAndMaterial.E, 2)
+        SF_PPy = frame.LoadAndMaterial.PPy_scale
+        rows = []
+        for SS in range(1, frame.N + 1):
+            FF_b, FF_t = SS, SS + 1
+            SS_t = SS + 1 if SS in SC.column_splice else SS
+            for AA in range(1, frame.axis + 1):
+                BB_l, BB_r = (1, 1) if AA == 1 else (frame.bays, frame.bays) if AA == frame.axis else (AA - 1, AA)
+                if FF_b == 1:
+                    d_beam_b_l, d_beam_b_r = 0, 0
+                else:
+                    d_beam_b_l = beam_properties[FF_b][BB_l-1][1]
+                    d_beam_b_r = beam_properties[FF_b][BB_r-1][1]
+                d_beam_t_l = beam_properties[FF_t][BB_l-1][1]
+                d_beam_t_r = beam_properties[FF_t][BB_r-1][1]
+                L0 = frame.BuildingGeometry.story_height[SS-1]
+                L = _rounded(L0 - (d_beam_b_l + d_beam_b_r) / 4 - (d_beam_t_l + d_beam_t_r) / 4, 2)
+                pinned = 2 if FF_b == 1 and frame.ConnectionAndBoundary.base_support == 'Pinned' else 1
+                for end, SS_, type_ in [('b', SS, pinned), ('t', SS_t, 1)]:
+                    _, d, tw, _, ry, _, Ix, My, h = SC.column_properties[SS_][AA-1]
+                    PPy = frame.LoadAndMaterial.PPy[f'{SS}{end}'][AA-1]
+                    self.column_index[(SS, AA, end)] = len(rows)
+                    rows.append((E, _rounded(Ix, 2), _rounded(d, 2), _rounded(h / tw, 2), _rounded(ry, 2),
+                                 L, L, _rounded(My, 2), _rounded(PPy, 4), SF_PPy, type_))
+        return rows
+
+    def evaluate(self):
+        """Calculate the IMK model parameters of all hinges"""
+        self._check_axial_load()
+        self.beam_parameters = beam_hinge_parameters(*[self.beam_inputs[key] for key in BEAM_INPUTS])
+        self.column_parameters = column_hinge_parameters(*[self.column_inputs[key] for key in COLUMN_INPUTS[:-1]])
+
+    def _check_axial_load(self):
+        """Check that the scaled axial load ratio of all column hinges is less than 1"""
+        PPy = self.column_inputs['PPy'] * self.column_inputs['SF_PPy']
+        invalid = {key: round(PPy[i].item(), 4) for key, i in self.column_index.items() if not PPy[i] < 1}
+        if invalid:
+            raise ValueError(f'The scaled axial load ratio (PPy * SF_PPy) of column hinges should be less than 1, '
+                             f'got {{(story, axis, end): ratio}} = {invalid} in frame {self.frame_name}')
+
+    def beam(self, FF: int, BB: int) -> tuple[dict, dict]:
+        """Inputs and IMK model parameters of the hinges of a beam
+
+        Args:
+            FF (int): Floor
+            BB (int): Bay
+
+        Returns:
+            tuple[dict, dict]: Inputs (see `BEAM_INPUTS`) and parameters (see `HingeParameters`)
+        """
+        i = self.beam_index[(FF, BB)]
+        return self._row(self.beam_inputs, i), self._row(self.beam_parameters, i)
+
+    def column(self, SS: int, AA: int, end: str) -> tuple[dict, dict]:
+        """Inputs and IMK model parameters of a column hinge
+
+        Args:
+            SS (int): Story
+            AA (int): Axis
+            end (str): "b" (bottom) or "t" (top)
+
+        Returns:
+            tuple[dict, dict]: Inputs (see `COLUMN_INPUTS`) and parameters (see `HingeParameters`)
+        """
+        i = self.column_index[(SS, AA, end)]
+        return self._row(self.column_inputs, i), self._row(self.column_parameters, i)
+
+    @staticmethod
+    def _row(columns: dict[str, np.ndarray], i: int) -> dict:
+        return {key: values[i].item() for key, values in columns.items()}
+
+    def to_dataframe(self, member: str='beam'):
+        """Inputs and IMK model parameters as a DataFrame
+
+        Args:
+            member (str, optional): "beam" or "column". Defaults to "beam".
+
+        Returns:
+            pd.DataFrame: One row for each beam or column hinge
+        """
+        import pandas as pd
+        if member == 'beam':
+            index, inputs, parameters = self.beam_index, self.beam_inputs, self.beam_parameters
+            names = ['Floor', 'Bay']
+        elif member == 'column':
+            index, inputs, parameters = self.column_index, self.column_inputs, self.column_parameters
+            names = ['Story', 'Axis', 'End']
+        else:
+            raise ValueError(f'Unknown member: {member}, should be "beam" or "column"')
+        df = pd.DataFrame(list(index.keys()), columns=names)
+        for key, values in inputs.items():
+            df[key] = values
+        for key in parameters:
+            if key not in inputs:
+                df[key] = parameters[key]
+            elif member == 'column':
+                df[f'{key}_adjusted'] = parameters[key]  # adjusted for the axial load ratio
+        return df
+
+
+def evaluate_tables(tables: list[HingeTable]):
+    """Calculate the IMK model parameters of the hinges of a batch of frames at once
+
+    Args:
+        tables (list[HingeTable]): Hinge tables, e.g. created with `evaluate=False`
+    """
+    for table in tables:
+        table._check_axial_load()
+    for member, keys in [('beam', BEAM_INPUTS), ('column', COLUMN_INPUTS[:-1])]:
+        counts = [len(getattr(table, f'{member}_index')) for table in tables]
+        inputs = [np.concatenate([getattr(table, f'{member}_inputs')[key] for table in tables]) for key in keys]
+        func = beam_hinge_parameters if member == 'beam' else column_hinge_parameters
+        parameters = func(*inputs)
+        splits = np.cumsum(counts)[:-1]
+        for table, *values in zip(tables, *[np.split(parameters[key], splits) for key in PARAMETERS]):
+            setattr(table, f'{member}_parameters', dict(zip(PARAMETERS, values)))
+
+
+def hinge_tables(frames: list[Frame]) -> list[HingeTable]:
+    """Hinge tables of a batch of frames, whose parameters are calculated at once
+
+    Args:
+        frames (list[Frame]): Frames with all steps finished
+
+    Returns:
+        list[HingeTable]: Hinge tables in the order of `frames`
+    """
+    tables = [HingeTable(frame, evaluate=False) for frame in frames]
+    if tables:
+        evaluate_tables(tables)
+    return tables
@@ -0,0 +1,231 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import json
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import SuiteRunner
+from .GMLibrary import GMLibrary
+
+
+"""
+Incremental dynamic analysis (IDA) using the hunt-and-fill algorithm
+Writen by: Wenchen Lie
+
+Reference:
+[1] Vamvatsikos D, Cornell CA. Applied incremental dynamic analysis. Earthquake Spectra, 2004, 20(2): 523-553.
+"""
+
+# Items of a job that the cached results depend on
+CACHE_JOB_KEYS = ('GMname', 'GMFile', 'GMdt', 'GMpoints', 'GMduration', 'FVduration',
+                  'CollapseDrift', 'collapse_criteria')
+
+def run_ida(
+        frame: Frame | str | Path, gm_table: list[dict], MainFolder: str | Path,
+        workers: int=1, SF_init: float=0.2, SF_step: float=0.2, SF_step_incr: float=0.1,
+        SF_max: float=20, tolerance: float=0.05, max_runs: int=12,
+        maxRunTime: float=600, CollapseDrift: float=0.1, FVduration: float=30,
+        collapse_criteria: dict=None, checkpoint_interval: float=None, reuse_model: bool=True,
+        gm_library: GMLibrary | str | Path=None,
+        subroutines_dir: str | Path=SuiteRunner.SUBROUTINES_DIR
+    ) -> dict[str, dict]:
+    """Run incremental dynamic analysis, the ground motions are analysed
+    concurrently and each ground motion is scaled by the hunt-and-fill algorithm:
+    * Hunt: increase the scale factor by a growing step until collapse
+    * Bracket: bisect between the largest non-collapse and the smallest collapse
+    scale factors until their distance is less than `tolerance`
+    * Fill: use the remaining runs to fill the largest gaps below collapse
+
+    Results of every (record, scale factor) are cached in "MainFolder/IDA_cache",
+    so that an interrupted IDA can be continued without rerunning finished analyses.
+    The cache of a record is discarded if the script, the record, the analysis settings
+    or the scaling settings (except `max_runs`, which can be increased to continue an IDA)
+    have changed.
+
+    Args:
+        frame (Frame | str | Path): A `Frame` whose scripts have been generated, or the
+        path of the generated openseespy script
+        gm_table (list[dict]): Ground motions, see `SuiteRunner.run_suite` ("EqSF" is ignored)
+        MainFolder (str | Path): Folder of results
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        SF_init (float, optional): Initial scale factor. Defaults to 0.2.
+        SF_step (float, optional): Initial step of scale factor. Defaults to 0.2.
+        SF_step_incr (float, optional): Increment of the step after each non-collapse run. Defaults to 0.1.
+        SF_max (float, optional): Maximum scale factor. Defaults to 20.
+        tolerance (float, optional): Tolerance of collapse scale factor. Defaults to 0.05.
+        max_runs (int, optional): Maximum number of analyses of each ground motion. Defaults to 12.
+        maxRunTime (float, optional): Maximum run time of each analysis (second). Defaults to 600.
+        CollapseDrift (float, optional): Drift ratio that sign the frame as collapse. Defaults to 0.1.
+        FVduration (float, optional): Default free vibration duration. Defaults to 30.
+        collapse_criteria (dict, optional): Additional collapse criteria passed to
+        `TimeHistorySolver`, see `SuiteRunner.run_suite`
+        checkpoint_interval (float, optional): Interval of checkpoints of each analysis (second),
+        see `SuiteRunner.run_suite`
+        reuse_model (bool, optional): Reuse the model in each worker process, see
+        `SuiteRunner.run_suite`. Defaults to True.
+        gm_library (GMLibrary | str | Path, optional): Ground motion library, see
+        `SuiteRunner.run_suite`
+        subroutines_dir (str | Path, optional): Folder that contains the `subroutines` package
+
+    Returns:
+        dict[str, dict]: {GMname: result}, the result includes:
+        * collapse_SF: Smallest collapse scale factor (None if not collapsed up to `SF_max`)
+        * points: [(SF, max_SDR, collapse), ...] sorted by scale factor
+        * n_runs: Number of analyses actually run (excluding cached results)
+    """
+    script = SuiteRunner.get_script_path(frame)
+    MainFolder = Path(MainFolder)
+    MainFolder.mkdir(parents=True, exist_ok=True)
+    (MainFolder/'IDA_cache').mkdir(exist_ok=True)
+    if hasattr(gm_table, 'to_dict'):
+        gm_table = gm_table.to_dict('records')
+    gm_table = [{**row, 'EqSF': 1, 'SubFolder': str(row['GMname'])} for row in gm_table]
+    if isinstance(gm_library, (str, Path)):
+        gm_library = GMLibrary.load(gm_library)
+    jobs = SuiteRunner.make_jobs(gm_table, MainFolder, maxRunTime, CollapseDrift, FVduration,
+                                 collapse_criteria, checkpoint_interval, reuse_model, gm_library)
+    settings = {
+        'SF_init': SF_init,
+        'SF_step': SF_step,
+        'SF_step_incr': SF_step_incr,
+        'SF_max': SF_max,
+        'tolerance': tolerance,
+        'max_runs': max_runs,
+    }
+    script_hash = hashlib.sha256(script.read_bytes()).hexdigest()
+    keys = [cache_key(script_hash, job, settings) for job in jobs]
+    results = dict()
+
+    def _collect(result: dict):
+        results[result['GMname']] = result
+        print(f'[{len(results)}/{len(jobs)}] {result["GMname"]}: collapse SF {result["collapse_SF"]}, '
+              f'{result["n_runs"]} runs ({len(result["points"])} points)')
+
+    if workers == 1:
+        SuiteRunner._init_worker(script, subroutines_dir, gm_library)
+        for job, key in zip(jobs, keys):
+            _collect(_run_ida_record(job, settings, key))
+    else:
+        with ProcessPoolExecutor(workers, initializer=SuiteRunner._init_worker,
+                                 initargs=(script, subroutines_dir, gm_library)) as executor:
+            futures = [executor.submit(_run_ida_record, job, settings, key) for job, key in zip(jobs, keys)]
+            for future in as_completed(futures):
+                _collect(future.result())
+    with open(MainFolder/'IDA_results.json', 'w') as f:
+        json.dump(results, f, indent=4)
+    return results
+
+
+def is_collapse(summary: dict) -> bool:
+    """Whether an analysis is regarded as collapse, the analyses that cannot
+    converge or exceed the maximum running time are also regarded as collapse
+    (the latter are continued from their checkpoints when running the IDA again
+    with `checkpoint_interval`)"""
+    return summary['collapse'] or summary['status'] in [2, 3, 4]
+
+
+def cache_key(script_hash: str, job: dict, settings: dict) -> str:
+    """Key of the cached results of a ground motion, i.e. the hash of the script,
+    the record, the analysis settings and the scaling settings (except `max_runs`)"""
+    data = {
+        'script': script_hash,
+        'job': {key: job[key] for key in CACHE_JOB_KEYS},
+        'settings': {key: value for key, value in settings.items() if key != 'max_runs'},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def read_cache(cache_file: Path, key: str) -> dict[float, dict] | None:
+    """Read the cached summaries of a ground motion, {SF: summary}. The first line of
+    the cache file is the cache key, None is returned if it does not match `key`."""
+    with open(cache_file, 'r') as f:
+        try:
+            if json.loads(f.readline()).get('cache_key') != key:
+                return None
+        except (json.JSONDecodeError, AttributeError):
+            return None  # written before the cache key was recorded
+        cache = dict()
+        for line in f:
+            try:
+                summary = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            cache[summary['EqSF']] = summary
+    return cache
+
+
+def _run_ida_record(job: dict, settings: dict, key: str) -> dict:
+    """Hunt-and-fill scale factors of a ground motion"""
+    GMname = job['GMname']
+    cache_file = Path(job['MainFolder'])/'IDA_cache'/f'{GMname}.jsonl'
+    cache = read_cache(cache_file, key) if cache_file.exists() else None  # {SF: summary}
+    if cache is None:
+        if cache_file.exists():
+            print(f'{GMname}: the script or settings have changed, the cached results are discarded')
+            for checkpoint in (Path(job['MainFolder'])/GMname).glob('SF*/checkpoint.npz'):
+                checkpoint.unlink()  # not to resume the analyses of the previous cache
+        with open(cache_file, 'w') as f:
+            f.write(json.dumps({'cache_key': key}) + '\n')
+        cache = dict()
+    n_runs = 0
+
+    def analyse(SF: float, resume: bool=False) -> bool:
+        nonlocal n_runs
+        SF = round(SF, 4)
+        if SF not in cache or resume:
+            summary = SuiteRunner._run_record({**job, 'EqSF': SF, 'SubFolder': f'{GMname}/SF{SF:g}'})
+            if summary['status'] == 0:
+                raise RuntimeError(f'Analysis of {GMname} (SF = {SF}) failed: {summary["error"]}')
+            with open(cache_file, 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+            cache[SF] = summary
+            n_runs += 1
+        return is_collapse(cache[SF])
+
+    # Continue the cached analyses exceeding `maxRunTime` from their checkpoints
+    if job.get('checkpoint_interval'):
+        for SF, summary in list(cache.items()):
+            if summary['status'] == 4 and (Path(job['MainFolder'])/summary['SubFolder']/'checkpoint.npz').exists():
+                analyse(SF, resume=True)
+    # Hunt
+    SF, step = settings['SF_init'], settings['SF_step']
+    SF_nc, SF_c = 0, None  # largest non-collapse and smallest collapse scale factors
+    while len(cache) < settings['max_runs'] and SF <= settings['SF_max']:
+        if analyse(SF):
+            SF_c = round(SF, 4)
+            break
+        SF_nc = round(SF, 4)
+        SF += step
+        step += settings['SF_step_incr']
+    # Bracket
+    while (SF_c is not None and len(cache) < settings['max_runs']
+           and SF_c - SF_nc > settings['tolerance']):
+        SF = (SF_nc + SF_c) / 2
+        if analyse(SF):
+            SF_c = round(SF, 4)
+        else:
+            SF_nc = round(SF, 4)
+    # Fill (the collapsed fill points of non-monotonic IDA curves are also boundaries of gaps)
+    SF_limit = SF_c if SF_c is not None else float('inf')
+    for _ in range(settings['max_runs']):
+        if len(cache) >= settings['max_runs']:
+            break
+        SFs = sorted({0} | {SF for SF in cache if SF < SF_limit})
+        gaps = [(SFs[i+1] - SFs[i], SFs[i]) for i in range(len(SFs) - 1)
+                if round((SFs[i] + SFs[i+1]) / 2, 4) not in cache]
+        if not gaps:
+            break
+        gap, SF_low = max(gaps)
+        if gap <= settings['tolerance']:
+            break
+        analyse(SF_low + gap / 2)
+    collapse_SFs = [SF for SF, summary in cache.items() if is_collapse(summary)]
+    points = [(SF, cache[SF]['max_SDR'], is_collapse(cache[SF])) for SF in sorted(cache)]
+    return {
+        'GMname': GMname,
+        'collapse_SF': min(collapse_SFs) if collapse_SFs else None,
+        'points': points,
+        'n_runs': n_runs,
+    }
@@ -4,10 +4,18 @@ if TYPE_CHECKING:
     from .MRFhelper import Frame
 import numpy as np
 from . import func
+from .DerivedGraph import LazyAttribute
 
 
 class LoadAndMaterial:
     g = 9800
+    # Derived quantities, see `DerivedGraph`
+    F_node = LazyAttribute()
+    F_grav = LazyAttribute()
+    mass_node = LazyAttribute()
+    mass_grav = LazyAttribute()
+    PPy = LazyAttribute()
+    PPy_scale = LazyAttribute()
 
     def __init__(self, frame: Frame) -> None:
         self.N = frame.N
@@ -157,92 +165,23 @@ class LoadAndMaterial:
         * mass_node (dict): Beam-column joint mass ({floor: mass})
         * mass_grav (dect): Leaning column joint mass ({floor: mass})
         """
-        plane_dimensions = frame.BuildingGeometry.plane_dimensions
-        N_MF = frame.BuildingGeometry.MF_number
-        area_ex = frame.BuildingGeometry.exterior_column_tributary_area
-        area_in = frame.BuildingGeometry.interior_column_tributary_area
-        h_list = frame.BuildingGeometry.story_height
-        # dead load
-        DL_node = dict()
-        DL_grav = dict()
-        S_3D = plane_dimensions[0] * plane_dimensions[1]  # area of 3D building plane
-        for floor, DL_value in self.dead_load.items():
-            DL_3D = S_3D * DL_value  # Dead load (N) for each floor of the 3D building
-            DL = DL_3D / N_MF  # Dead load (N) for each floor of the 2D considered frame
-            r_rest = 1
-            DL_floor = []
-            for id_axis in range(self.axis):
-                if id_axis == 0 or id_axis == self.axis - 1:
-                    r = area_ex[0] * area_ex[1] / (S_3D / N_MF)  # area ratio for external columns
-                else:
-                    r = area_in[0] * area_in[1] / (S_3D / N_MF)  # area ratio for internal columns
-                r_rest -= r
-                DL_floor.append(DL * r)
-            DL_grav[floor] = DL * r_rest
-            DL_node[floor] = DL_floor
-        # live load (same as the dead load)
-        LL_node = dict()
-        LL_grav = dict()
-        S_3D = plane_dimensions[0] * plane_dimensions[1]  # area of 3D building plane
-        for floor, LL_value in self.live_load.items():
-            LL_3D = S_3D * LL_value  # Dead load (N) for each floor of the 3D building
-            LL = LL_3D / N_MF  # Dead load (N) for each floor of the 2D considered frame
-            r_rest = 1
-            LL_floor = []
-            for id_axis in range(self.axis):
-                if id_axis == 0 or id_axis == self.axis - 1:
-                    r = area_ex[0] * area_ex[1] / (S_3D / N_MF)  # area ratio for external columns
-                else:
-                    r = area_in[0] * area_in[1] / (S_3D / N_MF)  # area ratio for internal columns
-                r_rest -= r
-                LL_floor.append(LL * r)
-            LL_grav[floor] = LL * r_rest
-            LL_node[floor] = LL_floor
-        # cladding load
-        CL_node = dict()
-        CL_grav = dict()
-        for story, CL_value in self.cladding_load.items():
-            floor = story + 1
-            story_b, story_t = floor - 1, floor  # story number
-            CL_floor = []
-            h = h_list[story_b-1]/2 if floor==self.N+1 else (h_list[story_b-1] + h_list[story_t-1])/2  # tributary heigth of each floor
-            S_rest = plane_dimensions[0] * h
-            for id_axis in range(self.axis):
-                if id_axis == 0 or id_axis == self.axis - 1:  # if external node
-                    if floor == self.N + 1:  # if top floor
-                        S_node = area_ex[0] * h_list[story_b-1] / 2  # Node tributary facade area
-                    else:
-                        S_node = area_ex[0] * (h_list[story_b-1] + h_list[story_t-1]) / 2  # Node tributary facade area
-                else:
-                    if floor == self.N + 1:  # if top floor
-                        S_node = area_in[0] * h_list[story_b-1] / 2  # Node tributary facade area
-                    else:
-                        S_node = area_in[0] * (h_list[story_b-1] + h_list[story_t-1]) / 2  # Node tributary facade area
-                S_rest -= S_node
-                CL_floor.append(S_node * CL_value)
-            CL_node[floor] = CL_floor
-            CL_grav[floor] = S_rest * CL_value + plane_dimensions[1] * h * CL_value  # Consider the Y-direction cladding load
-            # CL_grav[floor] = S_rest * CL_value   # TODO Did not consider the Y-direction cladding load
-        # node force
-        F_node = dict()
-        F_grav = dict()
-        mass_node = dict()
-        mass_grav = dict()
-        for floor in range(2, 2 + self.N):
-            DL_floor = np.array(DL_node[floor])
-            LL_floor = np.array(LL_node[floor])
-            CL_floor = np.array(CL_node[floor])
-            F_floor = DL_floor * self.cc_weight['Dead'] + LL_floor * self.cc_weight['Live'] + CL_floor + self.cc_weight['Cladding']
-            mass_floor = (DL_floor * self.cc_mass['Dead'] + LL_floor * self.cc_mass['Live'] + CL_floor + self.cc_mass['Cladding']) / self.g
-            F_floor = list(F_floor)
-            mass_floor = list(mass_floor)
-            F_node[floor] = F_floor
-            mass_node[floor] = mass_floor
-            F_grav[floor] = DL_grav[floor] * self.cc_weight['Dead'] + LL_grav[floor] * self.cc_weight['Live'] + CL_grav[floor] * self.cc_weight['Cladding']
-            mass_grav[floor] = (DL_grav[floor] * self.cc_mass['Dead'] + LL_grav[floor] * self.cc_mass['Live'] + CL_grav[floor] * self.cc_mass['Cladding']) / self.g
-        # TODO Beam and column component masses have not been considered, but FM2D also did not consider.
-        self.F_node, self.F_grav, self.mass_node, self.mass_grav = F_node, F_grav, mass_node, mass_grav
-            
+        floors = range(2, self.N + 2)
+        res = calculate_load(
+            frame.BuildingGeometry.plane_dimensions,
+            frame.BuildingGeometry.MF_number,
+            frame.BuildingGeometry.exterior_column_tributary_area,
+            frame.BuildingGeometry.interior_column_tributary_area,
+            frame.BuildingGeometry.story_height,
+            [self.dead_load[floor] for floor in floors],
+            [self.live_load[floor] for floor in floors],
+            [self.cladding_load[floor - 1] for floor in floors],
+            self.cc_weight, self.cc_mass, self.axis, self.g
+        )
+        self.F_node = {floor: list(res['F_node'][i]) for i, floor in enumerate(floors)}
+        self.F_grav = {floor: res['F_grav'][i] for i, floor in enumerate(floors)}
+        self.mass_node = {floor: list(res['mass_node'][i]) for i, floor in enumerate(floors)}
+        self.mass_grav = {floor: res['mass_grav'][i] for i, floor in enumerate(floors)}
+
 
     def _calculate_PPy(self, frame: Frame, PPy_scale: float=1.25):
         """Calculate the axial compression ratio of columns
@@ -254,29 +193,120 @@ class LoadAndMaterial:
             PPy_scale (float, optional): Scale factor of compression ratio, defaults to 1.25.
         """
         props_col = frame.StructuralComponents.column_properties
-        P_col = dict()  # Axial forces of columns
-        P_temp = np.zeros(self.axis)
-        for story in list(1+i for i in range(self.N))[::-1]:
-            floor = story + 1
-            P_temp += np.array(self.F_node[floor])
-            P_col[story] = P_temp.tolist()
+        F_node = [self.F_node[story + 1] for story in range(1, self.N + 1)]
+        A_b = [[prop[5] for prop in props_col[story]] for story in range(1, self.N + 1)]
+        A_t = []  # Cross section aera of columns at the top of stories
+        for story in range(1, self.N + 1):
+            story_t = story + 1 if story in frame.StructuralComponents.column_splice else story
+            A_t.append([prop[5] for prop in props_col[story_t]])
+        PPy_b, PPy_t = calculate_PPy(F_node, A_b, A_t, self.fy_column)
         PPy = dict()  # Column axial compression ratio
         for story in range(1, self.N + 1):
-            prop_floor = props_col[story]  # column properties for each story
-            PPy_story_b, PPy_story_t = [], []
-            for axis in range(1, self.axis + 1):
-                id_axis = axis - 1
-                A = prop_floor[id_axis][5]  # Cross section aera of column
-                P = P_col[story][id_axis]  # Axial force of column
-                PPy_story_b.append(P / (A * self.fy_column))  # Axial compression ratio of columns on the story
-                if story not in frame.StructuralComponents.column_splice:
-                    PPy_story_t.append(P / (A * self.fy_column))  # Axial compression ratio of columns on the story
-                else:
-                    A_t = props_col[story+1][id_axis][5]  # Cross section aera of column
-                    PPy_story_t.append(P / (A_t * self.fy_column))  # Axial compression ratio of columns on the story
-            PPy[f'{story}b'] = PPy_story_b
-            PPy[f'{story}t'] = PPy_story_t
+            PPy[f'{story}b'] = PPy_b[story - 1].tolist()
+            PPy[f'{story}t'] = PPy_t[story - 1].tolist()
         self.PPy, self.PPy_scale = PPy, PPy_scale
 
-                
 
+def _side(values, axis: int) -> np.ndarray:
+    """Expand the values of exterior and interior columns to all axes, shape (..., axis)"""
+    ex, in_ = values
+    res = np.empty(np.broadcast(ex, in_).shape + (axis,))
+    res[..., :] = np.asarray(in_)[..., None]
+    res[..., 0] = ex
+    res[..., -1] = ex
+    return res
+
+
+def calculate_load(
+        plane_dimensions: np.ndarray, MF_number: int | np.ndarray,
+        exterior_column_tributary_area: np.ndarray, interior_column_tributary_area: np.ndarray,
+        story_height: np.ndarray, dead_load: np.ndarray, live_load: np.ndarray,
+        cladding_load: np.ndarray, cc_weight: dict, cc_mass: dict, axis: int, g: float=9800
+    ) -> dict[str, np.ndarray]:
+    """Calculate the gravity loads and masses of moment frame joints and leaning columns.
+    All arguments can have leading batch dimensions (broadcastable), so that multiple
+    load cases or frames with the same number of stories and axes are calculated at once.
+
+    Args:
+        plane_dimensions (np.ndarray): Plane dimensions (x, y) of the 3D building, shape (..., 2)
+        MF_number (int | np.ndarray): Number of moment frames, shape (...)
+        exterior_column_tributary_area (np.ndarray): Shape (..., 2)
+        interior_column_tributary_area (np.ndarray): Shape (..., 2)
+        story_height (np.ndarray): Shape (..., N)
+        dead_load (np.ndarray): Dead load of floor 2 to N+1, shape (..., N)
+        live_load (np.ndarray): Live load of floor 2 to N+1, shape (..., N)
+        cladding_load (np.ndarray): Cladding load of story 1 to N, shape (..., N)
+        cc_weight (dict): Combination coefficients of seismic weight, values of shape (...)
+        cc_mass (dict): Combination coefficients of seismic mass, values of shape (...)
+        axis (int): Number of axes
+        g (float, optional): Gravity acceleration. Defaults to 9800.
+
+    Returns:
+        dict[str, np.ndarray]: F_node and mass_node of shape (..., N, axis),
+        F_grav and mass_grav of shape (..., N)
+
+    Note: As in previous versions, the cladding combination coefficients are added to
+    (rather than multiplied by) the cladding loads of the moment frame joints, while
+    they are multiplied by those of the leaning columns, so that the generated models
+    are unchanged. The masses of beams and columns themselves are not considered
+    (as in FM2D).
+    """
+    plane = np.asarray(plane_dimensions, dtype=float)
+    N_MF = np.asarray(MF_number, dtype=float)[..., None]
+    area_ex = np.asarray(exterior_column_tributary_area, dtype=float)
+    area_in = np.asarray(interior_column_tributary_area, dtype=float)
+    h_list = np.asarray(story_height, dtype=float)
+    # dead and live load
+    S_3D = (plane[..., 0] * plane[..., 1])[..., None]  # area of 3D building plane
+    r = _side((area_ex[..., 0] * area_ex[..., 1], area_in[..., 0] * area_in[..., 1]), axis)
+    r = r / (S_3D / N_MF)  # area ratio of columns
+    r_rest = np.ones(r.shape[:-1])
+    for id_axis in range(axis):
+        r_rest = r_rest - r[..., id_axis]
+    r_rest = r_rest[..., None]
+    DL = S_3D * np.asarray(dead_load, dtype=float) / N_MF  # Dead load (N) for each floor of the 2D considered frame
+    LL = S_3D * np.asarray(live_load, dtype=float) / N_MF
+    DL_node, DL_grav = DL[..., None] * r[..., None, :], DL * r_rest
+    LL_node, LL_grav = LL[..., None] * r[..., None, :], LL * r_rest
+    # cladding load
+    CL = np.asarray(cladding_load, dtype=float)
+    h = np.empty(h_list.shape)  # tributary heigth of each floor
+    h[..., :-1] = (h_list[..., :-1] + h_list[..., 1:]) / 2
+    h[..., -1] = h_list[..., -1] / 2
+    S_node = _side((area_ex[..., 0], area_in[..., 0]), axis)[..., None, :] * h[..., None]  # Node tributary facade area
+    S_rest = plane[..., 0, None] * h
+    for id_axis in range(axis):
+        S_rest = S_rest - S_node[..., id_axis]
+    CL_node = S_node * CL[..., None]
+    CL_grav = S_rest * CL + plane[..., 1, None] * h * CL  # Consider the Y-direction cladding load
+    # node force
+    cc_w = {key: np.asarray(val, dtype=float)[..., None] for key, val in cc_weight.items()}
+    cc_m = {key: np.asarray(val, dtype=float)[..., None] for key, val in cc_mass.items()}
+    F_node = DL_node * cc_w['Dead'][..., None] + LL_node * cc_w['Live'][..., None] + CL_node + cc_w['Cladding'][..., None]
+    mass_node = (DL_node * cc_m['Dead'][..., None] + LL_node * cc_m['Live'][..., None] + CL_node + cc_m['Cladding'][..., None]) / g
+    F_grav = DL_grav * cc_w['Dead'] + LL_grav * cc_w['Live'] + CL_grav * cc_w['Cladding']
+    mass_grav = (DL_grav * cc_m['Dead'] + LL_grav * cc_m['Live'] + CL_grav * cc_m['Cladding']) / g
+    return {'F_node': F_node, 'F_grav': F_grav, 'mass_node': mass_node, 'mass_grav': mass_grav}
+
+
+def calculate_PPy(F_node: np.ndarray, A_b: np.ndarray, A_t: np.ndarray,
+                  fy_column: float | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Calculate the axial compression ratio of columns, all arguments can have
+    leading batch dimensions
+
+    Args:
+        F_node (np.ndarray): Joint forces of floor 2 to N+1, shape (..., N, axis)
+        A_b (np.ndarray): Section areas of columns at the bottom of stories, shape (..., N, axis)
+        A_t (np.ndarray): Section areas of columns at the top of stories, shape (..., N, axis)
+        fy_column (float | np.ndarray): Yield strength of columns, shape (...)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Axial compression ratios at the bottom and top of
+        stories, shape (..., N, axis)
+    """
+    F_node = np.asarray(F_node, dtype=float)
+    fy = np.asarray(fy_column, dtype=float)[..., None, None]
+    P_col = np.cumsum(F_node[..., ::-1, :], axis=-2)[..., ::-1, :]  # Axial forces of columns
+    PPy_b = P_col / (np.asarray(A_b, dtype=float) * fy)
+    PPy_t = P_col / (np.asarray(A_t, dtype=float) * fy)
+    return PPy_b, PPy_t
@@ -7,6 +7,14 @@ from .LoadAndMaterial import LoadAndMaterial
 from .UserCommand import UserCommand
 from . import WriteInfo
 from . import WriteScript
+from .SuiteRunner import run_suite
+from .IDA import run_ida
+from .RecorderReader import read_recorders
+from .ResultsStore import ResultsStore
+from .GMLibrary import GMLibrary
+from .FrameBatch import generate_variants
+from .HingeTable import hinge_tables
+from .DerivedGraph import DerivedGraph, LazyAttribute
 from . import __version__
 
 
@@ -14,6 +22,8 @@ VERSION = __version__
 
 class Frame:
     version = VERSION
+    dict_info = LazyAttribute()  # derived quantity, see `DerivedGraph`
+    hinge_table = LazyAttribute()  # calculated when first accessed, see `HingeTable`
 
     def __init__(self, frame_name: str, notes: str=None):
         """Use this class to define structural parameters of steel moment resisting frame (MRF)
@@ -65,19 +75,137 @@ class Frame:
 
     def all_steps_finished(self):
         """Calculate simulation parameters and write them into tcl script"""
+        self._graph = DerivedGraph(self)
+        self._graph.attach(self, self.StructuralComponents, self.LoadAndMaterial)
         self.StructuralComponents._get_section_properties(self)
         self.StructuralComponents._get_panel_zone_thickness()
         self.LoadAndMaterial._calculate_load(self)
         self.LoadAndMaterial._calculate_PPy(self)
         self.dict_info = WriteInfo.write_info_to_dict(self)
 
-    def generate_tcl_script(self, dir_):
-        """Write tcl script"""
+    def generate_tcl_script(self, dir_, headless: bool=False, overwrite: str=None,
+                            figure: bool=True, dpi: int=1200, compress: bool=False,
+                            recorder_format: str='text') -> WriteScript.WriteScript:
+        """Write tcl and openseespy scripts
+
+        Args:
+            dir_ (str | Path): Output folder
+            headless (bool, optional): Generate without any GUI (figure window or message box),
+            can be used on batch nodes or in worker processes. Defaults to False.
+            overwrite (str, optional): Policy when the scripts already exist ("ask", "overwrite",
+            "skip" or "error"), defaults to "ask", or "overwrite" in headless mode
+            figure (bool, optional): Whether to render the model figure. Defaults to True.
+            dpi (int, optional): Resolution of the model figure. Defaults to 1200.
+            compress (bool, optional): Write gzip compressed scripts. Defaults to False.
+            recorder_format (str, optional): "text" (one file for each response) or "binary"
+            (grouped binary files, read by `read_recorders`). Defaults to "text".
+
+        Returns:
+            WriteScript.WriteScript: The script writer, use `render_figure` to render the
+            model figure afterwards if `figure` is False
+        """
+        if overwrite is None:
+            overwrite = 'overwrite' if headless else 'ask'
         self.output_path = Path(dir_)
         if not self.output_path.exists():
             Path.mkdir(self.output_path)
-        self.builiding_info = WriteInfo.write_info_to_tcl(self)
-        WriteScript.WriteScript(self)
+        # Written by `WriteScript` together with the scripts, following the overwrite policy
+        self.builiding_info = WriteInfo.write_info_to_tcl(self, write=False)
+        return WriteScript.WriteScript(self, headless, overwrite, figure, dpi, compress,
+                                       recorder_format=recorder_format)
+
+    def build_model(self, eigen: bool=True, gravity: bool=True):
+        """Build the OpenSees model in the current process using openseespy commands
+        directly, without generating scripts. The domain is identical to that of the
+        generated openseespy script, including node and element IDs.
+
+        Args:
+            eigen (bool, optional): Whether to run eigen analysis. Defaults to True.
+            gravity (bool, optional): Whether to run static gravity analysis. Defaults to True.
+
+        Returns:
+            ModelBuilder.ModelBuilder: The model builder, including `control_nodes`, `periods`
+            and `mode_list`
+        """
+        from .ModelBuilder import ModelBuilder
+        return ModelBuilder(self).build(eigen, gravity)
+
+    def elastic_model(self):
+        """Elastic surrogate of the OpenSees model assembled with sparse matrices, which
+        gives the periods, mode shapes and elastic drifts without running OpenSees
+
+        Returns:
+            ElasticModel.ElasticModel: The elastic model, see `modal` and `elf_drifts`
+        """
+        from .ElasticModel import ElasticModel
+        return ElasticModel(self)
+
+    def modal_properties(self, cache_dir: str | Path=None, refresh: bool=False):
+        """Periods, mode shapes and pushover load pattern of the frame. The results are
+        cached persistently by the content hash of the frame, the eigen analysis is run
+        (in the current process, wiping the OpenSees domain) only if the model has changed.
+
+        Args:
+            cache_dir (str | Path, optional): Cache folder, defaults to `ModalCache.CACHE_DIR`
+            refresh (bool, optional): Recompute the cached results. Defaults to False.
+
+        Returns:
+            ModalCache.ModalProperties: Modal properties, e.g. `T1`, `periods` and `pattern`
+        """
+        from .ModalCache import get_modal_properties
+        return get_modal_properties(self, cache_dir, refresh)
+
+    def invalidate(self, *inputs: str, keys: dict[str, set]=None) -> list[str]:
+        """Invalidate the derived quantities after inputs are changed by the setters
+        (all steps finished), they are recalculated lazily when accessed.
+
+        Args:
+            inputs (str): Changed inputs, see `DerivedGraph.INPUTS`
+            keys (dict[str, set], optional): Changed floors (stories) of partially changed
+            inputs, e.g. {"beams": {3}}
+
+        Example:
+            >>> frame.StructuralComponents.set_doubler_plate(2, [10, 10, 10, 10])
+            >>> frame.invalidate('doubler_plate')  # only `pz_thickness` is invalidated
+
+        Returns:
+            list[str]: Invalidated quantities
+        """
+        return self._graph.invalidate(*inputs, keys=keys)
+
+    def update(self):
+        """Recalculate all invalidated derived quantities, e.g. to check the sections"""
+        self._graph.update()
+
+    def derive(self, frame_name: str=None, notes: str=None, **changes) -> 'Frame':
+        """Derive a modified frame cheaply, e.g. in optimization loops. The changes are
+        applied (and checked) by the setters of the copied components, the unchanged
+        components are shared with this frame, and only the dependent quantities
+        (section properties, panel zone thickness, loads and masses, and axial
+        compression ratio of columns, see `DerivedGraph`) are recalculated lazily
+        when accessed, so that invalid sections are reported then (or by `update`).
+        Both frames should not be modified by the setters afterwards, derive again instead.
+
+        Args:
+            frame_name (str, optional): Name of the new frame, defaults to the current name
+            notes (str, optional): Notes of the new frame, defaults to the current notes
+            changes: Changes in `FrameDerive.CHANGES`, the numbers of stories and bays
+            cannot be changed:
+            * beams / columns / doubler_plate - {floor (story): [...]}, only the given
+            floors (stories) are changed
+            * dead_load / live_load / cladding_load - {floor (story): load}
+            * column_splice / beam_splice - Stories / bays
+            * RBS_paras - (a, b, c) of the RBS connection
+            * story_height, bay_length, E, fy_beam, base_support, etc. - New value
+
+        Example:
+            >>> frame_new = frame.derive(beams={3: ['W24x76'] * 3}, fy_beam=355)
+
+        Returns:
+            Frame: The new frame with all steps finished
+        """
+        from .FrameDerive import derive_frame
+        return derive_frame(self, frame_name, notes, **changes)
 
 
 def from_json(file: str | Path) -> Frame:
@@ -94,7 +222,20 @@ def from_json(file: str | Path) -> Frame:
         raise FileExistsError(f'file not found')
     with open(file, 'r') as f:
         dict_info = json.load(f)
-    frame = Frame(dict_info['name'])
+    return from_dict(dict_info)
+
+
+def from_dict(dict_info: dict, frame_name: str=None) -> Frame:
+    """Get an available model from the model information (the content of the json file)
+
+    Args:
+        dict_info (dict): Model information, see `WriteInfo.write_info_to_dict`
+        frame_name (str, optional): Name of the frame, defaults to that in `dict_info`
+
+    Returns:
+        Frame: Object of `Frame`
+    """
+    frame = Frame(dict_info['name'] if frame_name is None else frame_name, dict_info.get('notes'))
     # Step 1
     frame.BuildingGeometry.story_height = dict_info['BuildingGeometry']['story_height']
     frame.BuildingGeometry.bay_length = dict_info['BuildingGeometry']['bay_length']
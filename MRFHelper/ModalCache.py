@@ -0,0 +1,193 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import os
+import json
+import hashlib
+from math import pi
+from pathlib import Path
+from typing import NamedTuple
+from . import WriteInfo
+from . import __version__
+
+
+"""
+Persistent cache of modal properties (periods, mode shapes and pushover load pattern)
+keyed by the content hash of a frame
+Writen by: Wenchen Lie
+"""
+
+CACHE_DIR = Path.home()/'.MRFHelper'/'modal_cache'  # default cache folder
+_IGNORED = ('name', 'notes', 'References')  # items of `dict_info` not affecting the model
+_caches: dict[Path, 'ModalCache'] = dict()  # caches of the current process
+# Derived data used by the model, {component: attributes}
+MODEL_DATA = {
+    'StructuralComponents': ('beam_properties', 'column_properties', 'RBS_length', 'pz_thickness'),
+    'LoadAndMaterial': ('F_node', 'F_grav', 'mass_node', 'mass_grav', 'PPy', 'PPy_scale'),
+}
+
+
+class ModalProperties(NamedTuple):
+    key: str  # Content hash of the frame
+    periods: list[float]  # Periods of all modes, rounded to 3 digits as the generated script
+    omega: list[float]  # Circular frequencies of all modes
+    modes: list[list[float]]  # modes[i][j]: mode i+1 at the control node of floor j+2
+    pattern: list[float]  # Lateral load pattern of pushover analysis (floor mass * 1st mode)
+
+    @property
+    def T1(self) -> float:
+        """Fundamental period (not rounded)"""
+        return 2.0 * pi / self.omega[0]
+
+
+def _strip_comments(obj):
+    """Remove the comment items ("//...") of the model information"""
+    if isinstance(obj, dict):
+        return {key: _strip_comments(value) for key, value in obj.items() if not key.startswith('//')}
+    if isinstance(obj, list):
+        return [_strip_comments(value) for value in obj]
+    return obj
+
+
+def model_data(frame: Frame) -> dict:
+    """Derived data used by the model (section properties, loads, masses and axial
+    compression ratios, see `MODEL_DATA`), which can also be edited after all steps
+    finished, e.g. the masses in examples/Benchmark3S.py"""
+    return {f'{component}.{attr}': getattr(getattr(frame, component), attr)
+            for component, attrs in MODEL_DATA.items() for attr in attrs}
+
+
+def frame_hash(frame: Frame, **options) -> str:
+    """Content hash (sha256) of a frame. The model information is collected again
+    from the frame (instead of the `dict_info` stored when the steps finished), and
+    the derived data used by the model (see `model_data`) are also hashed, so that
+    any change of the model results in a different hash. The frame name,
+    notes and references do not affect the hash.
+
+    Args:
+        frame (Frame): Frame object with all steps finished
+        options: Additional model options affecting the results
+
+    Returns:
+        str: Hexadecimal hash
+    """
+    info = WriteInfo.write_info_to_dict(frame)
+    info = {key: value for key, value in info.items() if key not in _IGNORED}
+    content = {
+        'version': __version__,
+        # the round trip unifies tuples/lists and int/str keys (e.g. after `from_json`)
+        'info': _strip_comments(json.loads(json.dumps(info))),
+        'model_data': json.loads(json.dumps(model_data(frame), default=lambda value: value.tolist())),
+        'user_commands': frame.UserComment.additional_commands_py,
+        'options': options,
+    }
+    text = json.dumps(content, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def compute_modal_properties(frame: Frame, key: str=None) -> ModalProperties:
+    """Run eigen analysis of a frame in the current process (the current
+    OpenSees domain is wiped)
+
+    Args:
+        frame (Frame): Frame object with all steps finished
+        key (str, optional): Content hash of the frame, calculated if not given
+
+    Returns:
+        ModalProperties: Modal properties
+    """
+    import openseespy.opensees as ops
+    from .ModelBuilder import ModelBuilder
+    if key is None:
+        key = frame_hash(frame)
+    builder = ModelBuilder(frame).build(eigen=False, gravity=False)
+    builder.eigen()
+    modes = [[ops.nodeEigenvector(node, i, 1) for node in builder.control_nodes]
+             for i in range(1, frame.N + 1)]
+    pattern = []
+    for FF in range(2, frame.N + 2):
+        mass = sum(frame.LoadAndMaterial.mass_node[FF]) + frame.LoadAndMaterial.mass_grav[FF]
+        pattern.append(float(f'{mass:.3f}') * modes[0][FF - 2])
+    ops.wipe()
+    return ModalProperties(key, list(builder.periods), list(builder.omega), modes, pattern)
+
+
+class ModalCache:
+
+    def __init__(self, folder: str | Path=None):
+        """Persistent cache of modal properties, each frame is stored as
+        "folder/<hash>.json" (see `frame_hash`), so that a changed model is
+        never matched with the results of the old one.
+
+        Args:
+            folder (str | Path, optional): Cache folder. Defaults to `CACHE_DIR`.
+        """
+        self.folder = Path(CACHE_DIR if folder is None else folder)
+        self._memory: dict[str, ModalProperties] = dict()
+
+    def file(self, key: str) -> Path:
+        return self.folder/f'{key}.json'
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or self.file(key).exists()
+
+    def get(self, frame: Frame, refresh: bool=False) -> ModalProperties:
+        """Modal properties of a frame, the eigen analysis is run only if the
+        frame is not cached
+
+        Args:
+            frame (Frame): Frame object with all steps finished
+            refresh (bool, optional): Recompute and overwrite the cached results. Defaults to False.
+
+        Returns:
+            ModalProperties: Modal properties
+        """
+        key = frame_hash(frame)
+        if not refresh:
+            props = self.load(key)
+            if props is not None:
+                return props
+        props = compute_modal_properties(frame, key)
+        self.put(props)
+        return props
+
+    def load(self, key: str) -> ModalProperties | None:
+        """Cached modal properties, None if not found"""
+        if key in self._memory:
+            return self._memory[key]
+        file = self.file(key)
+        if not file.exists():
+            return None
+        with open(file, 'r') as f:
+            data = json.load(f)
+        props = ModalProperties(**{name: data[name] for name in ModalProperties._fields})
+        self._memory[key] = props
+        return props
+
+    def put(self, props: ModalProperties):
+        """Add modal properties into the cache"""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        file = self.file(props.key)
+        temp = file.with_name(file.name + '.tmp')
+        with open(temp, 'w') as f:
+            json.dump({**props._asdict(), 'version': __version__}, f, indent=4)
+        os.replace(temp, file)
+        self._memory[props.key] = props
+
+    def clear(self):
+        """Remove all cached results"""
+        self._memory.clear()
+        if self.folder.exists():
+            for file in self.folder.glob('*.json'):
+                file.unlink()
+
+
+def get_modal_properties(frame: Frame, cache_dir: str | Path=None,
+                         refresh: bool=False) -> ModalProperties:
+    """Modal properties of a frame using the cache of the given folder,
+    see `ModalCache.get`"""
+    folder = Path(CACHE_DIR if cache_dir is None else cache_dir)
+    if folder not in _caches:
+        _caches[folder] = ModalCache(folder)
+    return _caches[folder].get(frame, refresh)
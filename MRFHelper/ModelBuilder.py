@@ -0,0 +1,388 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import openseespy.opensees as ops
+from math import pi
+from subroutines.BeamHinge import BeamHinge
+from subroutines.ColumnHinge import ColumnHinge
+from subroutines.PanelZone import PanelZone
+from subroutines.Spring_Zero import Spring_Zero
+from subroutines.Spring_Rigid import Spring_Rigid
+from .WriteScript import WriteScript
+from .HingeParameters import PARAMETERS
+
+
+"""
+Build the OpenSees model of a frame in the current process without generating scripts.
+The model is identical to that defined by the openseespy script generated by `WriteScript`,
+including the node and element IDs and the rounding of the written parameters.
+Writen by: Wenchen Lie
+"""
+
+get_id = WriteScript.get_id
+
+
+def _rounded(x: float, digits: int) -> float:
+    """Round a number in the same way as it is written into the script
+    (`round` of numpy floats may differ in the last digit)"""
+    return float(f'{x:.{digits}f}')
+
+
+class ModelBuilder:
+    def __init__(self, frame: Frame) -> None:
+        """Build the OpenSees model of a frame using openseespy commands directly
+
+        Args:
+            frame (Frame): Frame object with all steps finished
+        """
+        self.frame = frame
+        self.n = 10.
+        self.A_Stiff = 1.e8
+        self.I_Stiff = 1.e13
+        self.nodes: set[int] = set()
+        self.control_nodes: list[int] = []
+        self.periods: list[float] = []
+        self.mode_list: list[float] = []
+
+    def build(self, eigen: bool=True, gravity: bool=True):
+        """Build the model, then run eigen analysis and static gravity analysis
+        in the same sequence as the generated script
+
+        Args:
+            eigen (bool, optional): Whether to run eigen analysis. Defaults to True.
+            gravity (bool, optional): Whether to run static gravity analysis. Defaults to True.
+        """
+        self.build_basic()
+        self.build_nodes()
+        self.build_elements()
+        self.build_constraint()
+        self.build_mass()
+        self.build_user_commands()
+        if eigen:
+            self.eigen()
+        if gravity:
+            self.gravity()
+        return self
+
+    def build_basic(self):
+        frame = self.frame
+        ops.wipe()
+        ops.model("basic", "-ndm", 2, "-ndf", 3)
+        self.E = _rounded(frame.LoadAndMaterial.E, 2)
+        self.mu = frame.LoadAndMaterial.miu
+        self.fy_beam = _rounded(frame.LoadAndMaterial.fy_beam, 2)
+        self.fy_column = _rounded(frame.LoadAndMaterial.fy_column, 2)
+        ops.uniaxialMaterial("Elastic", 9, 1.e-9)
+        ops.uniaxialMaterial("Elastic", 99, 1.e12)
+        ops.geomTransf("Linear", 1)
+        ops.geomTransf("PDelta", 2)
+        ops.geomTransf("Corotational", 3)
+        # Building geometry (Floor[FF], Axis[AA], index 0 is not used)
+        self.Floor = [0.0, 0.0]
+        for floor in range(2, frame.N + 2):
+            self.Floor.append(float(sum(frame.BuildingGeometry.story_height[:floor-1])))
+        self.Axis = [0.0, 0.0]
+        d = 0
+        for l_bay in frame.BuildingGeometry.bay_length:
+            d += l_bay
+            self.Axis.append(float(d))
+        self.Axis.append(float(d + l_bay))
+
+    def _node(self, Id: int, x: float, y: float):
+        ops.node(Id, x, y)
+        self.nodes.add(Id)
+
+    def _beam_depth(self, FF: int, AA: int) -> float:
+        """Beam depth at a beam-column joint (average of the left and right beams)"""
+        beam_properties = self.frame.StructuralComponents.beam_properties
+        if AA == 1:
+            return beam_properties[FF][0][1]
+        elif AA == self.frame.axis:
+            return beam_properties[FF][-1][1]
+        else:
+            return (beam_properties[FF][AA-2][1] + beam_properties[FF][AA-1][1]) / 2
+
+    def _column_at_floor(self, SS_b: int) -> int:
+        """Story whose column section is used at the top of story `SS_b`"""
+        if SS_b in self.frame.StructuralComponents.column_splice:
+            return SS_b + 1
+        return SS_b
+
+    def build_nodes(self):
+        frame = self.frame
+        Floor, Axis = self.Floor, self.Axis
+        SC = frame.StructuralComponents
+        # Support nodes
+        for AA in range(1, frame.axis + 2):
+            self._node(get_id(10, 1, AA, 0), Axis[AA], Floor[1])
+        # Leaning column grid nodes
+        AA = frame.axis + 1
+        for FF in range(2, frame.N + 2):
+            self._node(get_id(10, FF, AA, 0), Axis[AA], Floor[FF])
+        # Leaning column connected nodes
+        for FF in range(2, frame.N + 2):
+            self._node(get_id(10, FF, AA, 2), Axis[AA], Floor[FF])
+            if FF != frame.N + 1:
+                self._node(get_id(10, FF, AA, 1), Axis[AA], Floor[FF])
+        # Moment frame column nodes
+        for AA in range(1, frame.axis + 1):
+            self._node(get_id(10, 1, AA, 1), Axis[AA], Floor[1])
+        for FF in range(2, frame.N + 2):
+            for AA in range(1, frame.axis + 1):
+                beam_h = _rounded(self._beam_depth(FF, AA), 2)
+                self._node(get_id(10, FF, AA, 2), Axis[AA], Floor[FF] - beam_h/2)
+            if FF == frame.N + 1:
+                break
+            for AA in range(1, frame.axis + 1):
+                beam_h = _rounded(self._beam_depth(FF, AA), 2)
+                self._node(get_id(10, FF, AA, 1), Axis[AA], Floor[FF] + beam_h/2)
+        # Moment frame beam nodes
+        for FF in range(2, frame.N + 2):
+            SS = self._column_at_floor(FF - 1)
+            for BB in range(1, frame.bays + 1):
+                hinge_offset_l = SC.column_properties[SS][BB-1][1]/2 + SC.RBS_length[FF][(BB-1)*2]
+                hinge_offset_r = SC.column_properties[SS][BB][1]/2 + SC.RBS_length[FF][(BB-1)*2+1]
+                self._node(get_id(10, FF, BB, 4), Axis[BB] + _rounded(hinge_offset_l, 2), Floor[FF])
+                self._node(get_id(10, FF, BB+1, 5), Axis[BB+1] - _rounded(hinge_offset_r, 2), Floor[FF])
+        # Beam spring nodes
+        for FF in range(2, frame.N + 2):
+            SS = self._column_at_floor(FF - 1)
+            for BB in range(1, frame.bays + 1):
+                RBS_length_l = SC.RBS_length[FF][(BB-1)*2]
+                RBS_length_r = SC.RBS_length[FF][(BB-1)*2+1]
+                hinge_offset_l = SC.column_properties[SS][BB-1][1]/2 + RBS_length_l
+                hinge_offset_r = SC.column_properties[SS][BB][1]/2 + RBS_length_r
+                if RBS_length_l != 0:
+                    self._node(get_id(10, FF, BB, 3), Axis[BB] + _rounded(hinge_offset_l, 2), Floor[FF])
+                if RBS_length_r != 0:
+                    self._node(get_id(10, FF, BB+1, 6), Axis[BB+1] - _rounded(hinge_offset_r, 2), Floor[FF])
+        # Column splice nodes
+        for SS in range(1, frame.N + 1):
+            if SS in SC.column_splice:
+                story_height = _rounded(frame.BuildingGeometry.story_height[SS - 1], 2)
+                for AA in range(1, frame.axis + 1):
+                    self._node(get_id(10, SS, AA, 7), Axis[AA], Floor[SS] + 0.5 * story_height)
+        # Beam splice nodes
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                if BB in SC.beam_splice:
+                    bay_length = _rounded(frame.BuildingGeometry.bay_length[BB - 1], 2)
+                    self._node(get_id(10, FF, BB, 8), Axis[BB] + bay_length / 2, Floor[FF])
+
+    def build_elements(self):
+        frame = self.frame
+        SC = frame.StructuralComponents
+        E, n = self.E, self.n
+        A_Stiff, I_Stiff = self.A_Stiff, self.I_Stiff
+        # Column elements
+        for SS in range(1, frame.N + 1):
+            props = SC.column_properties[SS]
+            if SS not in SC.column_splice:
+                for AA in range(1, frame.axis + 1):
+                    A, I = _rounded(props[AA-1][5], 2), _rounded(props[AA-1][6], 2)
+                    ops.element("elasticBeamColumn", get_id(10, SS, AA, 1), get_id(10, SS, AA, 1),
+                                get_id(10, SS + 1, AA, 2), A, E, (n+1)/n*I, 2)
+            else:
+                for AA in range(1, frame.axis + 1):
+                    A, I = _rounded(props[AA-1][5], 2), _rounded(props[AA-1][6], 2)
+                    ops.element("elasticBeamColumn", get_id(10, SS, AA, 2), get_id(10, SS, AA, 1),
+                                get_id(10, SS, AA, 7), A, E, (n+1)/n*I, 2)
+                for AA in range(1, frame.axis + 1):
+                    A = _rounded(SC.column_properties[SS+1][AA-1][5], 2)
+                    I = _rounded(SC.column_properties[SS+1][AA-1][6], 2)
+                    ops.element("elasticBeamColumn", get_id(10, SS, AA, 3), get_id(10, SS, AA, 7),
+                                get_id(10, SS + 1, AA, 2), A, E, (n+1)/n*I, 2)
+        # Beam elements
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                A = _rounded(SC.beam_properties[FF][BB-1][5], 2)
+                I = _rounded(SC.beam_properties[FF][BB-1][6], 2)
+                inode = get_id(10, FF, BB, 4)
+                jnode = get_id(10, FF, BB + 1, 5)
+                if get_id(10, FF, BB, 8) in self.nodes:
+                    midnode = get_id(10, FF, BB, 8)
+                    ops.element("elasticBeamColumn", get_id(10, FF, BB, 11), inode, midnode, A, E, (n+1)/n*I, 2)
+                    ops.element("elasticBeamColumn", get_id(10, FF, BB, 12), midnode, jnode, A, E, (n+1)/n*I, 2)
+                else:
+                    ops.element("elasticBeamColumn", get_id(10, FF, BB, 4), inode, jnode, A, E, (n+1)/n*I, 2)
+        # Panel zones
+        type_ = 1 if frame.ConnectionAndBoundary.panel_zone_deformation else 2
+        for FF in range(2, frame.N + 2):
+            SS = self._column_at_floor(FF - 1)
+            for AA in range(1, frame.axis + 1):
+                if AA == 1 and FF == frame.N + 1:
+                    position = 'LT'
+                elif AA == frame.axis and FF == frame.N + 1:
+                    position = 'RT'
+                elif AA == 1 and FF < frame.N + 1:
+                    position = 'L'
+                elif AA == frame.axis and FF < frame.N + 1:
+                    position = 'R'
+                elif 1<AA<frame.axis and FF == frame.N + 1:
+                    position = 'T'
+                else:
+                    position = 'I'
+                bf_col, d_col, _, tf_col = SC.column_properties[SS][AA-1][:4]
+                d_beam = self._beam_depth(FF, AA)
+                tp = SC.pz_thickness[FF][AA-1]
+                PanelZone(FF, AA, self.Axis[AA], self.Floor[FF], E, self.mu, self.fy_column, A_Stiff, I_Stiff,
+                          _rounded(d_col, 2), _rounded(d_beam, 2), _rounded(tp, 2), _rounded(tf_col, 2), _rounded(bf_col, 2),
+                          2, type_, position)
+        # RBS elements
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                A = _rounded(SC.beam_properties[FF][BB-1][5], 2)
+                I = _rounded(SC.beam_properties[FF][BB-1][6], 2)
+                if get_id(10, FF, BB, 3) in self.nodes:
+                    ops.element("elasticBeamColumn", get_id(10, FF, BB, 5), get_id(11, FF, BB, 4),
+                                get_id(10, FF, BB, 3), A, E, I, 2)
+                if get_id(10, FF, BB + 1, 6) in self.nodes:
+                    ops.element("elasticBeamColumn", get_id(10, FF, BB, 6), get_id(10, FF, BB + 1, 6),
+                                get_id(11, FF, BB + 1, 2), A, E, I, 2)
+        # Beam hinges (parameters of all hinges are calculated at once)
+        hinges = frame.hinge_table
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                AA_l, AA_r = BB, BB + 1
+                inputs, params = hinges.beam(FF, BB)
+                paras = (*[params[key] for key in PARAMETERS], inputs['type_'])
+                # left hinge
+                if get_id(10, FF, AA_l, 3) in self.nodes:
+                    inode = get_id(10, FF, AA_l, 3)
+                else:
+                    inode = get_id(11, FF, AA_l, 4)
+                BeamHinge(get_id(10, FF, AA_l, 9), inode, get_id(10, FF, AA_l, 4), *paras)
+                # right hinge
+                if get_id(10, FF, AA_r, 6) in self.nodes:
+                    jnode = get_id(10, FF, AA_r, 6)
+                else:
+                    jnode = get_id(11, FF, AA_r, 2)
+                BeamHinge(get_id(10, FF, AA_r, 10), get_id(10, FF, AA_r, 5), jnode, *paras)
+        # Column hinges
+        for SS in range(1, frame.N + 1):
+            hinges_b, hinges_t = [], []
+            FF_b, FF_t = SS, SS + 1
+            for AA in range(1, frame.axis + 1):
+                inputs_b, params_b = hinges.column(SS, AA, 'b')
+                inputs_t, params_t = hinges.column(SS, AA, 't')
+                if SS == 1:
+                    inode_b = get_id(10, FF_b, AA, 0)
+                else:
+                    inode_b = get_id(11, FF_b, AA, 3)
+                hinges_b.append((get_id(10, FF_b, AA, 7), inode_b, get_id(10, FF_b, AA, 1),
+                                 *[params_b[key] for key in PARAMETERS], inputs_b['type_']))
+                hinges_t.append((get_id(10, FF_t, AA, 8), get_id(10, FF_t, AA, 2), get_id(11, FF_t, AA, 1),
+                                 *[params_t[key] for key in PARAMETERS], inputs_t['type_']))
+            for paras in hinges_b + hinges_t:
+                ColumnHinge(*paras)
+        # Rigid links
+        for FF in range(2, frame.N + 2):
+            ops.element("truss", get_id(10, FF, frame.axis, 4), get_id(11, FF, frame.axis, 4),
+                        get_id(10, FF, frame.axis + 1, 0), A_Stiff, 99)
+        # Leaning column
+        AA = frame.axis + 1
+        for SS in range(1, frame.N + 1):
+            if SS == 1:
+                inode = get_id(10, SS, AA, 0)
+            else:
+                inode = get_id(10, SS, AA, 1)
+            ops.element("elasticBeamColumn", get_id(10, SS, AA, 1), inode, get_id(10, SS + 1, AA, 2),
+                        A_Stiff, E, I_Stiff, 2)
+        # Leaning column hinges
+        for FF in range(2, frame.N + 2):
+            Spring_Rigid(get_id(10, FF, AA, 8), get_id(10, FF, AA, 2), get_id(10, FF, AA, 0))
+            if FF != frame.N + 1:
+                Spring_Zero(get_id(10, FF, AA, 7), get_id(10, FF, AA, 0), get_id(10, FF, AA, 1))
+
+    def build_constraint(self):
+        frame = self.frame
+        CB = frame.ConnectionAndBoundary
+        # Support
+        for AA in range(1, frame.axis + 2):
+            if AA != frame.axis + 1:
+                ops.fix(get_id(10, 1, AA, 0), 1, 1, 1)
+            else:
+                ops.fix(get_id(10, 1, AA, 0), 1, 1, 0)
+        # Soil constraint
+        for AA in [1, frame.axis]:
+            for FF in CB.soil_constraint:
+                if CB.panel_zone_deformation:
+                    Id = get_id(11, FF, AA, 2) if AA == 1 else get_id(11, FF, AA, 4)
+                else:
+                    Id = get_id(11, FF, AA, 0)
+                ops.fix(Id, 1, 0, 0)
+        # Rigid diaphragm
+        AA_master = int((frame.axis + 1) / 2)
+        suffix = 4 if CB.panel_zone_deformation else 0
+        self.control_nodes = []
+        for FF in range(2, frame.N + 2):
+            inode = get_id(11, FF, AA_master, suffix)
+            for AA in range(1, frame.axis + 1):
+                if AA != AA_master and CB.rigid_disphragm:
+                    ops.equalDOF(inode, get_id(11, FF, AA, suffix), 1)
+            self.control_nodes.append(inode)
+
+    def build_mass(self):
+        frame = self.frame
+        suffix = 4 if frame.ConnectionAndBoundary.panel_zone_deformation else 0
+        for FF in range(2, frame.N + 2):
+            for AA in range(1, frame.axis + 1):
+                mass = _rounded(frame.LoadAndMaterial.mass_node[FF][AA-1], 3)
+                ops.mass(get_id(11, FF, AA, suffix), mass, 1.e-9, 1.e-9)
+        for FF in range(2, frame.N + 2):
+            mass = _rounded(frame.LoadAndMaterial.mass_grav[FF], 3)
+            ops.mass(get_id(10, FF, frame.axis + 1, 0), mass, 1.e-9, 1.e-9)
+
+    def build_user_commands(self):
+        """Execute the additional openseespy commands added via `Frame.UserComment`,
+        the variables defined in the generated script are available"""
+        commands = self.frame.UserComment.additional_commands_py
+        if not commands:
+            return
+        namespace = {
+            'ops': ops, 'BeamHinge': BeamHinge, 'ColumnHinge': ColumnHinge, 'PanelZone': PanelZone,
+            'Spring_Zero': Spring_Zero, 'Spring_Rigid': Spring_Rigid, 'pi': pi,
+            'NStory': self.frame.N, 'NBay': self.frame.bays, 'E': self.E, 'mu': self.mu,
+            'fy_beam': self.fy_beam, 'fy_column': self.fy_column, 'A_Stiff': self.A_Stiff,
+            'I_Stiff': self.I_Stiff, 'n': self.n, 'g': 9810.0,
+        }
+        for FF in range(1, self.frame.N + 2):
+            namespace[f'Floor{FF}'] = self.Floor[FF]
+        for AA in range(1, self.frame.axis + 2):
+            namespace[f'Axis{AA}'] = self.Axis[AA]
+        for command in commands:
+            exec(list(command.values())[0], namespace)
+
+    def eigen(self) -> list[float]:
+        """Eigen analysis, returns the periods and stores the first mode
+        shape at the control nodes in `mode_list`"""
+        N = self.frame.N
+        lambdaN = ops.eigen(N)
+        self.omega = [pow(lambda_, 0.5) for lambda_ in lambdaN]
+        self.periods = [round(2.0*pi/w, 3) for w in self.omega]
+        self.mode_list = [ops.nodeEigenvector(node, 1, 1) for node in self.control_nodes]
+        return self.periods
+
+    def gravity(self):
+        """Static gravity analysis"""
+        frame = self.frame
+        ops.timeSeries("Linear", 100)
+        ops.pattern("Plain", 100, 100)
+        for FF in range(2, frame.N + 2):
+            for AA in range(1, frame.axis + 1):
+                load = _rounded(-frame.LoadAndMaterial.F_node[FF][AA-1], 1)
+                ops.load(get_id(11, FF, AA, 1), 0., load, 0.)
+        for FF in range(2, frame.N + 2):
+            load = _rounded(-frame.LoadAndMaterial.F_grav[FF], 1)
+            ops.load(get_id(10, FF, frame.axis + 1, 0), 0., load, 0.)
+        ops.wipeAnalysis()
+        ops.constraints("Plain")
+        ops.numberer("RCM")
+        ops.system("UmfPack")
+        ops.test("NormDispIncr", 1.0e-5, 60)
+        ops.algorithm("Newton")
+        ops.integrator("LoadControl", 0.1)
+        ops.analysis("Static")
+        ops.analyze(10)
+        ops.loadConst("-time", 0.0)
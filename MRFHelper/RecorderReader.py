@@ -0,0 +1,65 @@
+import json
+import numpy as np
+from pathlib import Path
+
+
+"""
+Read the binary recorder output of the scripts generated with `recorder_format="binary"`
+Writen by: Wenchen Lie
+"""
+
+def read_binary(file: str | Path, ncols: int) -> np.ndarray:
+    """Read a binary recorder file written by OpenSees ("-binary" option),
+    each row consists of `ncols` doubles followed by a newline byte.
+    An incomplete last row (e.g. the analysis was interrupted) is ignored.
+
+    Args:
+        file (str | Path): Binary file
+        ncols (int): Number of columns (including the time column)
+
+    Returns:
+        np.ndarray: Recorded data, shape (steps, ncols)
+    """
+    row = np.dtype([('data', '<f8', (ncols,)), ('newline', 'u1')])
+    raw = np.fromfile(file, dtype=np.uint8)
+    n = len(raw) // row.itemsize
+    return raw[:n * row.itemsize].view(row)['data'].copy()
+
+
+def read_recorders(folder: str | Path, layout: str | Path | dict,
+                   names: list[str]=None) -> dict[str, np.ndarray]:
+    """Read the results of binary recorders and map the columns back to the
+    response names of the text recorders, e.g. "SDR1", "Shear2_3", "BeamSpring3_2L".
+
+    Args:
+        folder (str | Path): Result folder of a ground motion (MainFolder/SubFolder)
+        layout (str | Path | dict): Layout file ("frame_name_recorders.json" in the output
+        folder of `generate_tcl_script`) or the loaded layout
+        names (list[str], optional): Names of responses to be read, defaults to all.
+        Files without requested responses are not read.
+
+    Returns:
+        dict[str, np.ndarray]: {name: data}, "Time" (steps,) and each response (steps, ncols)
+    """
+    folder = Path(folder)
+    if not isinstance(layout, dict):
+        with open(layout, 'r') as f:
+            layout = json.load(f)
+    names = None if names is None else set(names)
+    results = dict()
+    for group in layout['groups']:
+        items = group['items']
+        if names is not None and not any(name in names for name, _ in items):
+            continue
+        file = folder/group['file']
+        if not file.exists():
+            continue
+        start = 1 if group['time'] else 0
+        data = read_binary(file, start + sum(ncols for _, ncols in items))
+        if group['time'] and 'Time' not in results:
+            results['Time'] = data[:, 0]
+        for name, ncols in items:
+            if names is None or name in names:
+                results[name] = data[:, start: start + ncols]
+            start += ncols
+    return results
@@ -0,0 +1,171 @@
+import io
+import zipfile
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from .RecorderReader import read_recorders
+
+
+"""
+Collect the results of time history analyses into a single appendable NPZ file
+Writen by: Wenchen Lie
+"""
+
+def read_text(file: str | Path) -> np.ndarray:
+    """Read a text result file (whitespace separated numbers) into a 2D array.
+    An incomplete last row (e.g. the analysis was interrupted) is ignored.
+
+    Args:
+        file (str | Path): Text file, e.g. "SDR1.out"
+
+    Returns:
+        np.ndarray: Data, shape (rows, columns)
+    """
+    with open(file, 'rb') as f:
+        text = f.read()
+    first_line = text.split(b'\n', 1)[0]
+    ncols = len(first_line.split())
+    if ncols == 0:
+        return np.zeros((0, 0))
+    data = np.array(text.split(), dtype=float)
+    nrows = len(data) // ncols
+    return data[:nrows * ncols].reshape(nrows, ncols)
+
+
+def load_run(folder: str | Path, layout: str | Path | dict=None,
+             names: list[str]=None) -> dict[str, np.ndarray]:
+    """Load all results of a run directory (MainFolder/SubFolder)
+
+    Args:
+        folder (str | Path): Result folder of a ground motion
+        layout (str | Path | dict, optional): Layout of binary recorders, see
+        `RecorderReader.read_recorders`. Text files ("*.out" and "*.dat") are always read.
+        names (list[str], optional): Names of channels to be loaded (file stems of text
+        results, e.g. "SDR1", "RFA2"), defaults to all
+
+    Returns:
+        dict[str, np.ndarray]: {channel name: data}
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        raise FileNotFoundError(f'Result folder not found: {folder}')
+    files = sorted(list(folder.glob('*.out')) + list(folder.glob('*.dat')))
+    if names is not None:
+        files = [file for file in files if file.stem in names]
+    results = dict()
+    if layout is not None:
+        results.update(read_recorders(folder, layout, names))
+    for file in files:
+        results[file.stem] = read_text(file)
+    return results
+
+
+class ResultsStore:
+
+    def __init__(self, file: str | Path, compress: bool=False):
+        """A single NPZ file that stores the results of many records. Each channel of
+        each record is stored as an array named "record/channel", new records are
+        appended without rewriting the existing data.
+
+        Args:
+            file (str | Path): NPZ file, created if not exists
+            compress (bool, optional): Whether to compress the appended arrays. Defaults to False.
+        """
+        self.file = Path(file)
+        self.compress = compress
+        self._index: dict[str, list[str]] = dict()  # {record: [channel, ...]}
+        if self.file.exists():
+            with zipfile.ZipFile(self.file, 'r') as zf:
+                for name in zf.namelist():
+                    record, channel = name[:-len('.npy')].rsplit('/', 1)
+                    self._index.setdefault(record, []).append(channel)
+
+    @property
+    def records(self) -> list[str]:
+        return list(self._index.keys())
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, record: str) -> bool:
+        return record in self._index
+
+    def channels(self, record: str) -> list[str]:
+        """Channel names of a record"""
+        return list(self._index[record])
+
+    def add(self, record: str, data: dict[str, np.ndarray]):
+        """Append the results of a record
+
+        Args:
+            record (str): Name of the record, e.g. "GM1_SF2"
+            data (dict[str, np.ndarray]): {channel name: data}
+        """
+        if record in self._index:
+            raise ValueError(f'Record "{record}" already exists in {self.file.name}')
+        compression = zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(self.file, 'a', compression=compression, allowZip64=True) as zf:
+            for channel, array in data.items():
+                buffer = io.BytesIO()
+                np.lib.format.write_array(buffer, np.asarray(array), allow_pickle=False)
+                zf.writestr(f'{record}/{channel}.npy', buffer.getvalue())
+        self._index[record] = list(data.keys())
+
+    def add_run(self, record: str, folder: str | Path, layout: str | Path | dict=None,
+                names: list[str]=None) -> dict[str, np.ndarray]:
+        """Load a run directory by `load_run` and append it as a record"""
+        data = load_run(folder, layout, names)
+        self.add(record, data)
+        return data
+
+    def add_runs(self, folders: dict[str, str | Path], layout: str | Path | dict=None,
+                 names: list[str]=None, workers: int=1, skip_existing: bool=True):
+        """Append many run directories
+
+        Args:
+            folders (dict[str, str | Path]): {record: folder}
+            layout (str | Path | dict, optional): Layout of binary recorders
+            names (list[str], optional): Names of channels to be loaded, defaults to all
+            workers (int, optional): Number of processes parsing the directories in parallel,
+            the records are appended by the current process in the given order. Defaults to 1.
+            skip_existing (bool, optional): Skip records already in the store. Defaults to True.
+        """
+        folders = {record: folder for record, folder in folders.items()
+                   if not (skip_existing and record in self._index)}
+        n = len(folders)
+        if workers == 1:
+            for i, (record, folder) in enumerate(folders.items()):
+                self.add_run(record, folder, layout, names)
+                print(f'[{i + 1}/{n}] {record}')
+            return
+        with ProcessPoolExecutor(workers) as executor:
+            results = executor.map(load_run, folders.values(), [layout] * n, [names] * n,
+                                   chunksize=max(1, min(16, n // (4 * workers))))
+            for i, (record, data) in enumerate(zip(folders.keys(), results)):
+                self.add(record, data)
+                print(f'[{i + 1}/{n}] {record}')
+
+    def load(self, record: str, names: list[str]=None) -> dict[str, np.ndarray]:
+        """Load the channels of a record"""
+        if record not in self._index:
+            raise KeyError(f'Record "{record}" not found in {self.file.name}')
+        names = self._index[record] if names is None else names
+        with zipfile.ZipFile(self.file, 'r') as zf:
+            return {name: self._read(zf, record, name) for name in names}
+
+    def channel(self, name: str, records: list[str]=None) -> dict[str, np.ndarray]:
+        """Load a channel of many records, {record: data}"""
+        records = self.records if records is None else records
+        with zipfile.ZipFile(self.file, 'r') as zf:
+            return {record: self._read(zf, record, name) for record in records
+                    if name in self._index[record]}
+
+    def peak(self, name: str, records: list[str]=None) -> dict[str, np.ndarray]:
+        """Peak absolute values of each column of a channel, {record: peaks}"""
+        return {record: np.abs(data).max(axis=0) if data.size else data
+                for record, data in self.channel(name, records).items()}
+
+    @staticmethod
+    def _read(zf: zipfile.ZipFile, record: str, name: str) -> np.ndarray:
+        with zf.open(f'{record}/{name}.npy') as f:
+            return np.lib.format.read_array(io.BytesIO(f.read()), allow_pickle=False)
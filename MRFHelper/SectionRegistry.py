@@ -0,0 +1,102 @@
+import numpy as np
+
+
+"""
+Cached lookup of steel section properties
+Writen by: Wenchen Lie
+"""
+
+#              0     1     2     3     4     5     6     7     8
+PROPERTIES = ('bf', 'd', 'tw', 'tf', 'ry', 'A', 'Ix', 'My', 'h')
+
+
+class SectionRegistry:
+
+    def __init__(self, chunk: int=64):
+        """Registry of section properties keyed by (designation, fy). Each section is
+        resolved by `wsection` only once, its nine properties (`PROPERTIES`) are stored
+        as a row of a compact array table.
+
+        Args:
+            chunk (int, optional): Number of rows allocated at once. Defaults to 64.
+        """
+        self.chunk = chunk
+        self.table = np.zeros((chunk, len(PROPERTIES)))
+        self.index: dict[tuple[str, float], int] = dict()  # {(designation, fy): row}
+        self.n = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __contains__(self, key: tuple[str, float]) -> bool:
+        return key in self.index
+
+    def _resolve(self, section: str, fy: float, member: str='') -> int:
+        """Resolve a section by `wsection` and add it into the table"""
+        from wsection import WSection, GBSection
+        if section.startswith(('W', 'w')):
+            prop = WSection(section, fy)
+        elif section.startswith(('HW', 'HM', 'HN')):
+            prop = GBSection(section, fy)
+        else:
+            member = f'{member} ' if member else ''
+            raise ValueError(f'Invalid {member}section: {section}')
+        if self.n == len(self.table):
+            self.table = np.vstack((self.table, np.zeros((self.chunk, len(PROPERTIES)))))
+        self.table[self.n] = [getattr(prop, name) for name in PROPERTIES]
+        self.index[(section, fy)] = self.n
+        self.n += 1
+        return self.n - 1
+
+    def rows(self, sections: list[str], fy: float, member: str='') -> np.ndarray:
+        """Row numbers of sections in the table, unknown sections are resolved first"""
+        rows = np.empty(len(sections), dtype=int)
+        for i, section in enumerate(sections):
+            row = self.index.get((section, fy))
+            if row is None:
+                row = self._resolve(section, fy, member)
+            rows[i] = row
+        return rows
+
+    def get(self, section: str, fy: float) -> np.ndarray:
+        """Properties of a section, see `PROPERTIES`"""
+        row = self.rows([section], fy)[0]  # the table may be enlarged when resolving
+        return self.table[row].copy()
+
+    def lookup(self, sections: list[str], fy: float, member: str='') -> np.ndarray:
+        """Properties of a list of sections, shape (len(sections), 9)"""
+        rows = self.rows(sections, fy, member)  # the table may be enlarged when resolving
+        return self.table[rows]
+
+    def lookup_members(self, members: dict[int, list[str]], fy: float,
+                       member: str='') -> dict[int, list[list[float]]]:
+        """Properties of all members of a frame, e.g. {floor: [section, ...]} is
+        converted into {floor: [[bf, d, ...], ...]}"""
+        keys = list(members.keys())
+        sections = [section for key in keys for section in members[key]]
+        table = self.lookup(sections, fy, member)
+        props, i = dict(), 0
+        for key in keys:
+            n = len(members[key])
+            props[key] = [list(row) for row in table[i: i + n]]
+            i += n
+        return props
+
+    def get_state(self) -> tuple[np.ndarray, dict[tuple[str, float], int]]:
+        """Resolved sections, which can be passed to another process (see `set_state`)"""
+        return self.table[:self.n].copy(), dict(self.index)
+
+    def set_state(self, state: tuple[np.ndarray, dict[tuple[str, float], int]]):
+        """Restore the resolved sections returned by `get_state`"""
+        table, index = state
+        self.table = np.vstack((table, np.zeros((self.chunk, len(PROPERTIES)))))
+        self.index = dict(index)
+        self.n = len(table)
+
+    def clear(self):
+        self.table = np.zeros((self.chunk, len(PROPERTIES)))
+        self.index.clear()
+        self.n = 0
+
+
+SECTIONS = SectionRegistry()  # registry shared by all frames
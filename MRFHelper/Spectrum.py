@@ -0,0 +1,149 @@
+from __future__ import annotations
+import numpy as np
+
+
+"""
+Elastic response spectra of ground motion suites and scaling of records
+to a target intensity
+Writen by: Wenchen Lie
+
+Reference:
+[1] Chopra AK. Dynamics of structures (Table 5.2.1, recurrence formulas for
+    piecewise linear excitation).
+"""
+
+SCALING_METHODS = ('Sa(T1)', 'Sa_avg', 'spectrum')
+
+
+def _coefficients(periods: np.ndarray, dt: float, zeta: float) -> tuple[np.ndarray, ...]:
+    """Coefficients of the exact recurrence of a unit-mass SDOF system under
+    piecewise linear excitation, each is an array of the periods"""
+    w = 2 * np.pi / periods
+    k = w**2
+    sq = np.sqrt(1 - zeta**2)
+    wD = w * sq
+    e = np.exp(-zeta * w * dt)
+    s = np.sin(wD * dt)
+    c = np.cos(wD * dt)
+    A = e * (zeta / sq * s + c)
+    B = e * s / wD
+    C = (2 * zeta / (w * dt) + e * (((1 - 2 * zeta**2) / (wD * dt) - zeta / sq) * s
+                                    - (1 + 2 * zeta / (w * dt)) * c)) / k
+    D = (1 - 2 * zeta / (w * dt) + e * ((2 * zeta**2 - 1) / (wD * dt) * s + 2 * zeta / (w * dt) * c)) / k
+    A_ = -e * w / sq * s
+    B_ = e * (c - zeta / sq * s)
+    C_ = (-1 / dt + e * ((w / sq + zeta / (dt * sq)) * s + c / dt)) / k
+    D_ = (1 - e * (zeta / sq * s + c)) / (k * dt)
+    return A, B, C, D, A_, B_, C_, D_
+
+
+def _spectrum_same_dt(records: list[np.ndarray], dt: float, periods: np.ndarray,
+                      zeta: float) -> np.ndarray:
+    """Pseudo-acceleration spectra of records with the same time step"""
+    npts = np.array([len(acc) for acc in records])
+    acc = np.zeros((len(records), npts.max()))
+    for i, record in enumerate(records):
+        acc[i, :npts[i]] = record
+    Sa = np.zeros((len(records), len(periods)))
+    positive = periods > 0
+    Sa[:, ~positive] = np.abs(acc).max(axis=1)[:, None]  # T = 0: peak ground acceleration
+    if not positive.any():
+        return Sa
+    T = periods[positive]
+    A, B, C, D, A_, B_, C_, D_ = _coefficients(T, dt, zeta)
+    u = np.zeros((len(records), len(T)))
+    v = np.zeros_like(u)
+    peak = np.zeros_like(u)
+    temp = np.empty_like(u)
+    p = -acc  # excitation of unit mass
+    for i in range(npts.max() - 1):
+        p0, p1 = p[:, i, None], p[:, i + 1, None]
+        temp[:] = A_ * u + B_ * v + C_ * p0 + D_ * p1  # velocity of the next step
+        u *= A
+        u += B * v + C * p0 + D * p1
+        v, temp = temp, v
+        np.maximum(peak, np.abs(u), out=peak, where=(i + 1 < npts)[:, None])
+    Sa[:, positive] = peak * (2 * np.pi / T)**2
+    return Sa
+
+
+def response_spectrum(records: list[np.ndarray] | np.ndarray, dt: float | list[float],
+                      periods: list[float] | np.ndarray, zeta: float=0.05,
+                      chunk: int=256) -> np.ndarray:
+    """Elastic pseudo-acceleration response spectra of a suite of records. All records
+    (with the same time step) and all periods are solved at once by vectorized recurrence
+    formulas, only the time steps are looped.
+
+    Args:
+        records (list[np.ndarray] | np.ndarray): Acceleration of records (lengths can differ),
+        or a single record
+        dt (float | list[float]): Time step(s)
+        periods (list[float] | np.ndarray): Periods, Sa(0) is the peak ground acceleration
+        zeta (float, optional): Damping ratio. Defaults to 0.05.
+        chunk (int, optional): Maximum number of records solved together. Defaults to 256.
+
+    Returns:
+        np.ndarray: Spectra with the same unit as the records, shape (n_records, n_periods),
+        or (n_periods,) for a single record
+    """
+    single = isinstance(records, np.ndarray) and records.ndim == 1
+    if single:
+        records = [records]
+    periods = np.atleast_1d(np.asarray(periods, dtype=float))
+    if (periods < 0).any():
+        raise ValueError('Periods should not be negative')
+    if not 0 <= zeta < 1:
+        raise ValueError(f'Invalid damping ratio: {zeta}')
+    dts = np.broadcast_to(np.asarray(dt, dtype=float), (len(records),))
+    Sa = np.zeros((len(records), len(periods)))
+    for dt_i in np.unique(dts):
+        idx = np.flatnonzero(dts == dt_i)
+        idx = idx[np.argsort([len(records[i]) for i in idx])]  # similar lengths in a chunk
+        for start in range(0, len(idx), chunk):
+            rows = idx[start: start + chunk]
+            Sa[rows] = _spectrum_same_dt([records[i] for i in rows], dt_i, periods, zeta)
+    return Sa[0] if single else Sa
+
+
+def scale_factors(records: list[np.ndarray], dt: float | list[float], method: str,
+                  target: float | list[float], T1: float=None,
+                  period_range: tuple[float, float]=(0.2, 3.0), n_periods: int=10,
+                  periods: list[float]=None, zeta: float=0.05) -> np.ndarray:
+    """Scale factors of records to a target intensity
+
+    Args:
+        records (list[np.ndarray]): Acceleration of records
+        dt (float | list[float]): Time step(s)
+        method (str): Scaling method:
+        * "Sa(T1)" - Spectral acceleration at the fundamental period equals `target`
+        * "Sa_avg" - Geometric mean of spectral accelerations at `n_periods` periods evenly
+        spaced (in log scale) over `period_range` (ratios of `T1`) equals `target`
+        * "spectrum" - Least squares fit (in log scale) of the spectrum to the target
+        spectrum (`target`) at `periods`
+        target (float | list[float]): Target intensity (same unit as the records), or target
+        spectrum for "spectrum"
+        T1 (float, optional): Fundamental period, required for "Sa(T1)" and "Sa_avg"
+        period_range (tuple[float, float], optional): Period range of "Sa_avg" in ratios of
+        `T1`. Defaults to (0.2, 3.0).
+        n_periods (int, optional): Number of periods of "Sa_avg". Defaults to 10.
+        periods (list[float], optional): Periods of the target spectrum
+        zeta (float, optional): Damping ratio. Defaults to 0.05.
+
+    Returns:
+        np.ndarray: Scale factors
+    """
+    if method not in SCALING_METHODS:
+        raise ValueError(f'Invalid scaling method: {method}, should be one of {SCALING_METHODS}')
+    if method in ('Sa(T1)', 'Sa_avg') and T1 is None:
+        raise ValueError(f'`T1` is required for scaling method "{method}"')
+    if method == 'Sa(T1)':
+        Sa = response_spectrum(records, dt, [T1], zeta)[:, 0]
+        return target / Sa
+    if method == 'Sa_avg':
+        T = T1 * np.geomspace(period_range[0], period_range[1], n_periods)
+        Sa = response_spectrum(records, dt, T, zeta)
+        return target / np.exp(np.log(Sa).mean(axis=1))
+    if periods is None or len(periods) != len(np.atleast_1d(target)):
+        raise ValueError('`periods` and `target` spectrum should have the same length')
+    Sa = response_spectrum(records, dt, periods, zeta)
+    return np.exp((np.log(np.asarray(target, dtype=float)) - np.log(Sa)).mean(axis=1))
@@ -3,11 +3,16 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .MRFhelper import Frame
 from typing import Dict
-from wsection import WSection, GBSection
 from . import func
+from .DerivedGraph import LazyAttribute
 
 
 class StructuralComponents:
+    # Derived quantities, see `DerivedGraph`
+    beam_properties = LazyAttribute()
+    column_properties = LazyAttribute()
+    RBS_length = LazyAttribute()
+    pz_thickness = LazyAttribute()
 
     def __init__(self, frame: Frame):
         """Step-2:
@@ -127,40 +132,34 @@ class StructuralComponents:
         * column_properties (dict): {story, [[bf, h, ...], [bf, h, ...], ...(x N)]}
         * RBS_length (dict): {floor: [l1, l2, ...(x 2*bays)]}
         """
+        self._get_beam_properties(frame)
+        self._get_column_properties(frame)
+        self._get_RBS_length(frame)
+
+    def _get_beam_properties(self, frame: Frame, floors: set[int]=None):
+        """Get beam properties ([bf, d, tw, tf, ry, A, Ix, My, h] of each beam), only the
+        given floors are updated if `floors` is given"""
+        from .SectionRegistry import SECTIONS
         fy_beam = frame.LoadAndMaterial.fy_beam
-        fy_column = frame.LoadAndMaterial.fy_column
+        if floors is None:
+            self.beam_properties = SECTIONS.lookup_members(self.beams, fy_beam, 'beam')
+        else:
+            beams = {floor: self.beams[floor] for floor in floors}
+            self.beam_properties = {**self.beam_properties, **SECTIONS.lookup_members(beams, fy_beam, 'beam')}
+
+    def _get_column_properties(self, frame: Frame, stories: set[int]=None):
+        """Get column properties, only the given stories are updated if `stories` is given"""
+        from .SectionRegistry import SECTIONS
+        fy_beam = frame.LoadAndMaterial.fy_beam
+        if stories is None:
+            self.column_properties = SECTIONS.lookup_members(self.columns, fy_beam, 'column')
+        else:
+            columns = {story: self.columns[story] for story in stories}
+            self.column_properties = {**self.column_properties, **SECTIONS.lookup_members(columns, fy_beam, 'column')}
+
+    def _get_RBS_length(self, frame: Frame):
         BC_connection = frame.ConnectionAndBoundary.beam_column_connection
         RBS_paras = frame.ConnectionAndBoundary.RBS_paras
-        self.beam_properties = dict()
-        for floor, sections in self.beams.items():
-            props = []
-            for section in sections:
-                if section.startswith(('W', 'w')):
-                    prop = WSection(section, fy_beam)
-                elif section.startswith(('HW', 'HM', 'HN')):
-                    prop = GBSection(section, fy_beam)
-                else:
-                    raise ValueError(f'Invalid beam section: {section}')
-                #                  0        1       2        3        4        5       6        7       8
-                props.append([prop.bf, prop.d, prop.tw, prop.tf, prop.ry, prop.A, prop.Ix, prop.My, prop.h])
-            self.beam_properties[floor] = props
-
-        # column properties
-        self.column_properties = dict()
-        for story, sections in self.columns.items():
-            props = []
-            for section in sections:
-                if section.startswith(('W', 'w')):
-                    prop = WSection(section, fy_beam)
-                elif section.startswith(('HW', 'HM', 'HN')):
-                    prop = GBSection(section, fy_beam)
-                else:
-                    raise ValueError(f'Invalid beam section: {section}')
-                #                  0        1       2        3        4        5       6        7       8
-                props.append([prop.bf, prop.d, prop.tw, prop.tf, prop.ry, prop.A, prop.Ix, prop.My, prop.h])
-            self.column_properties[story] = props
-
-        # RBS length
         self.RBS_length = dict()
         for floor in range(2, self.N + 2):
             if self.RBS_length_all:
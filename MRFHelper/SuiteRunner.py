@@ -0,0 +1,315 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .MRFhelper import Frame
+import sys
+import json
+import time
+import importlib.util
+import contextlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+from .GMLibrary import GMLibrary, read_record
+from .Spectrum import scale_factors
+
+
+"""
+Run a suite of ground motions on the openseespy script generated by `WriteScript`
+Writen by: Wenchen Lie
+"""
+
+SUBROUTINES_DIR = Path(__file__).parent.parent  # folder that contains `subroutines`
+_module = None  # generated openseespy module of the current process
+_library: GMLibrary = None  # ground motion library of the current process
+
+
+def run_suite(
+        frame: Frame | str | Path, gm_table: list[dict], MainFolder: str | Path,
+        workers: int=1, maxRunTime: float=600, CollapseDrift: float=0.1,
+        FVduration: float=30, collapse_criteria: dict=None,
+        checkpoint_interval: float=None, reuse_model: bool=True,
+        gm_library: GMLibrary | str | Path=None, scaling: dict=None,
+        manifest: str | Path=None, resume: bool=True, on_result: Callable[[dict], None]=None,
+        subroutines_dir: str | Path=SUBROUTINES_DIR
+    ) -> list[dict]:
+    """Run time history analyses of a ground motion suite using the generated
+    `run_openseespy` function. Each worker process imports the generated
+    module once and owns its OpenSees domain.
+
+    Args:
+        frame (Frame | str | Path): A `Frame` whose scripts have been generated by
+        `generate_tcl_script`, or the path of the generated openseespy script
+        gm_table (list[dict]): Ground motions, each item includes "GMname", "GMFile",
+        "GMdt", "GMpoints", "GMduration", and optionally "EqSF" (defaults to 1),
+        "FVduration" and "SubFolder". A pandas DataFrame is also accepted. For the
+        records in `gm_library`, only "GMname" (and optional items) is required.
+        MainFolder (str | Path): Folder of results
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        maxRunTime (float, optional): Maximum run time of each record (second). Defaults to 600.
+        CollapseDrift (float, optional): Drift ratio that sign the frame as collapse. Defaults to 0.1.
+        FVduration (float, optional): Default free vibration duration. Defaults to 30.
+        collapse_criteria (dict, optional): Additional collapse criteria passed to
+        `TimeHistorySolver`, i.e. "confirm_time", "residual_drift" and "max_failures"
+        checkpoint_interval (float, optional): If given, each record writes a checkpoint
+        ("MainFolder/SubFolder/checkpoint.npz") at this interval (second), and an interrupted
+        record (or one exceeding `maxRunTime`) is resumed from its checkpoint when run again
+        reuse_model (bool, optional): Build the model once in each worker process, and revert it
+        to the initial state (then apply the gravity loads) before each record instead of
+        rebuilding it. Defaults to True.
+        gm_library (GMLibrary | str | Path, optional): Ground motion library (or its npz file).
+        The records in the library are passed to the workers in memory instead of being
+        read from "GMFile" in each analysis.
+        scaling (dict, optional): Scale the ground motions to a target intensity, e.g.
+        {"method": "Sa(T1)", "target": 0.5}, see `scale_suite`. The fundamental period
+        is taken from the eigen analysis of the model (`Frame.modal_properties`)
+        unless "T1" is given.
+        manifest (str | Path, optional): Manifest file recording finished records,
+        defaults to "MainFolder/manifest.jsonl"
+        resume (bool, optional): Skip records already in the manifest. Defaults to True.
+        on_result (Callable[[dict], None], optional): Called with the summary of each
+        record once it finishes
+        subroutines_dir (str | Path, optional): Folder that contains the `subroutines` package
+
+    Returns:
+        list[dict]: Summaries of all records, see `summarize_result`
+    """
+    script = get_script_path(frame)
+    MainFolder = Path(MainFolder)
+    MainFolder.mkdir(parents=True, exist_ok=True)
+    manifest = MainFolder/'manifest.jsonl' if manifest is None else Path(manifest)
+    if isinstance(gm_library, (str, Path)):
+        gm_library = GMLibrary.load(gm_library)
+    if scaling is not None:
+        scaling = dict(scaling)
+        if 'T1' not in scaling and scaling.get('method') != 'spectrum':
+            scaling['T1'] = get_T1(frame)
+        gm_table = scale_suite(gm_table, gm_library=gm_library, **scaling)
+    jobs = make_jobs(gm_table, MainFolder, maxRunTime, CollapseDrift, FVduration,
+                     collapse_criteria, checkpoint_interval, reuse_model, gm_library)
+    finished = read_manifest(manifest) if resume else {}
+    if checkpoint_interval:
+        # records exceeding `maxRunTime` are continued from their checkpoints
+        finished = {SubFolder: summary for SubFolder, summary in finished.items()
+                    if not (summary['status'] == 4 and (MainFolder/SubFolder/'checkpoint.npz').exists())}
+    results = [finished[job['SubFolder']] for job in jobs if job['SubFolder'] in finished]
+    jobs = [job for job in jobs if job['SubFolder'] not in finished]
+    if results:
+        print(f'{len(results)} records have been finished according to the manifest, {len(jobs)} remaining')
+
+    def _collect(summary: dict):
+        with open(manifest, 'a') as f:
+            f.write(json.dumps(summary) + '\n')
+        results.append(summary)
+        n = len(results)
+        print(f'[{n}] {summary["SubFolder"]}: status {summary["status"]}, '
+              f'max SDR {summary["max_SDR"]}, {summary["elapsed"]:.1f} s')
+        if on_result:
+            on_result(summary)
+
+    if workers == 1:
+        _init_worker(script, subroutines_dir, gm_library)
+        for job in jobs:
+            _collect(_run_record(job))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(script, subroutines_dir, gm_library)) as executor:
+            futures = [executor.submit(_run_record, job) for job in jobs]
+            for future in as_completed(futures):
+                _collect(future.result())
+    return results
+
+
+def get_script_path(frame: Frame | str | Path) -> Path:
+    """Get the path of the generated openseespy script"""
+    if isinstance(frame, (str, Path)):
+        script = Path(frame)
+    else:
+        if not hasattr(frame, 'output_path'):
+            raise ValueError('The scripts of the frame have not been generated, run `generate_tcl_script` first')
+        script = frame.output_path/f'{frame.frame_name}.py'
+    if not script.exists():
+        raise FileNotFoundError(f'openseespy script not found: {script}')
+    return script.absolute()
+
+
+def get_T1(frame: Frame | str | Path) -> float:
+    """Fundamental period of a frame, or of the frame whose openseespy script is given
+    (rebuilt from the json file generated together with the script). A ValueError is
+    raised if the rebuilt frame differs from the generated model, e.g. its masses or
+    user commands were changed after all steps finished."""
+    from .MRFhelper import from_json
+    from .ModalCache import frame_hash
+    if isinstance(frame, (str, Path)):
+        script = Path(frame)
+        file = script.with_name(script.name.split('.')[0] + '.json')
+        with open(file, 'r') as f:
+            saved_hash = json.load(f).get('frame_hash')
+        frame = from_json(file)
+        if saved_hash is not None and frame_hash(frame) != saved_hash:
+            raise ValueError(f'The model of {script.name} cannot be rebuilt from {file.name} since its derived data '
+                             'or user commands were changed after all steps finished, give the `Frame` '
+                             'or "T1" in `scaling` instead')
+    return frame.modal_properties().T1
+
+
+def scale_suite(gm_table: list[dict], method: str, target: float | list[float],
+                T1: float=None, gm_library: GMLibrary=None, **kwargs) -> list[dict]:
+    """Scale the ground motions to a target intensity. The "EqSF" of each row (defaults to 1)
+    is multiplied by the scale factor, so that the same record can be scaled to several
+    multiples of the target.
+
+    Args:
+        gm_table (list[dict]): Ground motions, see `run_suite`
+        method (str): "Sa(T1)", "Sa_avg" or "spectrum", see `Spectrum.scale_factors`
+        target (float | list[float]): Target intensity (g), or target spectrum
+        T1 (float, optional): Fundamental period
+        gm_library (GMLibrary, optional): Ground motion library, other records are read
+        from "GMFile" with "GMdt"
+        kwargs: Other arguments of `Spectrum.scale_factors`
+
+    Returns:
+        list[dict]: Scaled ground motion table
+    """
+    if hasattr(gm_table, 'to_dict'):
+        gm_table = gm_table.to_dict('records')
+    rows = dict()  # {GMname: row} of unique records
+    for row in gm_table:
+        rows.setdefault(row['GMname'], row)
+    records, dts = [], []
+    for name, row in rows.items():
+        if gm_library is not None and name in gm_library:
+            records.append(gm_library.record(name))
+            dts.append(gm_library.dt(name))
+        else:
+            values, dt = read_record(row['GMFile'], row['GMdt'])
+            records.append(values)
+            dts.append(dt)
+    SFs = dict(zip(rows, scale_factors(records, dts, method, target, T1, **kwargs)))
+    return [{**row, 'EqSF': float(f'{SFs[row["GMname"]] * float(row.get("EqSF", 1)):.6g}')}
+            for row in gm_table]
+
+
+def make_jobs(gm_table: list[dict], MainFolder: Path, maxRunTime: float,
+              CollapseDrift: float, FVduration: float,
+              collapse_criteria: dict=None, checkpoint_interval: float=None,
+              reuse_model: bool=False, gm_library: GMLibrary=None) -> list[dict]:
+    """Convert the ground motion table into a list of analysis jobs, the missing
+    information of records in `gm_library` is taken from the library"""
+    if hasattr(gm_table, 'to_dict'):
+        gm_table = gm_table.to_dict('records')
+    jobs = []
+    SubFolders = set()
+    for row in gm_table:
+        if gm_library is not None and row.get('GMname') in gm_library:
+            row = {**gm_library.info(row['GMname']), **row}
+        for key in ['GMname', 'GMFile', 'GMdt', 'GMpoints', 'GMduration']:
+            if key not in row:
+                raise ValueError(f'"{key}" is not given for ground motion {row}')
+        EqSF = float(row.get('EqSF', 1))
+        SubFolder = str(row.get('SubFolder', f'{row["GMname"]}_SF{EqSF:g}'))
+        if SubFolder in SubFolders:
+            raise ValueError(f'Duplicated ground motion: {SubFolder}')
+        SubFolders.add(SubFolder)
+        jobs.append({
+            'maxRunTime': maxRunTime,
+            'MainFolder': str(MainFolder),
+            'GMname': str(row['GMname']),
+            'SubFolder': SubFolder,
+            'GMdt': float(row['GMdt']),
+            'GMpoints': int(row['GMpoints']),
+            'GMduration': float(row['GMduration']),
+            'FVduration': float(row.get('FVduration', FVduration)),
+            'EqSF': EqSF,
+            'GMFile': str(row['GMFile']),
+            'CollapseDrift': CollapseDrift,
+            'collapse_criteria': collapse_criteria,
+            'checkpoint_interval': checkpoint_interval,
+            'reuse_model': reuse_model,
+        })
+    return jobs
+
+
+def read_manifest(manifest: Path) -> dict[str, dict]:
+    """Read finished records from the manifest, {SubFolder: summary}"""
+    finished = dict()
+    if not manifest.exists():
+        return finished
+    with open(manifest, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                summary = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # incomplete line written before interruption
+            if summary['status'] != 0:
+                finished[summary['SubFolder']] = summary
+    return finished
+
+
+def summarize_result(job: dict, result: tuple, elapsed: float) -> dict:
+    """Summary of a time history analysis
+    * status: returned status of `TimeHistorySolver` (0 if an error was raised)
+    * reason: reason of termination
+    * peak_SDR: peak absolute story drift ratios
+    * max_SDR: maximum of `peak_SDR`
+    * peak_roof_SDR: peak absolute roof drift ratio
+    """
+    status, time_, collapse, SDRs, SDR_roof = result[:5]
+    peak_SDR = abs(SDRs).max(axis=0)
+    return {
+        'SubFolder': job['SubFolder'],
+        'GMname': job['GMname'],
+        'EqSF': job['EqSF'],
+        'status': int(status),
+        'time': float(time_),
+        'collapse': bool(collapse),
+        'reason': getattr(result, 'reason', None),
+        'peak_SDR': [round(float(i), 6) for i in peak_SDR],
+        'max_SDR': round(float(peak_SDR.max()), 6),
+        'peak_roof_SDR': round(float(max(abs(i) for i in SDR_roof)), 6),
+        'elapsed': elapsed,
+    }
+
+
+def _init_worker(script: Path, subroutines_dir: str | Path, gm_library: GMLibrary=None):
+    """Import the generated openseespy module once per process"""
+    global _module, _library
+    _library = gm_library
+    if str(subroutines_dir) not in sys.path:
+        sys.path.insert(0, str(subroutines_dir))
+    spec = importlib.util.spec_from_file_location(script.stem, script)
+    _module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(_module)
+
+
+def _run_record(job: dict) -> dict:
+    """Run a single record, the printed analysis information is written into
+    "MainFolder/SubFolder/log.txt" """
+    folder = Path(job['MainFolder'])/job['SubFolder']
+    folder.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+    kwargs = {'collapse_criteria': job['collapse_criteria']} if job.get('collapse_criteria') else {}
+    resume = False
+    if job.get('checkpoint_interval'):
+        resume = (folder/'checkpoint.npz').exists()
+        kwargs.update(checkpoint_interval=job['checkpoint_interval'], resume=resume)
+    if job.get('reuse_model'):
+        kwargs['reuse_model'] = True
+    if _library is not None and job['GMname'] in _library:
+        kwargs['GMvalues'] = _library.record(job['GMname']).tolist()
+    with open(folder/'log.txt', 'a' if resume else 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            result = _module.run_openseespy(
+                job['maxRunTime'], 'TH', False, False, Path(job['MainFolder']),
+                job['GMname'], Path(job['SubFolder']), job['GMdt'], job['GMpoints'],
+                job['GMduration'], job['FVduration'], job['EqSF'], Path(job['GMFile']),
+                0.1, job['CollapseDrift'], [], **kwargs)
+        except Exception as error:
+            print(f'{type(error).__name__}: {error}')
+            return {'SubFolder': job['SubFolder'], 'GMname': job['GMname'], 'EqSF': job['EqSF'],
+                    'status': 0, 'error': str(error), 'max_SDR': None,
+                    'elapsed': time.time() - start_time}
+    return summarize_result(job, result, time.time() - start_time)
@@ -3,7 +3,6 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .MRFhelper import Frame
 import datetime
-import pandas as pd
 
 def write_info_to_dict(frame: Frame) -> dict:
     info = {
@@ -66,7 +65,8 @@ def write_info_to_dict(frame: Frame) -> dict:
     return info
 
 
-def write_info_to_tcl(frame: Frame, file_name='Model Information') -> str:
+def write_info_to_tcl(frame: Frame, file_name='Model Information', write: bool=True) -> str:
+    import pandas as pd
 
     text = f'Moment resisting frame model information\n'
     text += f'Frame name: {frame.frame_name}\n'
@@ -170,10 +170,24 @@ def write_info_to_tcl(frame: Frame, file_name='Model Information') -> str:
     if frame.ConnectionAndBoundary.beam_column_connection == 'RBS':
         text += f'Reduced beam section (RBS) parameters: {a}, {b}, {c}\n'
     s = 'Yes (Parallelogram)' if frame.ConnectionAndBoundary.panel_zone_deformation else 'No (Cruciform)'
-    text += f'Consider panel zone deformation: {s}\n'
+    text += f'Consider panel zone deformation: {s}\n\n\n'
 
-    with open(frame.output_path/(file_name+f'_{frame.frame_name}.txt'), 'w') as f:
-        f.write(text)
+    # 5 plastic hinges
+    text += '-'*15 + ' 5. Plastic Hinges (IMK Model) ' + '-'*15 + '\n\n'
+    text += 'Beam hinges (the same at both ends of a beam) [N, mm, rad]:\n'
+    if BC == 'Hinged':
+        text += 'None (hinged connection)\n\n'
+    else:
+        df = frame.hinge_table.to_dataframe('beam')
+        text += f"{df[['Floor', 'Bay', 'L', 'My', 'K', 'theta_p', 'theta_pc', 'McMy', 'Lamda']].to_string(index=False)}\n\n"
+    text += 'Column hinges (b: bottom, t: top, My adjusted for axial load ratio) [N, mm, rad]:\n'
+    df = frame.hinge_table.to_dataframe('column')
+    df['My'] = df.pop('My_adjusted')
+    text += f"{df[['Story', 'Axis', 'End', 'L', 'My', 'K', 'theta_p', 'theta_pc', 'McMy', 'Res', 'Lamda']].to_string(index=False)}\n"
+
+    if write:
+        with open(frame.output_path/(file_name+f'_{frame.frame_name}.txt'), 'w') as f:
+            f.write(text)
     # print(text)
     return text
 
@@ -2,11 +2,12 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .MRFhelper import Frame
+import os
 import json
+import gzip
 from pathlib import Path
-from tkinter import messagebox
-import matplotlib.pyplot as plt
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Literal, TextIO
+from .HingeParameters import PARAMETERS
 
 
 """
@@ -15,18 +16,85 @@ Writen by: Wenchen Lie
 2024-03-17
 """
 
+def _hinge_args(params: dict, sep: str) -> str:
+    """IMK model parameters of a hinge (see `HingeParameters.PARAMETERS`) written into
+    the scripts, the shortest representation that is read back as the same float"""
+    return sep.join(repr(float(params[key])) for key in PARAMETERS)
+
+
 class WriteScript:
-    def __init__(self, frame: Frame) -> None:
+    def __init__(self, frame: Frame, headless: bool=False,
+                 overwrite: Literal['ask', 'overwrite', 'skip', 'error']='ask',
+                 figure: bool=True, dpi: int=1200, compress: bool=False,
+                 tcl_sink: TextIO=None, py_sink: TextIO=None,
+                 recorder_format: Literal['text', 'binary']='text') -> None:
+        """Generate the tcl and openseespy scripts of a frame
+
+        Args:
+            frame (Frame): Frame object with all steps finished
+            headless (bool, optional): If True, no GUI is used (no figure window and
+            no message box). Defaults to False.
+            overwrite (str, optional): Policy when the scripts already exist:
+            * "ask" - Ask using a message box (not allowed if `headless` is True)
+            * "overwrite" - Overwrite the existing scripts
+            * "skip" - Do not generate the scripts
+            * "error" - Raise FileExistsError
+            figure (bool, optional): Whether to render the model figure. If False, the figure can
+            still be rendered later using `render_figure`. Defaults to True.
+            dpi (int, optional): Resolution of the model figure. Defaults to 1200.
+            compress (bool, optional): Write gzip compressed scripts ("*.tcl.gz" and "*.py.gz").
+            Defaults to False.
+            tcl_sink (TextIO, optional): Text stream that receives the tcl script instead of the
+            file, e.g. `sys.stdout` or `io.StringIO`
+            py_sink (TextIO, optional): Text stream that receives the openseespy script instead
+            of the file
+            recorder_format (str, optional): Format of recorders:
+            * "text" - One text file for each response quantity
+            * "binary" - Responses of the same type are grouped into a few binary files, the
+            layout of columns is written into "frame_name_recorders.json" and the results can be
+            read by `RecorderReader.read_recorders`
+            Defaults to "text".
+
+        Note: The scripts are streamed into the files (or sinks) while being generated. The files
+        are first written to temporary files, which replace the target files once finished.
+        """
+        if overwrite not in ['ask', 'overwrite', 'skip', 'error']:
+            raise ValueError(f'Invalid overwrite policy: {overwrite}')
+        if headless and overwrite == 'ask':
+            raise ValueError('Overwrite policy "ask" cannot be used in headless mode')
+        if recorder_format not in ['text', 'binary']:
+            raise ValueError(f'Invalid recorder format: {recorder_format}')
         self.frame = frame
-        self.tcl_script = []
-        self.py_script = []
+        self.headless = headless
+        self.overwrite = overwrite
+        self.figure = figure
+        self.dpi = dpi
+        self.generated = False  # whether the scripts were written
+        self.compress = compress
+        self.tcl_sink = tcl_sink
+        self.py_sink = py_sink
+        self.recorder_format = recorder_format
+        self.recorder_layout = None  # column layout of binary recorders
         self.nodes_Id: Dict[int, Tuple[float, float]] = dict()  # {id: (x_coord, y_coord)}
         self.eles_Id: Dict[int, Tuple[int, int]] = dict()  # {id: (iNode, jNode)}
         self.Nlines = 0  # number of lines
         self.Nlinespy = 0  # number of lines of openseespy script
+        self.py_indent = '    '  # default indentation of openseespy script
         self.Nrecorder = 0  # number of recorders
         self.line_frag = dict()
-        self.fig, self.ax = plt.subplots()
+        self.plot_calls = []  # deferred arguments of `Axes.plot`
+        if not self._open_sinks():
+            print('Scripts were not generated!')
+            return
+        try:
+            self._write_all()
+        except BaseException:
+            self._close_sinks(success=False)
+            raise
+        self._close_sinks(success=True)
+        self.save()
+
+    def _write_all(self):
         self.write_script()
         self.write_nodes()
         self.write_elements()
@@ -41,7 +109,6 @@ class WriteScript:
         self.write_pushover_analysis()
         self.write_cyclic_pushover()
         self.write_info()
-        self.save()
 
     def write(self, *text):
         """Write a line of text to tcl script"""
@@ -50,11 +117,13 @@ class WriteScript:
         else:
             text = [str(i) for i in text]
             text = '  '.join(text)
-        self.tcl_script.append(text)
+        self._tcl.write(text)
         self.Nlines += 1
 
-    def writepy(self, *text, start='    '):
+    def writepy(self, *text, start: str=None):
         """Write a line of text to openseespy script"""
+        if start is None:
+            start = self.py_indent
         if len(text) == 0:
             text = ''
         elif len(text) == 1:
@@ -63,9 +132,18 @@ class WriteScript:
             text = [start + str(i) for i in text]
             text = '\n'.join(text)
             text += '\n'
-        self.py_script.append(text)
+        self._py.write(text)
         self.Nlinespy += 1
 
+    def begin_model_block(self):
+        """Following openseespy commands define the model, which are skipped
+        when the model of the last call is reused (`reuse_model`)"""
+        self.writepy('if not reuse:')
+        self.py_indent += '    '
+
+    def end_model_block(self):
+        self.py_indent = self.py_indent[:-4]
+
 
     def write_script(self):
         frame = self.frame
@@ -103,6 +181,9 @@ class WriteScript:
         self.writepy('from typing import Literal', start='')
         self.writepy()
         self.writepy()
+        self.writepy('_model_state = dict()  # state of the model kept in the domain (see `reuse_model`)', start='')
+        self.writepy()
+        self.writepy()
         self.writepy('def run_openseespy(', start='')
         self.writepy('maxRunTime: float,')
         self.writepy('analysis_type: Literal["TH", "PO", "CP"],')
@@ -119,13 +200,30 @@ class WriteScript:
         self.writepy('GMFile: Path,')
         self.writepy('maxRoofDrift: float,')
         self.writepy('CollapseDrift: float,')
-        self.writepy('RDR_path: list[float]')
+        self.writepy('RDR_path: list[float],')
+        self.writepy('collapse_criteria: dict=None,')
+        self.writepy('checkpoint_interval: float=None,')
+        self.writepy('resume: bool=False,')
+        self.writepy('reuse_model: bool=False,')
+        self.writepy('GMvalues: list[float]=None')
         self.writepy('):')
         self.writepy()
+        self.writepy('# If `reuse_model`, the model built by the last call is reverted to the initial state')
+        self.writepy('# and reused, only the recorders, eigen results and gravity analysis are renewed')
+        self.writepy('reuse = reuse_model and bool(_model_state)')
+        self.writepy('if reuse:')
+        self.writepy('    ops.remove("recorders")')
+        self.writepy('    for tag in [100, 200, 222]:')
+        self.writepy('        ops.remove("loadPattern", tag)')
+        self.writepy('        ops.remove("timeSeries", tag)')
+        self.writepy('    ops.wipeAnalysis()')
+        self.writepy('    ops.reset()')
+        self.writepy('else:')
+        self.writepy('    _model_state.clear()')
         self.write('wipe all;')
-        self.writepy('ops.wipe()')
+        self.writepy('    ops.wipe()')
         self.write('model basic -ndm 2 -ndf 3;')
-        self.writepy('ops.model("basic", "-ndm", 2, "-ndf", 3)')
+        self.writepy('    ops.model("basic", "-ndm", 2, "-ndf", 3)')
         self.write()
         self.writepy()
         self.write('# Basic model variables')
@@ -190,6 +288,7 @@ class WriteScript:
         self.writepy(f'fy_beam = {frame.LoadAndMaterial.fy_beam:.2f}')
         self.write(f'set fy_column {frame.LoadAndMaterial.fy_column:.2f};')
         self.writepy(f'fy_column = {frame.LoadAndMaterial.fy_column:.2f}')
+        self.begin_model_block()
         self.write('uniaxialMaterial Elastic 9 1.e-9;')
         self.writepy('ops.uniaxialMaterial("Elastic", 9, 1.e-9)')
         self.write('uniaxialMaterial Elastic 99 1.e12;')
@@ -200,6 +299,7 @@ class WriteScript:
         self.writepy('ops.geomTransf("PDelta", 2)')
         self.write('geomTransf Corotational 3;')
         self.writepy('ops.geomTransf("Corotational", 3)')
+        self.end_model_block()
         self.write('set A_Stiff 1.e8;')
         self.writepy('A_Stiff = 1.e8')
         self.write('set I_Stiff 1.e13;')
@@ -261,6 +361,7 @@ class WriteScript:
         self.writepy('# ' + s)
         self.write()
         self.writepy()
+        self.begin_model_block()
 
         # Support nodes
         self.write('# Support nodes')
@@ -472,6 +573,7 @@ class WriteScript:
                     self.node(x, y, Id=Id)
             self.write(*write_temp)
             self.writepy(*write_temp_py)
+        self.end_model_block()
         self.write('') 
         self.write('')
         self.writepy('')
@@ -498,6 +600,7 @@ class WriteScript:
         self.writepy('n = 10.')
         self.write()
         self.writepy()
+        self.begin_model_block()
 
         # Columns
         self.write('# Column elements')
@@ -661,38 +764,16 @@ class WriteScript:
         # Beam hinge
         self.write('# Beam hinges')
         self.writepy('# Beam hinges')
-        self.write('# BeamHinge SpringID NodeI NodeJ E fy_beam Ix d htw bftf ry L Ls Lb My type_ {check ""}')
-        self.writepy('# BeamHinge(SpringID, NodeI, NodeJ, E, fy_beam, Ix, d, htw, bftf, ry, L, Ls, Lb, My, type_, check=None)')
+        self.write('# BeamHinge SpringID NodeI NodeJ K theta_p theta_pc theta_u My McMy Res Lamda type_ {check ""}')
+        self.writepy('# BeamHinge(SpringID, NodeI, NodeJ, K, theta_p, theta_pc, theta_u, My, McMy, Res, Lamda, type_, check=None)')
+        hinges = frame.hinge_table  # IMK model parameters of all hinges
         for FF in range(2, frame.N + 2):
             write_temp = []
             write_temp_py = []
             for BB in range(1, frame.bays + 1):
                 AA_l, AA_r = BB, BB + 1
-                SS_b, SS_t = FF - 1, FF
-                Ix = frame.StructuralComponents.beam_properties[FF][BB-1][6]
-                d = frame.StructuralComponents.beam_properties[FF][BB-1][1]
-                tw = frame.StructuralComponents.beam_properties[FF][BB-1][2]
-                h = frame.StructuralComponents.beam_properties[FF][BB-1][8]
-                htw = h / tw
-                bf = frame.StructuralComponents.beam_properties[FF][BB-1][0]
-                tf = frame.StructuralComponents.beam_properties[FF][BB-1][3]
-                bftf = bf / (2 * tf)
-                ry = frame.StructuralComponents.beam_properties[FF][BB-1][4]
-                d_col_l = frame.StructuralComponents.column_properties[SS_b][AA_l-1][1]
-                d_col_r = frame.StructuralComponents.column_properties[SS_b][AA_r-1][1]
-                if SS_b in frame.StructuralComponents.column_splice:
-                    d_col_l = frame.StructuralComponents.column_properties[SS_t][AA_l-1][1]
-                    d_col_r = frame.StructuralComponents.column_properties[SS_t][AA_r-1][1]
-                bay_length = frame.BuildingGeometry.bay_length[BB-1]
-                L = bay_length - (d_col_l + d_col_r) / 2
-                Ls, Lb = L / 2, L / 2
-                My = frame.StructuralComponents.beam_properties[FF][BB-1][7]
-                if frame.ConnectionAndBoundary.beam_column_connection == 'Full':
-                    type_ = 2
-                elif frame.ConnectionAndBoundary.beam_column_connection == 'RBS':
-                    type_ = 1
-                elif frame.ConnectionAndBoundary.beam_column_connection == 'Hinged':
-                    type_ = 3
+                inputs, params = hinges.beam(FF, BB)
+                paras, paras_py, type_ = _hinge_args(params, ' '), _hinge_args(params, ', '), inputs['type_']
                 # left hinge
                 Id = self.get_id(10, FF, AA_l, 9)
                 inode1 = self.get_id(11, FF, AA_l, 4)
@@ -704,8 +785,8 @@ class WriteScript:
                     # Other than RBS
                     inode = inode1
                 jnode = self.get_id(10, FF, AA_l, 4)
-                write_temp.append(f'BeamHinge {Id} {inode} {jnode} $E $fy_beam {Ix:.2f} {d:.2f} {htw:.2f} {bftf:.2f} {ry:.2f} {L:.1f} {Ls:.1f} {Lb:.1f} {My:.2f} {type_};')
-                write_temp_py.append(f'BeamHinge({Id}, {inode}, {jnode}, E, fy_beam, {Ix:.2f}, {d:.2f}, {htw:.2f}, {bftf:.2f}, {ry:.2f}, {L:.1f}, {Ls:.1f}, {Lb:.1f}, {My:.2f}, {type_})')
+                write_temp.append(f'BeamHinge {Id} {inode} {jnode} {paras} {type_};')
+                write_temp_py.append(f'BeamHinge({Id}, {inode}, {jnode}, {paras_py}, {type_})')
                 self.zero_length(inode, jnode, Id=Id)
                 # right hinge
                 Id = self.get_id(10, FF, AA_r, 10)
@@ -718,8 +799,8 @@ class WriteScript:
                 else:
                     # Other than RBS
                     jnode = jnode2
-                write_temp.append(f'BeamHinge {Id} {inode} {jnode} $E $fy_beam {Ix:.2f} {d:.2f} {htw:.2f} {bftf:.2f} {ry:.2f} {L:.1f} {Ls:.1f} {Lb:.1f} {My:.2f} {type_};')
-                write_temp_py.append(f'BeamHinge({Id}, {inode}, {jnode}, E, fy_beam, {Ix:.2f}, {d:.2f}, {htw:.2f}, {bftf:.2f}, {ry:.2f}, {L:.1f}, {Ls:.1f}, {Lb:.1f}, {My:.2f}, {type_})')
+                write_temp.append(f'BeamHinge {Id} {inode} {jnode} {paras} {type_};')
+                write_temp_py.append(f'BeamHinge({Id}, {inode}, {jnode}, {paras_py}, {type_})')
                 self.zero_length(inode, jnode, Id=Id)
             self.write(*write_temp)
             self.writepy(*write_temp_py)
@@ -729,8 +810,8 @@ class WriteScript:
         # column hinges
         self.write('# Column hinges')
         self.writepy('# Column hinges')
-        self.write('# Column SpringID NodeI NodeJ E Ix d htw ry L Lb My PPy SF_PPy pinned check ""')
-        self.writepy('# Column(SpringID, NodeI, NodeJ, E, Ix, d, htw, ry, L, Lb, My, PPy, SF_PPy, pinned, check=None)')
+        self.write('# ColumnHinge SpringID NodeI NodeJ K theta_p theta_pc theta_u My McMy Res Lamda pinned {check ""}')
+        self.writepy('# ColumnHinge(SpringID, NodeI, NodeJ, K, theta_p, theta_pc, theta_u, My, McMy, Res, Lamda, pinned, check=None)')
         for SS in range(1, frame.N + 1):
             write_temp_b = []
             write_temp_b_py = []
@@ -738,60 +819,9 @@ class WriteScript:
             write_temp_t_py = []
             for AA in range(1, frame.axis + 1):
                 FF_b, FF_t = SS, SS + 1
-                BB_l, BB_r = AA - 1, AA
-                Ix_b = frame.StructuralComponents.column_properties[SS][AA-1][6]
-                d_b = frame.StructuralComponents.column_properties[SS][AA-1][1]
-                tw_b = frame.StructuralComponents.column_properties[SS][AA-1][2]
-                h_b = frame.StructuralComponents.column_properties[SS][AA-1][8]
-                htw_b = h_b / tw_b
-                ry_b = frame.StructuralComponents.column_properties[SS][AA-1][4]
-                if SS in frame.StructuralComponents.column_splice:
-                    Ix_t = frame.StructuralComponents.column_properties[SS+1][AA-1][6]
-                    d_t = frame.StructuralComponents.column_properties[SS+1][AA-1][1]
-                    tw_t = frame.StructuralComponents.column_properties[SS+1][AA-1][2]
-                    h_t = frame.StructuralComponents.column_properties[SS+1][AA-1][8]
-                    htw_t = h_t / tw_t
-                    ry_t = frame.StructuralComponents.column_properties[SS+1][AA-1][4]
-                else:
-                    Ix_t = Ix_b
-                    d_t = d_b
-                    tw_t = tw_b
-                    h_t = h_b
-                    htw_t = htw_b
-                    ry_t = ry_b
-                if FF_b == 1:
-                    d_beam_b_l = 0
-                    d_beam_b_r = 0
-                else:
-                    if AA == 1:
-                        d_beam_b_l = frame.StructuralComponents.beam_properties[FF_b][0][1]
-                        d_beam_b_r = frame.StructuralComponents.beam_properties[FF_b][0][1]
-                    elif AA == frame.axis:
-                        d_beam_b_l = frame.StructuralComponents.beam_properties[FF_b][-1][1]
-                        d_beam_b_r = frame.StructuralComponents.beam_properties[FF_b][-1][1]
-                    else:
-                        d_beam_b_l = frame.StructuralComponents.beam_properties[FF_b][BB_l-1][1]
-                        d_beam_b_r = frame.StructuralComponents.beam_properties[FF_b][BB_r-1][1]
-                if AA == 1:
-                    d_beam_t_l = frame.StructuralComponents.beam_properties[FF_t][0][1]
-                    d_beam_t_r = frame.StructuralComponents.beam_properties[FF_t][0][1]
-                elif AA == frame.axis:
-                    d_beam_t_l = frame.StructuralComponents.beam_properties[FF_t][-1][1]
-                    d_beam_t_r = frame.StructuralComponents.beam_properties[FF_t][-1][1]
-                else:
-                    d_beam_t_l = frame.StructuralComponents.beam_properties[FF_t][BB_l-1][1]
-                    d_beam_t_r = frame.StructuralComponents.beam_properties[FF_t][BB_r-1][1]
-                L0 = frame.BuildingGeometry.story_height[SS-1]
-                L = L0 - (d_beam_b_l+d_beam_b_r)/4 - (d_beam_t_l+d_beam_t_r)/4
-                Lb = L
-                My_b = frame.StructuralComponents.column_properties[SS][AA-1][7]
-                if SS not in frame.StructuralComponents.column_splice:
-                    My_t = My_b
-                else:
-                    My_t = frame.StructuralComponents.column_properties[SS+1][AA-1][7]
-                PPy_b = frame.LoadAndMaterial.PPy[f'{SS}b'][AA-1]
-                PPy_t = frame.LoadAndMaterial.PPy[f'{SS}t'][AA-1]
-                SF_PPy = frame.LoadAndMaterial.PPy_scale
+                inputs_b, params_b = hinges.column(SS, AA, 'b')
+                inputs_t, params_t = hinges.column(SS, AA, 't')
+                pinned_b, pinned_t = inputs_b['type_'], inputs_t['type_']
                 Id_b = self.get_id(10, FF_b, AA, 7)
                 Id_t = self.get_id(10, FF_t, AA, 8)
                 if SS == 1:
@@ -801,13 +831,10 @@ class WriteScript:
                 jnode_b = self.get_id(10, FF_b, AA, 1)
                 inode_t = self.get_id(10, FF_t, AA, 2)
                 jnode_t = self.get_id(11, FF_t, AA, 1)
-                pinned = 1
-                if FF_b == 1 and frame.ConnectionAndBoundary.base_support == 'Pinned':
-                    pinned = 2
-                write_temp_b.append(f'ColumnHinge {Id_b} {inode_b} {jnode_b} $E {Ix_b:.2f} {d_b:.2f} {htw_b:.2f} {ry_b:.2f} {L:.2f} {Lb:.2f} {My_b:.2f} {PPy_b:.4f} {SF_PPy} {pinned};')
-                write_temp_b_py.append(f'ColumnHinge({Id_b}, {inode_b}, {jnode_b}, E, {Ix_b:.2f}, {d_b:.2f}, {htw_b:.2f}, {ry_b:.2f}, {L:.2f}, {Lb:.2f}, {My_b:.2f}, {PPy_b:.4f}, {SF_PPy}, {pinned})')
-                write_temp_t.append(f'ColumnHinge {Id_t} {inode_t} {jnode_t} $E {Ix_t:.2f} {d_t:.2f} {htw_t:.2f} {ry_t:.2f} {L:.2f} {Lb:.2f} {My_t:.2f} {PPy_t:.4f} {SF_PPy} 1;')
-                write_temp_t_py.append(f'ColumnHinge({Id_t}, {inode_t}, {jnode_t}, E, {Ix_t:.2f}, {d_t:.2f}, {htw_t:.2f}, {ry_t:.2f}, {L:.2f}, {Lb:.2f}, {My_t:.2f}, {PPy_t:.4f}, {SF_PPy}, 1)')
+                write_temp_b.append(f'ColumnHinge {Id_b} {inode_b} {jnode_b} {_hinge_args(params_b, " ")} {pinned_b};')
+                write_temp_b_py.append(f'ColumnHinge({Id_b}, {inode_b}, {jnode_b}, {_hinge_args(params_b, ", ")}, {pinned_b})')
+                write_temp_t.append(f'ColumnHinge {Id_t} {inode_t} {jnode_t} {_hinge_args(params_t, " ")} {pinned_t};')
+                write_temp_t_py.append(f'ColumnHinge({Id_t}, {inode_t}, {jnode_t}, {_hinge_args(params_t, ", ")}, {pinned_t})')
                 self.zero_length(inode_b, jnode_b, Id=Id_b)
                 self.zero_length(inode_t, jnode_t, Id=Id_t)
             self.write(*write_temp_b)
@@ -867,6 +894,7 @@ class WriteScript:
                 self.write(f'Spring_Zero {Id2} {jnode} {knode};')
                 self.writepy(f'Spring_Zero({Id2}, {jnode}, {knode})')
                 self.ele(jnode, knode, Id=Id2)
+        self.end_model_block()
         self.write()
         self.writepy()
 
@@ -877,6 +905,7 @@ class WriteScript:
         self.writepy('# ' + s)
         self.write()
         self.writepy()
+        self.begin_model_block()
 
         # Support
         self.write('# Support')
@@ -942,6 +971,7 @@ class WriteScript:
             if frame.ConnectionAndBoundary.rigid_disphragm:
                 self.write(*write_temp)
                 self.writepy(*write_temp_py)
+        self.end_model_block()
         self.write()
         self.writepy()
         self.AA_master = AA_master  # control axes
@@ -953,6 +983,9 @@ class WriteScript:
         self.writepy('# ' + s)
         self.write()
         self.writepy()
+        if self.recorder_format == 'binary':
+            self.write_binary_recorders()
+            return
         self.write('# Time')
         self.writepy('# Time')
         self.write('recorder Node -file $MainFolder/$SubFolder/Time.out -time -node 10010100 -dof 1 disp;')
@@ -1107,6 +1140,101 @@ class WriteScript:
         self.write()
 
 
+    def write_binary_recorders(self):
+        """Group the recorders of each response type into one binary file (the first
+        column is time), the layout of columns is saved in `recorder_layout`"""
+        frame = self.frame
+        self.recorder_layout = {'format': 'binary', 'groups': []}
+
+        def add_group(comment: str, key: str, file: str, type_: str, items: list[tuple[str, int]],
+                      args: str, args_py: str, response: str, response_py: str):
+            # items: (name, tag(s), number of columns)
+            self.write(f'# {comment}')
+            self.writepy(f'# {comment}')
+            if frame.recorders[key] and items:
+                tags = ' '.join(str(tag) for _, tag, _ in items)
+                tags_py = ', '.join(str(tag) for _, tag, _ in items)
+                self.write(f'recorder {type_} -binary $MainFolder/$SubFolder/{file} -time {args} {tags} {response};')
+                self.writepy(f'ops.recorder("{type_}", "-binary", str(MainFolder/SubFolder/"{file}"), "-time", "{args_py}", {tags_py}, {response_py})')
+                self.add_recorder()
+                self.recorder_layout['groups'].append({
+                    'file': file, 'time': True,
+                    'items': [[name, ncols] for name, _, ncols in items]
+                })
+            self.write()
+            self.writepy()
+
+        # Support reactions
+        items = [(f'Support{AA}', self.get_id(10, 1, AA, 0), 3) for AA in range(1, frame.axis + 2)]
+        add_group('Support reactions', 'Reactions', 'Support.bin', 'Node', items,
+                  '-node', '-node', '-dof 1 2 3 reaction', '"-dof", 1, 2, 3, "reaction"')
+        # Story drift ratio (the Drift recorder accepts pairs of iNode and jNode)
+        floor_nodes = [10010100] + self.control_nodes
+        if frame.recorders['Drift']:
+            inodes = ' '.join(str(i) for i in floor_nodes[:-1] + [10010100])
+            jnodes = ' '.join(str(i) for i in floor_nodes[1:] + [floor_nodes[-1]])
+            inodes_py = ', '.join(str(i) for i in floor_nodes[:-1] + [10010100])
+            jnodes_py = ', '.join(str(i) for i in floor_nodes[1:] + [floor_nodes[-1]])
+            self.write('# Story drift ratio')
+            self.writepy('# Story drift ratio')
+            self.write(f'recorder Drift -binary $MainFolder/$SubFolder/SDR.bin -time -iNode {inodes} -jNode {jnodes} -dof 1 -perpDirn 2;')
+            self.writepy(f'# ops.recorder("Drift", "-binary", str(MainFolder/SubFolder/"SDR.bin"), "-time", "-iNode", {inodes_py}, "-jNode", {jnodes_py}, "-dof", 1, "-perpDirn", 2)')
+            self.add_recorder()
+            names = [f'SDR{SS}' for SS in range(1, frame.N + 1)] + ['SDR_Roof']
+            self.recorder_layout['groups'].append({
+                'file': 'SDR.bin', 'time': True, 'items': [[name, 1] for name in names]
+            })
+            self.write()
+            self.writepy()
+        # Floor responses
+        for comment, key, file, name, response in [
+                ('Floor acceleration', 'FloorAccel', 'RFA.bin', 'RFA', 'accel'),
+                ('Floor velocity', 'FloorVel', 'RFV.bin', 'RFV', 'vel'),
+                ('Floor displacement', 'FloorDisp', 'Disp.bin', 'Disp', 'disp')]:
+            items = [(f'{name}{FF}', floor_nodes[FF - 1], 1) for FF in range(1, frame.N + 2)]
+            add_group(comment, key, file, 'Node', items, '-node', '-node',
+                      f'-dof 1 {response}', f'"-dof", 1, "{response}"')
+        # Shear forces
+        items = []
+        for SS in range(1, frame.N + 1):
+            for AA in range(1, frame.axis + 1):
+                Id = self.get_id(10, SS, AA, 1)
+                if not Id in self.eles_Id.keys():
+                    Id = self.get_id(10, SS, AA, 2)
+                items.append((f'Shear{SS}_{AA}', Id, 6))
+        add_group('Shear forces', 'ColumnForce', 'Shear.bin', 'Element', items,
+                  '-ele', '-ele', 'force', '"force"')
+        # Column springs
+        items = []
+        for SS in range(1, frame.N + 1):
+            FF_b, FF_t = SS, SS + 1
+            items += [(f'ColSpring{FF_b}_{AA}T', self.get_id(10, FF_b, AA, 7), 2) for AA in range(1, frame.axis + 1)]
+            items += [(f'ColSpring{FF_t}_{AA}B', self.get_id(10, FF_t, AA, 8), 2) for AA in range(1, frame.axis + 1)]
+        add_group('Column springs', 'ColumnHinge', 'ColSpring.bin', 'Element', items,
+                  '-ele', '-ele', 'material 3 stressStrain', '"material", 3, "stressStrain"')
+        # Beam springs
+        items = []
+        for FF in range(2, frame.N + 2):
+            for BB in range(1, frame.bays + 1):
+                AA_l, AA_r = BB, BB + 1
+                items.append((f'BeamSpring{FF}_{AA_l}R', self.get_id(10, FF, AA_l, 9), 2))
+                items.append((f'BeamSpring{FF}_{AA_r}L', self.get_id(10, FF, AA_r, 10), 2))
+        add_group('Beam springs', 'BeamHinge', 'BeamSpring.bin', 'Element', items,
+                  '-ele', '-ele', 'material 3 stressStrain', '"material", 3, "stressStrain"')
+        # Panel zone springs
+        items = []
+        if frame.ConnectionAndBoundary.panel_zone_deformation:
+            for FF in range(2, frame.N + 2):
+                items += [(f'PZ{FF}_{AA}', self.get_id(11, FF, AA, 0), 2) for AA in range(1, frame.axis + 1)]
+        add_group('Panel zone springs (if any)', 'PanelZone', 'PZ.bin', 'Element', items,
+                  '-ele', '-ele', 'material 1 stressStrain', '"material", 1, "stressStrain"')
+        self.write('# MPCO recorder')
+        self.write('if {$MPCO == 1} {')
+        self.write('    recorder mpco $MainFolder/$SubFolder/result.mpco -N displacement acceleration modesOfVibration -E material.stress material.strain;')
+        self.write('}')
+        self.write()
+
+
     def write_mass(self):
         frame = self.frame
         s = f' Mass '.center(80, '-')
@@ -1118,6 +1246,7 @@ class WriteScript:
         self.writepy('# Moment frame mass')
         self.write('set g 9810.0;')
         self.writepy('g = 9810.0')
+        self.begin_model_block()
         for FF in range(2, frame.N + 2):
             write_temp = []
             write_temp_py = []
@@ -1141,6 +1270,7 @@ class WriteScript:
             mass = frame.LoadAndMaterial.mass_grav[FF]
             self.write(f'mass {Id} {mass:.3f} 1.e-9 1.e-9;')
             self.writepy(f'ops.mass({Id}, {mass:.3f}, 1.e-9, 1.e-9)')
+        self.end_model_block()
         self.write()
         self.writepy()
         self.write()
@@ -1184,6 +1314,7 @@ class WriteScript:
         s = f' User comments '.center(80, '-')
         self.writepy('# ' + s)
         self.writepy()
+        self.begin_model_block()
         for command in uesr_commands:
             type_ = list(command.keys())[0]
             if type_ == 'node':
@@ -1200,6 +1331,7 @@ class WriteScript:
                 self.writepy(command['ele'])
             elif type_ == 'any':
                 self.writepy(command['any'])
+        self.end_model_block()
         self.writepy()
 
 
@@ -1214,7 +1346,12 @@ class WriteScript:
         self.write(f'set nEigen {frame.N}')
         self.writepy(f'nEigen = {frame.N}')
         self.write(f'set lambdaN [eigen [expr $nEigen]];')
-        self.writepy(f'lambdaN = ops.eigen(nEigen)')
+        self.writepy('if reuse:')
+        self.writepy('    lambdaN = _model_state["lambdaN"]')
+        self.writepy('else:')
+        self.writepy('    lambdaN = ops.eigen(nEigen)')
+        self.writepy('    if reuse_model:')
+        self.writepy('        _model_state["lambdaN"] = lambdaN')
         for SS in range(1, frame.N + 1):
             self.write(f'set lambda{SS} [lindex $lambdaN {SS-1}];')
             self.writepy(f'lambda{SS} = lambdaN[{SS-1}]')
@@ -1306,8 +1443,8 @@ class WriteScript:
         self.writepy('ops.constraints("Plain")')
         self.write('numberer RCM;')
         self.writepy('ops.numberer("RCM")')
-        self.write('system BandGeneral;')
-        self.writepy('ops.system("BandGeneral")')
+        self.write('system UmfPack;')
+        self.writepy('ops.system("UmfPack")')
         self.write('test NormDispIncr 1.0e-5 60;')
         self.writepy('ops.test("NormDispIncr", 1.0e-5, 60)')
         self.write('algorithm Newton;')
@@ -1411,7 +1548,10 @@ class WriteScript:
         self.write('    # Ground motion acceleration file input')
         self.writepy('    # Ground motion acceleration file input')
         self.write('    timeSeries Path 200 -dt $GMdt -filePath $GMFile -factor [expr $EqSF * $g];')
-        self.writepy('    ops.timeSeries("Path", 200, "-dt", GMdt, "-filePath", GMFile, "-factor", EqSF * g)')
+        self.writepy('    if GMvalues is None:')
+        self.writepy('        ops.timeSeries("Path", 200, "-dt", GMdt, "-filePath", GMFile, "-factor", EqSF * g)')
+        self.writepy('    else:  # acceleration given in memory (e.g. by `GMLibrary`)')
+        self.writepy('        ops.timeSeries("Path", 200, "-dt", GMdt, "-values", *GMvalues, "-factor", EqSF * g)')
         self.write(f'    recorder Node -file $MainFolder/$SubFolder/groundmotion.out -timeSeries 200 -node {self.get_id(10, 1, 1, 0)} -dof 1 accel;')
         self.writepy(f'    ops.recorder("Node", "-file", str(MainFolder/SubFolder/"groundmotion.out"), "-timeSeries", 200, "-node", {self.get_id(10, 1, 1, 0)}, "-dof", 1, "accel")')
         self.write('    pattern UniformExcitation 200 1 -accel 200;')
@@ -1426,8 +1566,10 @@ class WriteScript:
         self.write('    set controlled_time [lindex $result 1];')
         self.write('    puts "Running status: $status";')
         self.write('    puts "Controlled time: $controlled_time";')
-        self.writepy(f'    result = TimeHistorySolver(GMdt, totalTime, story_height, MF_FloorNodes, CollapseDrift, MaxAnalysisDrift, GMname, maxRunTime, ShowAnimation)')
-        self.writepy('    print(f"Running status: {result[0]}")')
+        self.writepy('    checkpoint = MainFolder/SubFolder/"checkpoint.npz" if checkpoint_interval else None')
+        self.writepy(f'    result = TimeHistorySolver(GMdt, totalTime, story_height, MF_FloorNodes, CollapseDrift, MaxAnalysisDrift, GMname, maxRunTime, ShowAnimation, fv_start=GMduration, checkpoint=checkpoint, checkpoint_interval=checkpoint_interval, resume=resume, **(collapse_criteria or {{}}))')
+        self.writepy('    status = result[0]')
+        self.writepy('    print(f"Running status: {status}")')
         self.writepy('    print(f"Control time: {result[1]}")')
         self.writepy('    print(f"Collapse: {bool(result[2])}")')
         self.writepy('    for i in range(NStory):')
@@ -1543,14 +1685,14 @@ class WriteScript:
         self.write(f'    set result [CyclicPushover $CtrlNode $RDR_path $HBuilding $Dincr $maxRunTime];')
         self.writepy(f'    result = CyclicPushover(CtrlNode, RDR_path, HBuilding, Dincr, maxRunTime, ShowAnimation)')
         self.write(f'    set status [lindex $result 0];')
-        self.writepy(f'    status = result[0]')
+        self.writepy(f'    status = result')
         self.write(f'    puts "Running status: $status";')
         self.writepy(f'    print("Running status", status)')
         self.write()
         self.writepy()
         self.writepy('else:\n        assert False, "Should not reach here"')
         self.writepy()
-        self.writepy('np.savetxt(MainFolder/SubFolder/"Status.dat", status, fmt="%d")')
+        self.writepy('np.savetxt(MainFolder/SubFolder/"Status.dat", [status], fmt="%d")')
         self.writepy('return result')
         self.write('}')
         self.write()
@@ -1658,7 +1800,8 @@ class WriteScript:
             self.zero_length(node_TR, node_RT, 'red', Id)
 
 
-    def get_id(self, *aa: int):
+    @staticmethod
+    def get_id(*aa: int):
         """Get ndoe or element id by combined the number"""
         res = ''
         for a in aa:
@@ -1671,7 +1814,7 @@ class WriteScript:
 
 
     def node(self, x: float | int, y: float | int, c: str='black', Id: int=None, size=2, check=True):
-        self.ax.plot(x, y, 'o', color=c, markersize=size)
+        self.plot_calls.append(((x, y, 'o'), {'color': c, 'markersize': size}))
         if Id:
             if (Id in self.nodes_Id.keys()) and check:
                 print('----- Waring -----')
@@ -1683,7 +1826,7 @@ class WriteScript:
     def ele(self, iNode: int, jNode: int, c: str='blue', Id: int=None, check=True):
         xi, yi = self.get_coord(iNode)
         xj, yj = self.get_coord(jNode)
-        self.ax.plot([xi, xj], [yi, yj], color=c, lw=1)
+        self.plot_calls.append((([xi, xj], [yi, yj]), {'color': c, 'lw': 1}))
         if Id:
             if (Id in self.eles_Id.keys()) and check:
                 print('----- Waring -----')
@@ -1697,8 +1840,8 @@ class WriteScript:
         xj, yj = self.get_coord(jNode)
         if (xi != xj) or (yi != yj):
             raise ValueError(f'[Error 2] Coordinates of zero length element node are different\n{iNode}: ({xi}, {yi})\n{jNode}: ({xj}, {yj})')
-        self.ax.plot(xi, yi, color=c, markersize=size, zorder=99999)
-        self.ax.plot(xj, yj, color=c, markersize=size, zorder=99999)
+        self.plot_calls.append(((xi, yi), {'color': c, 'markersize': size, 'zorder': 99999}))
+        self.plot_calls.append(((xj, yj), {'color': c, 'markersize': size, 'zorder': 99999}))
         if Id:
             if Id in self.eles_Id.keys():
                 print('----- Waring -----')
@@ -1721,32 +1864,99 @@ class WriteScript:
         self.Nrecorder += 1
 
 
-    def save(self):
-        model_name = self.frame.frame_name
-        plt.savefig(self.frame.output_path/f'{model_name}.png', dpi=1200)
-        plt.show()
-        if Path(self.frame.output_path/f'{model_name}.tcl').exists():
-            res = messagebox.askquestion('Warnning', f'"{model_name}.tcl" already exists. Do you want to overwrite it?')
-            if res == 'yes':
-                pass
+    def render_figure(self, file: str | Path=None, dpi: int=None, show: bool=None):
+        """Render the model figure
+
+        Args:
+            file (str | Path, optional): Output png file, defaults to "output_path/frame_name.png"
+            dpi (int, optional): Resolution, defaults to the `dpi` given at initialization
+            show (bool, optional): Whether to show the figure window, defaults to True
+            if not in headless mode
+        """
+        file = self.frame.output_path/f'{self.frame.frame_name}.png' if file is None else file
+        dpi = self.dpi if dpi is None else dpi
+        show = not self.headless if show is None else show
+        if show:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots()
+        else:
+            from matplotlib.figure import Figure
+            fig = Figure()
+            ax = fig.subplots()
+        for args, kwargs in self.plot_calls:
+            ax.plot(*args, **kwargs)
+        fig.savefig(file, dpi=dpi)
+        if show:
+            plt.show()
+
+
+    def _confirm_overwrite(self, file: Path) -> bool:
+        """Whether the existing file can be overwritten"""
+        if not file.exists() or self.overwrite == 'overwrite':
+            return True
+        if self.overwrite == 'error':
+            raise FileExistsError(f'"{file.name}" already exists')
+        if self.overwrite == 'skip':
+            return False
+        from tkinter import messagebox
+        res = messagebox.askquestion('Warnning', f'"{file.name}" already exists. Do you want to overwrite it?')
+        return res == 'yes'
+
+
+    def _script_files(self) -> list[Path]:
+        """Paths of the tcl and openseespy scripts"""
+        suffix = '.gz' if self.compress else ''
+        return [self.frame.output_path/f'{self.frame.frame_name}.{type_}{suffix}' for type_ in ['tcl', 'py']]
+
+    def _open_sinks(self) -> bool:
+        """Open the output streams of the scripts, returns False if the existing
+        scripts should not be overwritten"""
+        self.files: list[Path] = []  # script files to be written
+        self._streams: list[tuple[TextIO, Path]] = []  # opened streams and their temporary files
+        sinks = []
+        for file, sink in zip(self._script_files(), [self.tcl_sink, self.py_sink]):
+            if sink is not None:
+                sinks.append(sink)
+                continue
+            if not self._confirm_overwrite(file):
+                self._close_sinks(success=False)
+                return False
+            temp = file.with_name(file.name + '.tmp')
+            if self.compress:
+                stream = gzip.open(temp, 'wt')
             else:
-                print('Scripts were not generated!')
-                return
-        if Path(self.frame.output_path/f'{model_name}.py').exists():
-            res = messagebox.askquestion('Warnning', f'"{model_name}.py" already exists. Do you want to overwrite it?')
-            if res == 'yes':
-                pass
+                stream = open(temp, 'w')
+            self.files.append(file)
+            self._streams.append((stream, temp))
+            sinks.append(stream)
+        self._tcl, self._py = _LineSink(sinks[0]), _LineSink(sinks[1])
+        return True
+
+    def _close_sinks(self, success: bool):
+        """Close the opened streams, the temporary files replace the
+        scripts if `success` is True, otherwise they are removed"""
+        for (stream, temp), file in zip(self._streams, self.files):
+            stream.close()
+            if success:
+                os.replace(temp, file)
             else:
-                print('Scripts were not generated!')
-                return
-        text_to_write = '\n'.join(self.tcl_script)
-        text_to_writepy = '\n'.join(self.py_script)
-        with open(self.frame.output_path/f'{model_name}.tcl', 'w') as f:
-            f.write(text_to_write)
-        with open(self.frame.output_path/f'{model_name}.py', 'w') as f:
-            f.write(text_to_writepy)
+                temp.unlink(missing_ok=True)
+        self._streams = []
+
+    def save(self):
+        from .ModalCache import frame_hash
+        model_name = self.frame.frame_name
+        if self.figure:
+            self.render_figure()
         with open(self.frame.output_path/f'{model_name}.json', 'w') as f:
-            json.dump(self.frame.dict_info, f, indent=4)
+            # the hash tells whether the model can be rebuilt from the json file (see `SuiteRunner.get_T1`)
+            json.dump({**self.frame.dict_info, 'frame_hash': frame_hash(self.frame)}, f, indent=4)
+        with open(self.frame.output_path/f'Model Information_{model_name}.txt', 'w') as f:
+            f.write(self.frame.builiding_info)
+        if self.recorder_layout:
+            with open(self.frame.output_path/f'{model_name}_recorders.json', 'w') as f:
+                json.dump(self.recorder_layout, f, indent=4)
+        self.generated = True
         if self.Nrecorder < 512:
             print('\n----------------- Success -----------------------')
         else:
@@ -1761,10 +1971,24 @@ class WriteScript:
         print(f'For the tcl script, the user still need to modify lines {line1} - {line2} to define the ground motion information')
         print('The generated files as follow:')
         path_ = self.frame.output_path
-        print(Path(path_/f'{model_name}.tcl').absolute())
-        print(Path(path_/f'{model_name}.py').absolute())
-        print(Path(path_/f'{model_name}.png').absolute())
+        for file in self.files:
+            print(file.absolute())
+        if self.figure:
+            print(Path(path_/f'{model_name}.png').absolute())
         print(Path(path_/f'Model Information_{model_name}.txt').absolute())
         print('-------------------------------------------------\n')
 
 
+class _LineSink:
+    def __init__(self, stream: TextIO):
+        """Write lines into a text stream, lines are separated by newlines
+        (the same as joining all lines by "\\n") without being kept in memory"""
+        self.stream = stream
+        self.first = True
+
+    def write(self, line: str):
+        if self.first:
+            self.first = False
+        else:
+            self.stream.write('\n')
+        self.stream.write(line)
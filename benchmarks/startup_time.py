@@ -0,0 +1,39 @@
+"""
+Measure the import time of MRFHelper and of the subroutines imported by
+the generated openseespy script, each in a fresh interpreter.
+Run from the project root: python benchmarks/startup_time.py
+"""
+import sys
+import time
+import subprocess
+from pathlib import Path
+from statistics import median
+
+
+ROOT = Path(__file__).parent.parent
+STATEMENTS = {
+    'MRFHelper': 'from MRFHelper import MRFhelper',
+    'subroutines': ('import subroutines.BeamHinge, subroutines.ColumnHinge, subroutines.PanelZone, '
+                    'subroutines.TimeHistorySolver, subroutines.PushoverAnalysis, '
+                    'subroutines.CyclicPushover, subroutines.DisplayModel2D'),
+}
+
+
+def measure(statement: str, repeat: int) -> float:
+    """Median wall time (ms) of running `statement` in a fresh interpreter"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return median(times)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    t_python = measure('pass', repeat)
+    print(f'Bare interpreter: {t_python:.0f} ms')
+    for name, statement in STATEMENTS.items():
+        t = measure(statement, repeat)
+        print(f'{name}: {t - t_python:.0f} ms (excluding interpreter startup)')
@@ -1,23 +1,24 @@
 # -------------------------- Construct beam hinge model --------------------------
 #
-# Args (14):
+# Args (13):
 # ---------------
 # SpringID       Zero length element ID
 # NodeI          Node i ID
 # NodeJ          Node j ID
-# E              Young's modulus
-# Ix             Moment of inertia of section
-# d              Section depth
-# htw            Web slenderness ratio
-# ry             Radius of gyration
-# L              Member Length
-# Lb             Unbraced length
-# My             Effective Yield Moment
-# PPy            Axial load ratio due to gravity
-# SF_PPy         Scale factor of axial load ratio (due to overturning effect)
+# K              Elastic stiffness
+# theta_p        Pre-capping plastic rotation
+# theta_pc       Post-capping plastic rotation
+# theta_u        Ultimate rotation
+# My             Effective Yield Moment (adjusted for the axial load)
+# McMy           Capping to yield moment ratio
+# Res            Residual strength ratio
+# Lamda          Cyclic deterioration parameter
 # type_          Column base pinned connection (1: fixed, 2: pinned, 3: elastic)
 # check          Print IMK model parameters
-# 
+#
+# The IMK model parameters are calculated by `HingeParameters.column_hinge_parameters`
+# of MRFHelper (Eqs. (2)-(9) of [1], with the axial load ratio scaled by `SF_PPy`)
+# when generating the script
 # ---------------
 # Reference:
 # [1] Proposed Updates to the ASCE 41 Nonlinear Modeling Parameters for Wide-Flange Steel Columns in Support of Performance-Based Seismic Engineering
@@ -27,44 +28,9 @@
 # --------------------------------------------------------------------------------
 
 
-proc ColumnHinge {SpringID NodeI NodeJ E Ix d htw ry L Lb My PPy SF_PPy type_ {check ""}} {
-
-    set n 10.0;
-    set c1 1.0;
-    set c2 1.0;
-    set PPy [expr $PPy * double($SF_PPy)];  # Enlarge PPy for considering overturning effect
-
-    set K [expr ($n+1.0) * 6 * $E * $Ix / $L];
-
-    set theta_p [expr 294.0 * pow(($htw),-1.700) * pow(($Lb/$ry),-0.700) * pow((1-$PPy),1.600)];  # Eq. (7), [1]
-    set theta_pc [expr 90.0 * pow(($htw),-0.800) * pow(($Lb/$ry),-0.800) * pow((1-$PPy),2.500)];  # Eq. (9), [1]
-    if {$theta_p > 0.20} {set theta_p 0.2}
-    if {$theta_pc > 0.30} {set theta_pc 0.3}
-
-    if {$PPy <= 0.35} {
-        set Lamda [expr 25500. * pow(($htw),-2.140) * pow(($Lb/$ry),-0.530) * pow((1-$PPy),4.920)];
-    } else {
-        set Lamda [expr 268000. * pow(($htw),-2.300) * pow(($Lb/$ry),-1.300) * pow((1-$PPy),1.190)];	
-    }
-    if {$Lamda < 3.0} {set Lamda 3.0}
-
-    if {$PPy < 0.2} {
-        set My [expr (1.15/1.1)*$My*(1-$PPy/2)];
-    } else {
-        set My [expr (1.15/1.1)*$My*(9/8)*(1-$PPy)];
-    };  # Eq. (2), [1]
-
-    set McMy [expr 12.5 * pow(($htw),-0.200) * pow(($Lb/$ry),-0.400) * pow((1-$PPy),0.400)];  # Eq. (3), [1]
-    if {$McMy < 1.0} {set McMy 1.0}
-    if {$McMy > 1.3} {set McMy 1.3}
-
-    # set theta_y [expr $My/(6 * $E * $Ix / $L)];
-    # set theta_p [expr $theta_p - ($McMy-1.0)*$My/(6 * $E * $Ix / $L)];
-    # set theta_pc [expr $theta_pc + $theta_y + ($McMy-1.0)*$My/(6 * $E * $Ix / $L)];
+proc ColumnHinge {SpringID NodeI NodeJ K theta_p theta_pc theta_u My McMy Res Lamda type_ {check ""}} {
 
-    set theta_u 0.15;
     set D 1.0;
-    set Res [expr 0.5-0.4*$PPy];  # E1. (5), [1]
     set c 1.0;
 
     if {$type_ == 1} {
@@ -86,6 +52,3 @@ proc ColumnHinge {SpringID NodeI NodeJ E Ix d htw ry L Lb My PPy SF_PPy type_ {c
         puts "$check:\nKs: $K, My: $My, theta_p: $theta_p, theta_pc: $theta_pc, Res: $Res"
     }
 }
-
-
-
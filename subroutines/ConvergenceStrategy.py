@@ -0,0 +1,138 @@
+import openseespy.opensees as ops
+
+
+# Options of solution algorithm, (algorithm arguments, test arguments or None to use the default test)
+OPTIONS = [
+    (("KrylovNewton",), None),
+    (("NewtonLineSearch",), None),
+    (("Newton",), None),
+    (("SecantNewton",), None),
+]
+REGIMES = ('normal', 'reduced')  # full step, reduced step (near strong nonlinearity)
+
+_strategies: dict[tuple, 'ConvergenceStrategy'] = dict()  # strategies of the current process
+
+
+class ConvergenceStrategy:
+
+    def __init__(self, test: tuple, options: list[tuple[tuple, tuple]]=None):
+        """Fallback chain of solution algorithms that learns which option converges.
+        The successful and attempted steps of each option are counted for each response
+        regime, after a converged step or a change of regime the next step starts from the
+        option with the highest success rate in the regime (ties are broken by the order
+        of options), and the options are switched in the same order once the step cannot
+        be reduced any more.
+        The same strategy can be reused by later analyses of the same model,
+        see `get_strategy`.
+
+        Args:
+            test (tuple): Arguments of the default convergence test, e.g. ("EnergyIncr", 1e-3, 100)
+            options (list[tuple[tuple, tuple]], optional): Options of (algorithm arguments, test
+            arguments or None). Defaults to `OPTIONS`.
+        """
+        self.test = tuple(test)
+        self.options = list(OPTIONS if options is None else options)
+        self.hits = {regime: [0] * len(self.options) for regime in REGIMES}
+        self.attempts = {regime: [0] * len(self.options) for regime in REGIMES}
+        self.n_switches = 0
+        self.current = 0
+        self._tried: set[int] = set()  # options tried since the last converged step
+        self._applied = None  # (algorithm, test) set in the domain
+        self._regime = None  # regime of the last step, None after a converged step
+
+    def _rate(self, regime: str, i: int) -> tuple[float, int]:
+        """Success rate (Laplace estimate) of an option, and its order for ties"""
+        return (self.hits[regime][i] + 1) / (self.attempts[regime][i] + 2), -i
+
+    def preferred(self, regime: str) -> int:
+        """Index of the untried option with the highest success rate"""
+        remaining = [i for i in range(len(self.options)) if i not in self._tried]
+        return max(remaining, key=lambda i: self._rate(regime, i))
+
+    def start(self):
+        """Reset the state of the current analysis (the statistics are kept), should be
+        called after defining the analysis"""
+        self._tried.clear()
+        self._applied = None
+        self._regime = None
+
+    def select(self, regime: str):
+        """Select the option of the next step and set it in the domain"""
+        if regime != self._regime:
+            self.current = self.preferred(regime)
+            self._regime = regime
+        self.apply()
+
+    def apply(self, option: int=None):
+        """Set the algorithm (and test) of the current option (or the given option) in the domain"""
+        if option is not None:
+            self.current = option
+        algorithm, test = self.options[self.current]
+        test = self.test if test is None else tuple(test)
+        if self._applied is None or self._applied[1] != test:
+            ops.test(*test)
+        if self._applied is None or self._applied[0] != algorithm:
+            ops.algorithm(*algorithm)
+        self._applied = (algorithm, test)
+
+    def converged(self, regime: str):
+        """Record a converged step"""
+        self.hits[regime][self.current] += 1
+        self.attempts[regime][self.current] += 1
+        self._tried.clear()
+        self._regime = None
+
+    def failed(self, regime: str):
+        """Record a failed step"""
+        self.attempts[regime][self.current] += 1
+
+    def switch(self, regime: str) -> bool:
+        """Switch to the best option not tried since the last converged step,
+        returns False if all options have been tried"""
+        self._tried.add(self.current)
+        if len(self._tried) == len(self.options):
+            return False
+        self.current = self.preferred(regime)
+        self._regime = regime
+        self.n_switches += 1
+        return True
+
+    def _name(self, i: int) -> str:
+        algorithm, test = self.options[i]
+        return ' '.join(str(arg) for arg in algorithm) + ('' if test is None else f' ({test[0]} {test[1]})')
+
+    @property
+    def name(self) -> str:
+        """Name of the current option"""
+        return self._name(self.current)
+
+    @property
+    def stats(self) -> dict:
+        """Hit statistics, {regime: {option: (hits, attempts)}} and the number of switches"""
+        stats = {'n_switches': self.n_switches}
+        for regime in REGIMES:
+            stats[regime] = {self._name(i): (self.hits[regime][i], self.attempts[regime][i])
+                             for i in range(len(self.options))}
+        return stats
+
+
+def get_strategy(analysis: str, test: tuple, ctrl_nodes: list,
+                 options: list[tuple[tuple, tuple]]=None) -> ConvergenceStrategy:
+    """Get the strategy of the model in the current domain, the strategy is shared by
+    the analyses (e.g. records of a ground motion suite) of the same model and
+    analysis type in the process. The model is identified by the numbers of nodes
+    and elements and the control nodes.
+
+    Args:
+        analysis (str): Analysis type, e.g. "TH"
+        test (tuple): Arguments of the default convergence test
+        ctrl_nodes (list): Control nodes
+        options (list[tuple[tuple, tuple]], optional): See `ConvergenceStrategy`
+
+    Returns:
+        ConvergenceStrategy: Strategy of the model
+    """
+    key = (analysis, tuple(test), len(ops.getNodeTags()), len(ops.getEleTags()), tuple(ctrl_nodes))
+    if key not in _strategies:
+        _strategies[key] = ConvergenceStrategy(test, options)
+    return _strategies[key]
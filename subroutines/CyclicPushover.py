@@ -20,6 +20,7 @@
 import numpy as np
 import openseespy.opensees as ops
 import time
+from .ConvergenceStrategy import ConvergenceStrategy, get_strategy
 
 
 def CyclicPushover(
@@ -30,14 +31,18 @@ def CyclicPushover(
         maxRunTime: float,
         ShowAnimation: bool,
         min_factor: float=1e-6,
-        max_factor: float=1
+        max_factor: float=1,
+        strategy: ConvergenceStrategy=None
     ) -> int:
 
+    test = ("EnergyIncr", 1.e-5, 30)
+    if strategy is None:
+        strategy = get_strategy("CP", test, [CtrlNode])
     ops.wipeAnalysis()
     ops.constraints("Plain")
     ops.numberer("RCM")
     ops.system("UmfPack")
-    ops.test("EnergyIncr", 1.e-5, 30)
+    ops.test(*test)
     ops.algorithm("KrylovNewton")
     ops.integrator("DisplacementControl", CtrlNode, 1 ,Dincr_init)
     ops.analysis("Static")
@@ -45,8 +50,7 @@ def CyclicPushover(
     for RDR in RDR_path:
 
         print(f'RDR = {RDR} starts')
-        ls_algorithm = ["KrylovNewton", "NewtonLineSearch", "Newton", "SecantNewton"]
-        Id_algorithm = 0
+        strategy.start()
         factor = 1.0
         start_time = time.time()
         D_target = RDR * HBuilding
@@ -59,10 +63,12 @@ def CyclicPushover(
             if time.time() - start_time >= maxRunTime:
                 print("Exceeding maximum running time")
                 return 3
-            ops.algorithm(ls_algorithm[Id_algorithm])
+            regime = 'normal' if factor >= 1 else 'reduced'
+            strategy.select(regime)
             ops.integrator("DisplacementControl", CtrlNode, 1, Dincr)
             ok = ops.analyze(1)
             if ok == 0:
+                strategy.converged(regime)
                 if (direction == 1) and (ops.nodeDisp(CtrlNode, 1) >= D_target):
                     break
                 if (direction == -1) and (ops.nodeDisp(CtrlNode, 1) <= D_target):
@@ -71,17 +77,15 @@ def CyclicPushover(
                 factor = min(factor * 2, max_factor)
                 if factor_old < factor:
                     print(f"-- {ops.nodeDisp(CtrlNode, 1)} -- Enlarged factor: {factor}")
-                Id_algorithm -= 1
-                Id_algorithm = max(0, Id_algorithm)
             else:
+                strategy.failed(regime)
                 factor = factor * 0.5
                 if factor < min_factor:
                     factor = min_factor
-                    Id_algorithm += 1
-                    if Id_algorithm == 4:
+                    if not strategy.switch(regime):
                         print("Cannot converge")
                         return 2
-                    print(f"-- {ops.nodeDisp(CtrlNode, 1)} ------ Switched algorithm: {ls_algorithm[Id_algorithm]}")
+                    print(f"-- {ops.nodeDisp(CtrlNode, 1)} ------ Switched algorithm: {strategy.name}")
                 print(f"-- {ops.nodeDisp(CtrlNode, 1)} -- Reduced factor: {factor}")
             Dincr = direction * factor * Dincr_init
         # Analysis finished
@@ -1,10 +1,13 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
 import openseespy.opensees as ops
 from typing import Dict
-import matplotlib.pyplot as plt
-from matplotlib.axes import Axes
 
 
 def DisplayModel2D(model_data_init: tuple, ax: Axes):
+    import matplotlib.pyplot as plt
     node_info_init: Dict[int, list[float, float]]
     ele_info_init: Dict[int, tuple[float, float, float, float]]
     model_size_init: tuple[float, float, float, float]
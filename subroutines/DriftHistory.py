@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class DriftHistory:
+
+    def __init__(self, NStory: int, keep_history: bool=True, chunk: int=4096, n_pad: int=10):
+        """Growable store of story drift ratios recorded at each converged step.
+        Rows are written into a preallocated block which is enlarged by whole
+        chunks, so appending a step does not copy the recorded history.
+
+        Args:
+            NStory (int): Number of stories
+            keep_history (bool, optional): If False, only the running peaks and the
+            residual (last) drift ratios are kept. Defaults to True.
+            chunk (int, optional): Number of rows allocated at once. Defaults to 4096.
+            n_pad (int, optional): Number of leading zero rows. Defaults to 10.
+        """
+        self.NStory = NStory
+        self.keep_history = keep_history
+        self.chunk = chunk
+        self.n_pad = n_pad
+        self.peak = np.zeros(NStory)  # peak absolute story drift ratio
+        self.residual = np.zeros(NStory)  # drift ratio of the last step
+        self.roof_peak = 0.0
+        self.roof_residual = 0.0
+        if keep_history:
+            self._SDRs = np.zeros((max(chunk, n_pad), NStory))
+            self._SDR_roof = np.zeros(max(chunk, n_pad))
+            self.n = n_pad
+        else:
+            self.n = 0
+
+    def append(self, SDRs_i, SDR_roof_i: float):
+        """Append the drift ratios of a converged step"""
+        SDRs_i = np.asarray(SDRs_i, dtype=float)
+        np.maximum(self.peak, np.abs(SDRs_i), out=self.peak)
+        self.residual[:] = SDRs_i
+        self.roof_peak = max(self.roof_peak, abs(SDR_roof_i))
+        self.roof_residual = SDR_roof_i
+        if not self.keep_history:
+            return
+        if self.n == len(self._SDR_roof):
+            self._grow()
+        self._SDRs[self.n] = SDRs_i
+        self._SDR_roof[self.n] = SDR_roof_i
+        self.n += 1
+
+    def _grow(self):
+        size = len(self._SDR_roof) + self.chunk
+        SDRs = np.zeros((size, self.NStory))
+        SDR_roof = np.zeros(size)
+        SDRs[:self.n] = self._SDRs[:self.n]
+        SDR_roof[:self.n] = self._SDR_roof[:self.n]
+        self._SDRs, self._SDR_roof = SDRs, SDR_roof
+
+    @property
+    def SDRs(self) -> np.ndarray:
+        """Story drift ratios, shape (steps, NStory). If the full history is not kept,
+        returns the peak (row 0) and residual (row 1) drift ratios."""
+        if not self.keep_history:
+            return np.vstack((self.peak, self.residual))
+        return self._SDRs[:self.n]
+
+    @property
+    def SDR_roof(self) -> list[float]:
+        """Roof drift ratios of each step. If the full history is not kept,
+        returns the peak and residual roof drift ratios."""
+        if not self.keep_history:
+            return [self.roof_peak, self.roof_residual]
+        return self._SDR_roof[:self.n].tolist()
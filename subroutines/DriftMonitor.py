@@ -0,0 +1,38 @@
+import numpy as np
+import openseespy.opensees as ops
+
+
+class DriftMonitor:
+
+    def __init__(self, ctrl_nodes: list, story_heights: list, dof: int=1):
+        """Story drift ratios of the current step. The control nodes and story heights
+        are stored once, each update reads the displacement of every control node
+        only once into a preallocated buffer and computes the drift ratios with
+        array operations.
+
+        Args:
+            ctrl_nodes (list): Controlled nodes of story (from the 1st story to the roof)
+            story_heights (list): Heights of story
+            dof (int, optional): Degree of freedom. Defaults to 1.
+        """
+        self.N = len(story_heights)
+        self.nodes = [int(node) for node in ctrl_nodes[:self.N]]
+        self.dof = dof
+        self.heights = np.array(story_heights, dtype=float)
+        self.HBuilding = float(sum(story_heights))
+        self.disp = np.zeros(self.N + 1)  # displacement of ground and each floor
+        self.SDRs = np.zeros(self.N)  # story drift ratios
+        self.SDR_roof = 0.0  # roof drift ratio
+        self.max_abs = 0.0  # maximum absolute story drift ratio of the current step
+
+    def update(self) -> np.ndarray:
+        """Read the displacements of the current step, returns the story drift ratios
+        (the buffer is overwritten by the next update)"""
+        disp = self.disp
+        for i, node in enumerate(self.nodes):
+            disp[i + 1] = ops.nodeDisp(node, self.dof)
+        np.subtract(disp[1:], disp[:-1], out=self.SDRs)
+        np.divide(self.SDRs, self.heights, out=self.SDRs)
+        self.SDR_roof = disp[-1] / self.HBuilding
+        self.max_abs = max(self.SDRs.max(), -self.SDRs.min())
+        return self.SDRs
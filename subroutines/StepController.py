@@ -0,0 +1,147 @@
+import numpy as np
+import openseespy.opensees as ops
+
+
+class StepController:
+
+    def __init__(
+            self, dt_init: float, min_factor: float=1e-6, max_factor: float=1,
+            fv_start: float=None, max_factor_fv: float=4, target_iter: int=10,
+            max_growth: float=2, kI: float=0.3, kP: float=0.4, kR: float=0.2,
+            target_rate: float=0.1, keep_stats: bool=True
+        ):
+        """PI step size controller of transient analysis. The time step is
+        `dt_init * factor`, after each converged step the factor is updated by
+        the number of iterations and the energy residuals (norms) of the convergence test, i.e.
+
+            factor *= (target_iter / iter_n) ** kI * (iter_n-1 / iter_n) ** kP * min(1, (target_rate / rate_n) ** kR)
+
+        where `rate_n = (norm_last / norm_first) ** (1 / (iter_n - 1))` is the average
+        contraction of the residual in the iterations of the step (close to 1 if the
+        residual decreases slowly near strong nonlinearity). The residual term only
+        slows down the growth and is 1 for steps converged in one iteration.
+        The step grows in the (nearly) elastic response that converges in a few
+        iterations, and shrinks before failing near strong nonlinearity.
+        The factor is halved after a failed step.
+
+        Args:
+            dt_init (float): Initial time step (ground motion step)
+            min_factor (float, optional): Minimum factor. Defaults to 1e-6.
+            max_factor (float, optional): Maximum factor during the ground motion. Defaults to 1.
+            fv_start (float, optional): Start time of free vibration (duration of the ground
+            motion), after which steps up to `max_factor_fv` are allowed. Defaults to None.
+            max_factor_fv (float, optional): Maximum factor during free vibration. Defaults to 4.
+            target_iter (int, optional): Target number of iterations of each step. Defaults to 10.
+            max_growth (float, optional): Maximum ratio of growth after a step. Defaults to 2.
+            kI (float, optional): Integral gain. Defaults to 0.3.
+            kP (float, optional): Proportional gain. Defaults to 0.4.
+            kR (float, optional): Gain of the residual term. Defaults to 0.2.
+            target_rate (float, optional): Target contraction rate of the residual. Defaults to 0.1.
+            keep_stats (bool, optional): Whether to record the statistics of each
+            converged step. Defaults to True.
+        """
+        self.dt_init = dt_init
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.fv_start = fv_start
+        self.max_factor_fv = max(max_factor, max_factor_fv)
+        self.target_iter = target_iter
+        self.max_growth = max_growth
+        self.kI = kI
+        self.kP = kP
+        self.kR = kR
+        self.target_rate = target_rate
+        self.keep_stats = keep_stats
+        self.factor = 1.0
+        self.iter_old = None  # iterations of the last converged step
+        self.n_steps = 0
+        self.n_failures = 0
+        self._stats: list[tuple[float, float, int, float]] = []  # (time, dt, iterations, norm)
+
+    def limit(self, time_: float) -> float:
+        """Maximum factor at the given time"""
+        if self.fv_start is not None and time_ >= self.fv_start - 1e-10:
+            return self.max_factor_fv
+        return self.max_factor
+
+    def get_dt(self, time_: float, duration: float) -> float:
+        """Time step of the next step, which does not cross the start of
+        free vibration and the end of analysis"""
+        self.factor = min(self.factor, self.limit(time_))
+        dt = self.dt_init * self.factor
+        if self.fv_start is not None and time_ < self.fv_start < time_ + dt:
+            dt = self.fv_start - time_
+        if dt + time_ > duration:
+            dt = duration - time_
+        return dt
+
+    def converged(self, time_: float, dt: float) -> bool:
+        """Update the factor after a converged step, returns True if the factor is enlarged"""
+        n_iter = max(1, ops.testIter())
+        norms = ops.testNorm()
+        if self.keep_stats:
+            self._stats.append((time_, dt, n_iter, norms[n_iter - 1] if len(norms) >= n_iter else np.nan))
+        ratio = (self.target_iter / n_iter) ** self.kI
+        if self.iter_old is not None:
+            ratio *= (self.iter_old / n_iter) ** self.kP
+        ratio *= self.residual_term(norms[:n_iter])
+        ratio = min(ratio, self.max_growth)
+        self.iter_old = n_iter
+        self.n_steps += 1
+        factor_old = self.factor
+        self.factor = max(self.min_factor, min(self.factor * ratio, self.limit(time_)))
+        return self.factor > factor_old
+
+    def residual_term(self, norms: list[float]) -> float:
+        """Factor of the residual term given the norms of the iterations of a step"""
+        if len(norms) < 2 or not norms[0] > 0:
+            return 1.0
+        rate = (max(norms[-1], 0) / norms[0]) ** (1 / (len(norms) - 1))
+        if rate <= self.target_rate:
+            return 1.0
+        return (self.target_rate / rate) ** self.kR
+
+    def failed(self) -> bool:
+        """Reduce the factor after a failed step, returns True if the
+        factor has already reached `min_factor`"""
+        self.n_failures += 1
+        self.iter_old = None
+        self.factor *= 0.5
+        if self.factor < self.min_factor:
+            self.factor = self.min_factor
+            return True
+        return False
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """State of the controller, see `set_state`"""
+        return {
+            'controller': np.array([self.factor, np.nan if self.iter_old is None else self.iter_old,
+                                    self.n_steps, self.n_failures]),
+            'controller_stats': np.array(self._stats, dtype=float).reshape(-1, 4),
+        }
+
+    def set_state(self, state: dict[str, np.ndarray]):
+        """Restore the state of the controller returned by `get_state`"""
+        factor, iter_old, n_steps, n_failures = state['controller']
+        self.factor = float(factor)
+        self.iter_old = None if np.isnan(iter_old) else int(iter_old)
+        self.n_steps = int(n_steps)
+        self.n_failures = int(n_failures)
+        if self.keep_stats:
+            self._stats = [(t, dt, int(n), norm) for t, dt, n, norm in state['controller_stats']]
+
+    @property
+    def stats(self) -> dict:
+        """Statistics of the converged steps
+        * n_steps: number of converged steps
+        * n_failures: number of failed steps
+        * time, dt, iterations, norm: arrays of each converged step (if `keep_stats`)
+        """
+        stats = {'n_steps': self.n_steps, 'n_failures': self.n_failures}
+        if self.keep_stats:
+            data = np.array(self._stats, dtype=float).reshape(-1, 4)
+            stats['time'] = data[:, 0]
+            stats['dt'] = data[:, 1]
+            stats['iterations'] = data[:, 2].astype(int)
+            stats['norm'] = data[:, 3]
+        return stats
@@ -1,17 +1,57 @@
+import os
 import numpy as np
 import openseespy.opensees as ops
 import time
-import matplotlib.pyplot as plt
+from pathlib import Path
+from operator import itemgetter
+from .DriftHistory import DriftHistory
+from .DriftMonitor import DriftMonitor
+from .StepController import StepController
+from .ConvergenceStrategy import ConvergenceStrategy, get_strategy
 # from subroutines import DisplayModel2D
 
 
+class THResult(tuple):
+    """Result of `TimeHistorySolver`, which is the previous 5-element tuple
+    (status, time, collapse, SDRs, SDR_roof), so that it can be unpacked or indexed
+    as before, with two additional attributes:
+    * reason (str): Reason of termination
+    * stats (dict): Statistics of steps and solution algorithms
+    """
+    status = property(itemgetter(0), doc='1 - finished, 2 - collapsed, 3 - cannot converge, 4 - exceeding maximum running time')
+    time = property(itemgetter(1), doc='Current time')
+    collapse = property(itemgetter(2), doc='Whether the structure collapsed')
+    SDRs = property(itemgetter(3), doc='Drift ratio of each story')
+    SDR_roof = property(itemgetter(4), doc='Drift ratio of roof level')
+
+    def __new__(cls, status: int, time: float, collapse: bool, SDRs: np.ndarray,
+                SDR_roof: list[float], reason: str=None, stats: dict=None):
+        self = super().__new__(cls, (status, time, collapse, SDRs, SDR_roof))
+        self.reason = reason
+        self.stats = dict() if stats is None else stats
+        return self
+
+    def __getnewargs__(self):
+        return (*self, self.reason, self.stats)
+
+    def __repr__(self):
+        return (f'THResult(status={self[0]!r}, time={self[1]!r}, collapse={self[2]!r}, '
+                f'reason={self.reason!r})')
+
+
 def TimeHistorySolver(
         dt_init: float, duration: float, story_heights: list,
         ctrl_nodes: list,  CollapseDrift: float, MaxAnalysisDrift: float,
         GMname: str, maxRunTime: float, ShowAnimation: bool,
-        min_factor: float=1e-6, max_factor: float=1
-    ) -> tuple[int, float, bool, np.ndarray, list[float]]:
+        min_factor: float=1e-6, max_factor: float=1,
+        keep_history: bool=True, confirm_time: float=0,
+        residual_drift: float=None, max_failures: int=None,
+        fv_start: float=None, max_factor_fv: float=4, target_iter: int=10,
+        strategy: ConvergenceStrategy=None, checkpoint: str | Path=None,
+        checkpoint_interval: float=60, resume: bool=False
+    ) -> THResult:
     """This solver is used to perform time history analysis for frame structure.
+    The analysis is terminated as soon as one of the collapse criteria is met.
 
     Args:
         dt_init (float): Ground motion step
@@ -24,97 +64,164 @@ def TimeHistorySolver(
         maxRunTime (float): Maximum run time (second)
         ShowAnimation (bool): Whether to display the building deformation
         print_result (bool): Whether to print analysis information
-        min_factor (float): Factor to control the adaptive time step
-        max_factor (float): Factor to control the adaptive time step
+        min_factor (float): Minimum factor of the adaptive time step
+        max_factor (float): Maximum factor of the adaptive time step during the ground motion
+        keep_history (bool): If False, only the peak and residual drift ratios are
+        returned instead of the full drift history
+        confirm_time (float): Analysis time (not running time) to continue after
+        `CollapseDrift` is exceeded before the collapse is confirmed, defaults to 0
+        (terminate immediately)
+        residual_drift (float): If given, the collapse is confirmed only if the maximum
+        story drift ratio at the end of the confirmation window is still larger than
+        this value, otherwise the collapse flag is cleared and the analysis continues
+        max_failures (int): Maximum number of non-converged steps, the analysis is
+        terminated as non-convergence once exceeded, defaults to no limit
+        fv_start (float): Start time of free vibration (ground motion duration), after
+        which the time step can be enlarged up to `max_factor_fv` times of `dt_init`
+        max_factor_fv (float): Maximum factor of the adaptive time step during free vibration
+        target_iter (int): Target number of iterations of each step, see `StepController`
+        strategy (ConvergenceStrategy): Fallback strategy of solution algorithms, defaults to
+        the strategy shared by the time history analyses of the model in the process
+        checkpoint (str | Path): Checkpoint file (.npz), which records the converged steps
+        and the solver state. It is written every `checkpoint_interval` and when exceeding
+        the maximum running time, and removed once the analysis terminates otherwise.
+        checkpoint_interval (float): Interval of writing the checkpoint (second)
+        resume (bool): Whether to resume from the checkpoint. The model should be rebuilt
+        in the same way before resuming, the converged steps are replayed (without failed
+        attempts and drift checks) to recover the state of the domain and the recorders.
+        The replay is not counted in `maxRunTime`.
     
-    Return: tuple[int, float, bool, np.ndarray, list[float]]:
+    Return: THResult:
         int: 1 - Analysis finished, the structure did not collapse,
              2 - The structure collapsed,
              3 - Cannot converge,
              4 - Exceeding maximum running time
         float: Current time
         bool: Whether the structure collapsed
-        np.ndarray: drift ratio of each story
-        list[float]: drift ratio of roof level
+        np.ndarray: drift ratio of each story (peak and residual if `keep_history` is False)
+        list[float]: drift ratio of roof level (peak and residual if `keep_history` is False)
+        The attributes `reason` (str) and `stats` (dict) give the reason of termination and
+        the statistics of steps (see `StepController.stats`), including the hit
+        statistics of solution algorithms ("strategy", see `ConvergenceStrategy.stats`)
     """
+    if CollapseDrift > MaxAnalysisDrift:
+        raise ValueError('`MaxAnalysisDrift` should be larger than `CollapseDrift`')
 
-    algorithms = [("KrylovNewton",), ("NewtonLineSearch",), ("Newton",), ("SecantNewton",)]
-    algorithm_id = 0
+    test = ("EnergyIncr", 1.0e-3, 100)
+    if strategy is None:
+        strategy = get_strategy("TH", test, ctrl_nodes)
     ops.wipeAnalysis()
     ops.constraints("Plain")
     ops.numberer("RCM")
     ops.system("UmfPack")
-    ops.test("EnergyIncr", 1.0e-3, 100)
+    ops.test(*test)
     ops.algorithm("KrylovNewton")
     ops.integrator("Newmark", 0.5, 0.25)
     ops.analysis("Transient")
+    strategy.start()
 
     collapse_flag = False
-    print_collapse = True
-    factor = 1
+    collapse_start = 0  # analysis time when `CollapseDrift` is exceeded
     start_time = time.time()
     nstep = 0
-    dt = dt_init
-    SDRs = np.zeros((10, len(story_heights)))
-    SDR_roof = [0] * 10
-    collapseTime = 60
-    collapseStart = 0
+    controller = StepController(dt_init, min_factor, max_factor, fv_start, max_factor_fv,
+                                target_iter, keep_stats=keep_history)
+    dt = controller.get_dt(ops.getTime(), duration)
+    history = DriftHistory(len(story_heights), keep_history)
+    monitor = DriftMonitor(ctrl_nodes, story_heights)
+    steps_dt, steps_option = [], []  # converged steps
+    checkpoint = None if checkpoint is None else Path(checkpoint)
+    last_checkpoint = time.time()
+
+    def save_checkpoint():
+        nonlocal last_checkpoint
+        temp = checkpoint.with_name(checkpoint.name + '.tmp')
+        with open(temp, 'wb') as f:
+            np.savez(f, dt=np.array(steps_dt, dtype=float), option=np.array(steps_option, dtype=int),
+                     collapse=np.array([collapse_flag, collapse_start]), **controller.get_state())
+        os.replace(temp, checkpoint)
+        last_checkpoint = time.time()
+
+    def result(status: int, reason: str) -> THResult:
+        if checkpoint is not None:
+            if status == 4:
+                save_checkpoint()
+            elif checkpoint.exists():
+                checkpoint.unlink()
+        return THResult(status, ops.getTime(), collapse_flag, history.SDRs,
+                        history.SDR_roof, reason, {**controller.stats, 'strategy': strategy.stats})
+
+    if resume and checkpoint is not None and checkpoint.exists():
+        with np.load(checkpoint) as data:
+            state = dict(data)
+        print(f"Resuming from checkpoint, replaying {len(state['dt'])} steps")
+        for dt_i, option in zip(state['dt'].tolist(), state['option'].tolist()):
+            strategy.apply(option)
+            if ops.analyze(1, dt_i) != 0:
+                print(f"Replay failed, continue from Time: {ops.getTime()}")
+                break
+            steps_dt.append(dt_i)
+            steps_option.append(option)
+            history.append(monitor.update(), monitor.SDR_roof)
+        else:
+            controller.set_state(state)
+            collapse_flag, collapse_start = bool(state['collapse'][0]), float(state['collapse'][1])
+        replay_time = time.time() - start_time
+        print(f"Resumed at Time: {ops.getTime()}, replay time: {replay_time:.2f} s")
+        dt = controller.get_dt(ops.getTime(), duration)
+        # The replay is not counted in the running time, so that a resumed analysis
+        # continues for `maxRunTime` from where it left off
+        start_time = time.time()
+        last_checkpoint = time.time()
+
     while True:
         if time.time() - start_time > maxRunTime:
             print("Exceeding maximum running time")
-            return 3, ops.getTime(), collapse_flag, SDRs, SDR_roof
-        if collapse_flag and time.time() - collapseStart > collapseTime:
-            return 2, ops.getTime(), collapse_flag, SDRs, SDR_roof
+            return result(4, 'maxRunTime')
+        regime = 'normal' if controller.factor >= 1 else 'reduced'
+        strategy.select(regime)
         ok = ops.analyze(1, dt)
         if ok == 0:
-            collapse_flag, maxAna_flag, SDRs_i, SDR_roof_i = SDR_tester(
-                story_heights, ctrl_nodes, CollapseDrift, MaxAnalysisDrift, GMname)
-            if collapse_flag and collapseStart == 0:
-                collapseStart = time.time()
-            try:
-                SDRs = np.vstack((SDRs, SDRs_i))
-            except:
-                print(SDRs)
-                print(SDRs_i)
-                raise ValueError()
-            SDR_roof.append(SDR_roof_i)
+            strategy.converged(regime)
+            steps_dt.append(dt)
+            steps_option.append(strategy.current)
+            history.append(monitor.update(), monitor.SDR_roof)
+            enlarged = controller.converged(ops.getTime(), dt)
+            if monitor.max_abs >= MaxAnalysisDrift:
+                collapse_flag = True
+                print("Analysis finished, the structure collapsed")
+                return result(2, 'MaxAnalysisDrift')
+            if monitor.max_abs >= CollapseDrift and not collapse_flag:
+                collapse_flag = True
+                collapse_start = ops.getTime()
+                print(f"The structure was collapse, Time: {ops.getTime()}")
+            if collapse_flag and ops.getTime() - collapse_start >= confirm_time:
+                if residual_drift is None or monitor.max_abs >= residual_drift:
+                    print("Analysis finished, the structure collapsed")
+                    return result(2, 'CollapseDrift')
+                collapse_flag = False
+                print(f"Collapse not confirmed, Time: {ops.getTime()}")
             if ops.getTime() >= duration:
                 print("Analysis finished")
                 # if ShowAnimation:
                 #     plt.ioff()
-                return 1, ops.getTime(), collapse_flag, SDRs, SDR_roof
-            if maxAna_flag:
-                print("Analysis finished, the structure collapsed")
-                # if ShowAnimation:
-                #     plt.ioff()
-                return 1, ops.getTime(), collapse_flag, SDRs, SDR_roof
-            if collapse_flag and print_collapse:
-                print("The structure was collapse")
-                print_collapse = False
-            factor_old = factor
-            factor *= 2
-            factor = min(factor, max_factor)
-            if factor_old < factor:
-                print(f"---- Enlarged factor: {factor}, Time: {ops.getTime()}")
-            algorithm_id -= 1
-            algorithm_id = max(0, algorithm_id)
-            # algorithm_id += 1
-            # algorithm_id == 4
-            # algorithm_id = 0
+                return result(2, 'CollapseDrift') if collapse_flag else result(1, 'finished')
+            if enlarged:
+                print(f"---- Enlarged factor: {controller.factor:.4g}, Time: {ops.getTime()}")
+            if checkpoint is not None and time.time() - last_checkpoint > checkpoint_interval:
+                save_checkpoint()
         else:
-            factor *= 0.5
-            if factor < min_factor:
-                factor = min_factor
-                algorithm_id += 1
-                if algorithm_id == 4:
+            strategy.failed(regime)
+            if controller.failed():
+                if not strategy.switch(regime):
                     print("Cannot converge")
-                    return 2, ops.getTime(), collapse_flag, SDRs, SDR_roof
-                print(f"-------- Switched algorithm:", *algorithms[algorithm_id], f'Time: {ops.getTime()}')
-            print(f"---- Reduced factor: {factor}, Time: {ops.getTime()}")
-        dt = dt_init * factor
-        if dt + ops.getTime() > duration:
-            dt = duration - ops.getTime()
-        ops.algorithm(*algorithms[algorithm_id])
+                    return result(2 if collapse_flag else 3, 'non-convergence')
+                print(f"-------- Switched algorithm: {strategy.name}, Time: {ops.getTime()}")
+            if max_failures is not None and controller.n_failures > max_failures:
+                print(f"Cannot converge, {controller.n_failures} non-converged steps")
+                return result(2 if collapse_flag else 3, 'max_failures')
+            print(f"---- Reduced factor: {controller.factor:.4g}, Time: {ops.getTime()}")
+        dt = controller.get_dt(ops.getTime(), duration)
         nstep += 1
         # if nstep == 20:
         #     break
@@ -129,23 +236,15 @@ def SDR_tester(story_heights: list, ctrl_nodes: list,
     if CollapseDrift > MaxAnalysisDrift:
         raise ValueError('`MaxAnalysisDrift` should be larger than `CollapseDrift`')
 
-    SDRs = []
-    SDR_roof = ops.nodeDisp(ctrl_nodes[len(story_heights) - 1])[0] / sum(story_heights)
-    collapse = (False, False)
-    for i, h in enumerate(story_heights):
-        if i == 0:
-            disp_b = 0
-            disp_t = ops.nodeDisp(ctrl_nodes[0])[0]
-        else:
-            disp_b = ops.nodeDisp(ctrl_nodes[i - 1])[0]
-            disp_t = ops.nodeDisp(ctrl_nodes[i])[0]
-        SDR = (disp_t - disp_b) / h
-        SDRs.append(SDR)
-        if SDR >= MaxAnalysisDrift:
-            collapse = (True, True)  # TODO
-        if SDR >= CollapseDrift:
-            collapse = (True, False)  # TODO 这两个if应调换
-    return *(collapse), SDRs, SDR_roof
+    monitor = DriftMonitor(ctrl_nodes, story_heights)
+    SDRs = monitor.update().tolist()
+    if monitor.max_abs >= MaxAnalysisDrift:
+        collapse = (True, True)
+    elif monitor.max_abs >= CollapseDrift:
+        collapse = (True, False)
+    else:
+        collapse = (False, False)
+    return *(collapse), SDRs, monitor.SDR_roof
 
 
 
@@ -13,6 +13,7 @@
 # temp              Temp folder
 # min_factor        Factor to control the adaptive time step
 # max_factor        Factor to control the adaptive time step
+# confirm_time      Analysis time to continue after collapse before termination
 
 # ---------------
 # Written by: Wenchen Lie, Guangzhou University, China
@@ -21,7 +22,7 @@
 
 proc TimeHistorySolver {
     dt_init duration story_heights ctrl_nodes CollapseDrift MaxAnalysisDrift
-    GMname maxRunTime temp {min_factor 1e-6} {max_factor 1}} {
+    GMname maxRunTime temp {min_factor 1e-6} {max_factor 1} {confirm_time 0}} {
 
     set ls_algorithms [list KrylovNewton NewtonLineSearch Newton SecantNewton];
     set Id_algorithm 0;
@@ -36,12 +37,10 @@ proc TimeHistorySolver {
     analysis Transient;
 
     set collapse_flag 0;
-    set print_collapse 1;
     set factor 1.0;
     set start_time [clock seconds];
     set nstep 0;
     set dt $dt_init;
-    set collapseTime 60.0;
     set collapseStart 0;
     while {1} {
         # puts [eleResponse 10020109 deformation]
@@ -49,9 +48,6 @@ proc TimeHistorySolver {
             puts "Exceeding maximum running time";
             return [list 4 [getTime]];
         }
-        if {$collapse_flag == 1 && [expr [clock seconds] - $collapseStart] > $collapseTime} {
-            return [list 2 [getTime]]
-        }
         set ok [analyze 1 $dt];
         if {$ok == 0} {
             # Current step converged successfully
@@ -60,16 +56,19 @@ proc TimeHistorySolver {
                 return [list 1 [getTime]];
             }
             set test_result [SDR_tester $story_heights $ctrl_nodes $CollapseDrift $MaxAnalysisDrift $GMname $temp]
-            set collapse_flag [lindex $test_result 0]
             set maxAna_flag [lindex $test_result 1]
-            if {$collapse_flag == 1 && $collapseStart == 0} {set collapseStart [clock seconds]}
             if {$maxAna_flag} {
                 puts "Analysis finished, the structure collapsed"
                 return [list 2 [getTime]]
             }
-            if {$collapse_flag && $print_collapse} {
-                puts "The structure was collapse"
-                set print_collapse 0
+            if {[lindex $test_result 0] == 1 && $collapse_flag == 0} {
+                set collapse_flag 1
+                set collapseStart [getTime]
+                puts "The structure was collapse, Time: [getTime]"
+            }
+            if {$collapse_flag == 1 && [expr [getTime] - $collapseStart] >= $confirm_time} {
+                puts "Analysis finished, the structure collapsed"
+                return [list 2 [getTime]]
             }
             set factor_old $factor
             set factor [expr {min($factor * 2, $max_factor)}]